@@ -0,0 +1,136 @@
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+import pandas as pd
+
+import data_store
+import schema
+
+LEGACY_COLUMN = 'Выполненные заказы (номера)'
+
+
+# Запись о назначении заказа водителю или смене статуса заказа
+def record(order_number, driver_name, status, changed_by=''):
+    record_many([(order_number, driver_name, status, changed_by)])
+
+
+# Несколько записей одной операцией (импорт): entries — (номер заказа, водитель, статус, кто изменил)
+def record_many(entries):
+    changed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    data_store.insert_rows('assignments', [{
+        'Номер заказа': order_number,
+        'Имя водителя': driver_name,
+        'Статус': status,
+        'Время изменения': changed_at,
+        'Кто изменил': changed_by,
+    } for order_number, driver_name, status, changed_by in entries])
+
+
+# Индекс журнала назначений: номера строк по водителю и по заказу.
+# Новые записи добавляются в индекс без перестроения.
+class AssignmentIndex:
+    def __init__(self, df):
+        self.rows = df.to_dict('records')
+        self.by_driver = defaultdict(list)
+        self.by_order = defaultdict(list)
+        self.latest = defaultdict(dict)  # водитель -> {номер заказа: последний статус}
+        for position, row in enumerate(self.rows):
+            self._index(position, row)
+
+    def _index(self, position, row):
+        self.by_driver[row.get('Имя водителя')].append(position)
+        self.by_order[row.get('Номер заказа')].append(position)
+        self.latest[row.get('Имя водителя')][row.get('Номер заказа')] = row.get('Статус')
+
+    # Журнал только дополняется; при других изменениях индекс строится заново
+    def apply(self, event):
+        if event.op != 'insert':
+            return False
+        for row in event.rows:
+            self.rows.append(row)
+            self._index(len(self.rows) - 1, row)
+
+    # Строки журнала в таблице по схеме: новые записи хранятся как записаны (время — текстом)
+    def _frame(self, positions):
+        df = pd.DataFrame([self.rows[i] for i in positions], columns=data_store.TABLES['assignments'][1])
+        return schema.coerce('assignments', df)
+
+    # Все переходы по водителю (в порядке записи)
+    def driver_history(self, driver):
+        return self._frame(self.by_driver.get(driver, []))
+
+    # Все переходы по заказу
+    def order_history(self, order_number):
+        return self._frame(self.by_order.get(order_number, []))
+
+    # Последний известный статус каждого заказа водителя
+    def driver_orders(self, driver):
+        return dict(self.latest.get(driver, {}))
+
+    # Статистика водителя: сколько заказов назначено и сколько выполнено
+    def driver_stats(self, driver):
+        orders = self.latest.get(driver, {})
+        completed = sum(1 for status in orders.values() if status == "Выполнен")
+        return {'Заказов': len(orders), 'Выполнено': completed}
+
+    # Сводная статистика по всем водителям
+    def stats(self):
+        return pd.DataFrame([{'Имя водителя': driver, **self.driver_stats(driver)} for driver in self.by_driver])
+
+
+# Индекс для текущей версии журнала назначений
+def get_index():
+    return data_store.derived('assignments', 'index', AssignmentIndex)
+
+
+# Разбор строки вида "123, 456, 123" в уникальные номера в порядке появления
+def parse_legacy(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return []
+    numbers = [part.strip() for part in str(value).split(',')]
+    return list(dict.fromkeys(n for n in numbers if n))
+
+
+# Перенос номеров заказов из строкового столбца машин в журнал назначений.
+# Повторный запуск ничего не дублирует: уже перенесённые номера пропускаются.
+def migrate_legacy():
+    trucks = data_store.load_table('trucks')
+    if LEGACY_COLUMN not in trucks.columns:
+        return 0
+    orders = data_store.load_table('orders')
+    statuses = dict(zip(orders['Номер заказа'].astype(str), orders['Статус'])) if not orders.empty else {}
+    index = get_index()
+
+    rows = []
+    for driver, value in zip(trucks['Имя водителя'], trucks[LEGACY_COLUMN]):
+        known = {str(n) for n in index.driver_orders(driver)}
+        for number in parse_legacy(value):
+            if number not in known:
+                rows.append({
+                    'Номер заказа': number,
+                    'Имя водителя': driver,
+                    'Статус': statuses.get(number, "Выполнен"),
+                    'Время изменения': None,
+                    'Кто изменил': 'миграция',
+                })
+    if rows:
+        data_store.insert_rows('assignments', rows)
+    for driver in trucks.loc[trucks[LEGACY_COLUMN].notna(), 'Имя водителя']:
+        data_store.update_rows('trucks', {'Имя водителя': driver}, {LEGACY_COLUMN: None})
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Журнал назначений заказов водителям")
+    parser.add_argument('command', choices=['migrate', 'stats'])
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        print(f"Перенесено назначений: {migrate_legacy()}")
+    else:
+        print(get_index().stats().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Время запуска и перезапусков приложения без браузера (Streamlit AppTest).
+#
+# Для каждой страницы в отдельном процессе замеряется:
+#   * открытие приложения (первый запуск скрипта: импорты и загрузка таблиц стартовой страницы);
+#   * первый переход на страницу;
+#   * повторный запуск страницы (rerun после действия пользователя), медиана по --runs;
+#   * число загруженных модулей и подключены ли openpyxl и streamlit_tags.
+# С --baseline REV те же замеры выполняются для версии из git (например, до разбиения
+# app.py на страницы), чтобы сравнить результаты.
+#
+# Запуск: python benchmarks/app_startup.py --runs 5 --baseline HEAD~1
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ["Управление доставками", "Управление долгами", "История операций", "Менеджер заказов"]
+
+
+# Замер в отдельном процессе: кэши модулей и данных не переживают переход между деревьями
+def _measure(tree, page, runs):
+    sys.path.insert(0, tree)
+    os.chdir(tree)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(tree, 'app.py'), default_timeout=120)
+    started = time.perf_counter()
+    at.run()
+    opened = time.perf_counter() - started
+
+    started = time.perf_counter()
+    at.sidebar.selectbox[0].set_value(page).run()
+    switched = time.perf_counter() - started
+
+    reruns = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - started)
+
+    return {
+        'opened': opened,
+        'switched': switched,
+        'rerun': statistics.median(reruns),
+        'modules': len(sys.modules),
+        'openpyxl': 'openpyxl' in sys.modules,
+        'streamlit_tags': 'streamlit_tags' in sys.modules,
+        'errors': [str(e.value) for e in at.exception],
+    }
+
+
+def _run_tree(tree, runs):
+    results = {}
+    for page in PAGES:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', tree, page, str(runs)],
+                                capture_output=True, text=True, check=True).stdout
+        results[page] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+def _export(rev, target):
+    archive = subprocess.run(['git', '-C', ROOT, 'archive', rev], capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', target], input=archive, check=True)
+
+
+def _report(label, results):
+    print(label)
+    print(f"{'Страница':<24} {'Открытие, мс':>13} {'Переход, мс':>12} {'Rerun, мс':>10} {'Модулей':>8} "
+          f"{'openpyxl':>9} {'tags':>5}")
+    for page, r in results.items():
+        print(f"{page:<24} {r['opened'] * 1000:>13.0f} {r['switched'] * 1000:>12.0f} {r['rerun'] * 1000:>10.0f} "
+              f"{r['modules']:>8} {'да' if r['openpyxl'] else 'нет':>9} {'да' if r['streamlit_tags'] else 'нет':>5}")
+        if r['errors']:
+            print(f"    ошибки: {r['errors']}")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска и перезапусков страниц приложения")
+    parser.add_argument('--runs', type=int, default=5, help="сколько повторных запусков страницы замерять")
+    parser.add_argument('--baseline', help="версия из git для сравнения (например, HEAD~1)")
+    parser.add_argument('--worker', nargs=3, metavar=('TREE', 'PAGE', 'RUNS'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        tree, page, runs = args.worker
+        print(json.dumps(_measure(tree, page, int(runs)), ensure_ascii=False))
+        return
+
+    current = _run_tree(ROOT, args.runs)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as baseline_dir:
+            _export(args.baseline, baseline_dir)
+            baseline = _run_tree(baseline_dir, args.runs)
+        _report(f"Версия {args.baseline}", baseline)
+    _report("Текущая версия", current)
+    if args.baseline:
+        print(f"{'Страница':<24} {'Rerun было, мс':>15} {'стало, мс':>10} {'ускорение':>10}")
+        for page in PAGES:
+            before, after = baseline[page]['rerun'], current[page]['rerun']
+            print(f"{page:<24} {before * 1000:>15.0f} {after * 1000:>10.0f} {before / after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+# Бенчмарк путей работы с данными без браузера: загрузка таблиц, поиск зон, расчёт
+# доставки, аналитика долгов, история, изменение и сохранение заказов.
+#
+# Синтетический набор (benchmarks/synthetic.py) генерируется во временный каталог,
+# затем каждый сценарий выполняется --repeat раз и печатается минимум и медиана.
+# Результаты можно сохранить (--save) и сравнить с предыдущим запуском (--compare):
+# сценарии, ставшие медленнее больше чем на --tolerance (и не меньше чем на --min-delta мс),
+# отмечаются, и скрипт завершается с кодом 1 — так регрессии видны до выкладки.
+#
+# Запуск: python benchmarks/data_paths.py --size medium --backend xlsx --save before.json
+#         python benchmarks/data_paths.py --size medium --backend xlsx --compare before.json
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+
+CASES = []
+
+
+# Регистрация сценария: setup готовит состояние (не замеряется), fn — замеряемая часть
+def case(name, setup=None):
+    def register(fn):
+        CASES.append((name, setup, fn))
+        return fn
+    return register
+
+
+def _cold(name):
+    import data_store
+
+    return lambda: data_store.invalidate(name)
+
+
+def _define_cases(tables, queries):
+    import io
+    import itertools
+
+    import bulk_import
+    import data_store
+    import debt_analytics
+    import dispatch
+    import history_reports
+    import pandas as pd
+    import quotes
+    import zone_search
+
+    for name in ['delivery', 'debts', 'orders', 'trucks', 'history']:
+        case(f"загрузка {name} (холодная)", _cold(name))(lambda name=name: data_store.load_table(name))
+        case(f"загрузка {name} (из кэша)")(lambda name=name: data_store.load_table(name))
+
+    case("история: число строк")(lambda: data_store.count_rows('history'))
+    case("история: последние 500")(lambda: data_store.tail_table('history', 500))
+    case("история: потоковый проход")(lambda: sum(len(chunk) for chunk in data_store.iter_table('history', 50000)))
+
+    case("отчёты: индекс истории", _cold('history'))(history_reports.get_index)
+    case("отчёты: дневные итоги", _cold('history'))(history_reports.get_rollups)
+    history_index = history_reports.get_index()
+    last = history_index.date_range()[1]
+    client = tables['history']['Клиент'].iloc[0]
+    case("отчёты: операции клиента")(lambda: history_index.query(client=client))
+    case("отчёты: операции за квартал")(lambda: history_index.query(start=last - pd.Timedelta(days=90), end=last))
+    case("отчёты: итоги по месяцам")(lambda: history_reports.get_rollups().report('Организация', 'M'))
+    case("отчёты: выгрузка CSV за год")(
+        lambda: history_reports.export_bytes('csv', start=last - pd.Timedelta(days=365), end=last))
+
+    # Те же фильтр и группировка по таблице в том виде, как прочитана, и по приведённой к схеме
+    typed = {name: data_store.load_table(name) for name in ['orders', 'history']}
+    raw = {name: data_store.backend.read(name) for name in ['orders', 'history']}
+    for label, frames in [("без схемы", raw), ("со схемой", typed)]:
+        case(f"типы: заказы в пути ({label})")(lambda df=frames['orders']: df[df['Статус'] == "В пути"])
+        case(f"типы: история по организациям ({label})")(
+            lambda df=frames['history']: df.groupby('Организация', observed=True)['Сумма'].sum())
+
+    case("поиск: построение индекса", _cold('delivery'))(zone_search.get_index)
+    df_delivery = data_store.load_table('delivery')
+
+    @case(f"поиск: {len(queries)} запросов")
+    def _search():
+        for query in queries:
+            zone_search.search_zones(df_delivery, query)
+
+    addresses = list(tables['orders']['Адрес доставки'])
+    weights = list(tables['orders']['Вес груза (т)'])
+    case(f"расчёт доставки: {len(addresses)} адресов")(lambda: quotes.quote_batch(addresses, weights))
+
+    case("долги: аналитика", _cold('debts'))(debt_analytics.get_analytics)
+
+    case("распределение ожидающих заказов")(lambda: dispatch.build_plan())
+
+    numbers = list(tables['orders']['Номер заказа'][:20])
+
+    @case("заказы: 20 изменений статуса")
+    def _update_orders():
+        for number in numbers:
+            data_store.update_rows('orders', {'Номер заказа': number}, {'Статус': "Выполнен"},
+                                   increments={'Выполненные заказы': 1})
+
+    @case("заказы: 20 изменений статуса в batch")
+    def _update_orders_batch():
+        with data_store.batch('orders'):
+            _update_orders()
+
+    @case("заказы: добавление 20 заказов")
+    def _insert_orders():
+        rows = tables['orders'].head(20).assign(**{'Номер заказа': lambda df: df['Номер заказа'] + '-new'})
+        data_store.insert_rows('orders', rows.to_dict('records'))
+
+    @case("история: добавление 100 записей")
+    def _append_history():
+        data_store.insert_rows('history', tables['history'].head(100).to_dict('records'))
+
+    # Импорт: файл в памяти, у каждого повтора свои номера заказов, чтобы строки не считались дублями
+    def _orders_csv(rows, suffix):
+        data = rows.assign(**{'Номер заказа': rows['Номер заказа'] + suffix}).to_csv(index=False)
+        return io.BytesIO(data.encode('utf-8-sig'))
+
+    all_orders_csv = _orders_csv(tables['orders'], '-imp')
+    case(f"импорт: проверка {len(tables['orders'])} заказов из CSV")(
+        lambda: bulk_import.import_file('orders', all_orders_csv, 'orders.csv', dry_run=True))
+    imports = itertools.count()
+    import_file = []
+
+    def _next_import():
+        import_file[:] = [_orders_csv(tables['orders'].head(1000), f'-imp{next(imports)}')]
+
+    case("импорт: 1000 заказов из CSV", _next_import)(
+        lambda: bulk_import.import_file('orders', import_file[0], 'orders.csv', performed_by='бенчмарк'))
+
+    df_orders = tables['orders']
+    case("заказы: полное сохранение")(lambda: data_store.save_table('orders', df_orders))
+
+
+def _time(setup, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings)
+
+
+def _queries(tables, count):
+    streets = [s.strip() for value in tables['delivery']['Название улиц в зоне'] for s in value.split(',') if s.strip()]
+    step = max(len(streets) // count, 1)
+    # Полные названия, начала слов и запросы с опечаткой (переставлены две буквы)
+    queries = []
+    for i, street in enumerate(streets[::step][:count]):
+        word = street.split()[-1]
+        if i % 3 == 0:
+            queries.append(street)
+        elif i % 3 == 1:
+            queries.append(word[:4])
+        else:
+            queries.append(word[:2] + word[3] + word[2] + word[4:] if len(word) > 4 else word)
+    return queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк путей работы с данными")
+    parser.add_argument('--size', choices=list(synthetic.SIZES), default='small')
+    parser.add_argument('--backend', choices=['xlsx', 'sqlite'], default='xlsx')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help="выполнить только сценарии, в названии которых есть эта строка")
+    parser.add_argument('--save', help="сохранить результаты в JSON")
+    parser.add_argument('--compare', help="сравнить с сохранёнными результатами")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="допустимое замедление (доля)")
+    parser.add_argument('--min-delta', type=float, default=5.0, help="замедления меньше стольких мс не считаются")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='prorab-bench-')
+    os.environ['PRORAB_DATA_DIR'] = data_dir
+    os.environ['PRORAB_STORAGE'] = args.backend
+    os.environ['PRORAB_DB'] = os.path.join(data_dir, 'prorab.db')
+    try:
+        print(f"Набор {args.size}, хранилище {args.backend}")
+        tables = synthetic.make_dataset(synthetic.SIZES[args.size], args.seed)
+        synthetic.write_dataset(tables, log=lambda line: print(f"  запись {line}"))
+        _define_cases(tables, _queries(tables, args.queries))
+
+        results = {}
+        print(f"{'Сценарий':<44} {'мин, мс':>10} {'медиана, мс':>12}")
+        for name, setup, fn in CASES:
+            if args.only and args.only not in name:
+                continue
+            best, median = _time(setup, fn, args.repeat)
+            results[name] = {'min': best, 'median': median}
+            print(f"{name:<44} {best * 1000:>10.1f} {median * 1000:>12.1f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'backend': args.backend, 'results': results}, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            saved = json.load(f)
+        if (saved['size'], saved['backend']) != (args.size, args.backend):
+            print(f"Внимание: сравнение с набором {saved['size']}, хранилище {saved['backend']}")
+        baseline = saved['results']
+        regressions = [(name, baseline[name]['min'], r['min']) for name, r in results.items()
+                       if name in baseline and r['min'] > baseline[name]['min'] * (1 + args.tolerance)
+                       and (r['min'] - baseline[name]['min']) * 1000 >= args.min_delta]
+        for name, before, after in regressions:
+            print(f"МЕДЛЕННЕЕ: {name}: {before * 1000:.1f} -> {after * 1000:.1f} мс")
+        if regressions:
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Время расчёта распределения заказов в зависимости от размера парка.
+#
+# Для каждого размера парка генерируются случайные машины (грузоподъёмность 1.5–20 т,
+# половина с боковой выгрузкой) и заказы по улицам из таблицы зон. Замеряется
+# построение матрицы стоимостей и решение задачи о назначениях; для сравнения
+# приводится стоимость жадного назначения (каждый заказ — самой дешёвой свободной машине).
+#
+# Запуск: python benchmarks/dispatch_solve.py --orders 300 --fleet 10 50 100 200 400 --trips 1
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dispatch  # noqa: E402
+import quotes  # noqa: E402
+
+
+def _greedy(cost):
+    taken = np.zeros(cost.shape[1], dtype=bool)
+    total = 0.0
+    for row in cost:
+        candidates = np.where(taken | (row >= dispatch._INFEASIBLE), np.inf, row)
+        column = int(np.argmin(candidates))
+        if np.isfinite(candidates[column]):
+            taken[column] = True
+            total += candidates[column]
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время распределения заказов в зависимости от размера парка")
+    parser.add_argument('--orders', type=int, default=300)
+    parser.add_argument('--fleet', type=int, nargs='+', default=[10, 50, 100, 200, 400])
+    parser.add_argument('--trips', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    prices = quotes.get_prices()
+    zones = rng.integers(0, len(prices.names), args.orders)
+    weights = rng.uniform(0.2, 15, args.orders)
+    side_unloading = rng.random(args.orders) < 0.2
+
+    print(f"Заказов: {args.orders}, рейсов на машину: {args.trips}")
+    print(f"{'Машин':>6} {'Матрица, мс':>12} {'Решение, мс':>12} {'Назначено':>10} {'Стоимость':>12} {'Жадно':>12}")
+    for fleet_size in args.fleet:
+        capacities = rng.uniform(1.5, 20, fleet_size)
+        truck_side = rng.random(fleet_size) < 0.5
+        build_times, solve_times = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            cost = dispatch.cost_matrix(zones, weights, side_unloading, capacities, truck_side, args.trips)
+            built = time.perf_counter()
+            rows, columns = dispatch.solve_assignment(cost)
+            solve_times.append(time.perf_counter() - built)
+            build_times.append(built - started)
+        feasible = cost[rows, columns] < dispatch._INFEASIBLE
+        total = cost[rows, columns][feasible].sum()
+        print(f"{fleet_size:>6} {min(build_times) * 1000:>12.1f} {min(solve_times) * 1000:>12.1f} "
+              f"{int(feasible.sum()):>10} {total:>12,.0f} {_greedy(cost):>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Задержка перезапуска страниц на синтетических данных (Streamlit AppTest, без браузера).
+#
+# Набор benchmarks/synthetic.py записывается во временный каталог, затем для каждой
+# страницы и каждого её раздела замеряется первый показ и медиана повторных запусков
+# (то, что видит диспетчер после любого действия). С --budget сценарии медленнее
+# бюджета отмечаются, и скрипт завершается с кодом 1.
+#
+# Запуск: python benchmarks/rerun_latency.py --size medium --runs 5 --budget 500
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import synthetic  # noqa: E402
+
+
+def _timed_run(at, action=None):
+    started = time.perf_counter()
+    (action() if action else at).run()
+    return time.perf_counter() - started
+
+
+def _measure(page, runs):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=600)
+    at.run()
+    first = _timed_run(at, lambda: at.sidebar.selectbox[0].set_value(page))
+    sections = list(at.radio[0].options) if len(at.radio) else [None]
+
+    results = []
+    for section in sections:
+        if section is not None and at.radio[0].value != section:
+            first = _timed_run(at, lambda: at.radio[0].set_value(section))
+        reruns = [_timed_run(at) for _ in range(runs)]
+        errors = [str(e.value) for e in at.exception]
+        results.append((section or '—', first, statistics.median(reruns), errors))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Задержка перезапуска страниц на синтетических данных")
+    parser.add_argument('--size', choices=list(synthetic.SIZES), default='small')
+    parser.add_argument('--backend', choices=['xlsx', 'sqlite'], default='xlsx')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, help="предельная медиана перезапуска, мс")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='prorab-rerun-')
+    os.environ['PRORAB_DATA_DIR'] = data_dir
+    os.environ['PRORAB_STORAGE'] = args.backend
+    os.environ['PRORAB_DB'] = os.path.join(data_dir, 'prorab.db')
+    over_budget = []
+    try:
+        print(f"Набор {args.size}, хранилище {args.backend}")
+        synthetic.write_dataset(synthetic.make_dataset(synthetic.SIZES[args.size], args.seed),
+                                log=lambda line: print(f"  запись {line}"))
+
+        print(f"{'Страница / раздел':<48} {'показ, мс':>10} {'rerun, мс':>10}")
+        for page in ["Управление доставками", "Управление долгами", "История операций", "Менеджер заказов"]:
+            for section, first, rerun, errors in _measure(page, args.runs):
+                label = f"{page} / {section}"
+                mark = ''
+                if args.budget and rerun * 1000 > args.budget:
+                    over_budget.append(label)
+                    mark = '  > бюджета'
+                print(f"{label:<48} {first * 1000:>10.0f} {rerun * 1000:>10.0f}{mark}")
+                if errors:
+                    print(f"    ошибки: {errors}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
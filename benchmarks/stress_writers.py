@@ -0,0 +1,108 @@
+# Нагрузочная проверка одновременной записи из нескольких процессов.
+#
+# Каждый процесс много раз подряд:
+#   * увеличивает сумму долга (относительное изменение под блокировкой);
+#   * увеличивает счётчик заказа через проверку версии строки с повторами при конфликте;
+#   * записывает назначение заказа водителю в журнал назначений;
+#   * добавляет запись в историю.
+# В конце проверяется, что ни одно изменение не потерялось.
+#
+# Запуск: python benchmarks/stress_writers.py --workers 8 --ops 25 --backend sqlite
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _prepare(data_dir):
+    import data_store
+
+    data_store.insert_rows('debts', [{'Клиент': 'Стресс', 'Организация': 'ООО Тест', 'Сумма долга': 0.0,
+                                      'Номер документа': 'S-1', 'Срок оплаты': None, 'Выдавший долг': 'stress'}])
+    data_store.insert_rows('orders', [{'Номер заказа': 'S-1', 'Время добавления': '', 'Статус': 'В ожидании',
+                                       'Имя водителя': 'Стресс', 'Кто закрыл заказ': '', 'Выполненные заказы': 0}])
+
+
+def _worker(worker_id, ops):
+    import assignments
+    import data_store
+
+    conflicts = 0
+    for op in range(ops):
+        data_store.update_rows('debts', {'Клиент': 'Стресс'}, increments={'Сумма долга': 1})
+
+        # Оптимистичная запись: прочитать версию, записать абсолютное значение, при конфликте повторить
+        while True:
+            version = data_store.row_version('orders', {'Номер заказа': 'S-1'})
+            value = data_store.row_values('orders', {'Номер заказа': 'S-1'})['Выполненные заказы']
+            try:
+                data_store.update_rows('orders', {'Номер заказа': 'S-1'}, {'Выполненные заказы': int(value) + 1},
+                                       expected_version=version)
+                break
+            except data_store.ConflictError:
+                conflicts += 1
+
+        number = f'{worker_id}-{op}'
+        assignments.record(number, 'Стресс', 'В ожидании', f'worker-{worker_id}')
+        data_store.insert_rows('history', [{'Клиент': 'Стресс', 'Организация': 'ООО Тест', 'Операция': 'Погашение долга',
+                                            'Сумма': 1, 'Дата операции': '2024-01-01',
+                                            'Кто выполнил операцию': f'worker-{worker_id}', 'Примечания': number}])
+    return conflicts
+
+
+def _check():
+    import data_store
+
+    data_store.invalidate()
+    debt = data_store.load_table('debts').set_index('Клиент').loc['Стресс', 'Сумма долга']
+    counter = data_store.load_table('orders').set_index('Номер заказа').loc['S-1', 'Выполненные заказы']
+    assignments = data_store.load_table('assignments')
+    history = data_store.count_rows('history')
+    return {
+        'долг': float(debt),
+        'счётчик заказа': int(counter),
+        'назначений': assignments['Номер заказа'].nunique(),
+        'записей в истории': int(history),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка одновременной записи из нескольких процессов")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=25)
+    parser.add_argument('--backend', choices=['xlsx', 'sqlite'], default='xlsx')
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix='prorab_stress_')
+    os.environ['PRORAB_DATA_DIR'] = data_dir
+    os.environ['PRORAB_STORAGE'] = args.backend
+    os.environ['PRORAB_DB'] = os.path.join(data_dir, 'prorab.db')
+    try:
+        _prepare(data_dir)
+        start = time.perf_counter()
+        with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+            conflicts = pool.starmap(_worker, [(i, args.ops) for i in range(args.workers)])
+        elapsed = time.perf_counter() - start
+
+        expected = args.workers * args.ops
+        result = _check()
+        print(f"Хранилище: {args.backend}, процессов: {args.workers}, операций на процесс: {args.ops}")
+        print(f"Время: {elapsed:.2f} с, конфликтов версий (повторено): {sum(conflicts)}")
+        ok = True
+        for name, value in result.items():
+            status = 'OK' if value == expected else 'ПОТЕРИ'
+            ok &= value == expected
+            print(f"  {name}: {value} из {expected} — {status}")
+        return 0 if ok else 1
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
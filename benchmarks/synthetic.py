@@ -0,0 +1,176 @@
+# Генераторы синтетических таблиц для бенчмарков: зоны с улицами, долги, история,
+# заказы и машины в нужном объёме. Данные детерминированы (seed) и похожи на реальные
+# по структуре: те же столбцы, статусы, форматы дат и повторяющиеся клиенты.
+#
+# Наборы размеров: small (10 тыс. операций), medium (100 тыс.), large (1 млн операций,
+# 50 тыс. улиц). Запись — через data_store, поэтому работает и для xlsx, и для SQLite:
+#
+#   PRORAB_DATA_DIR=/tmp/bench PRORAB_STORAGE=sqlite python benchmarks/synthetic.py --size medium
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = {
+    'small': {'zones': 500, 'streets': 5000, 'debts': 2000, 'history': 10000, 'orders': 1000, 'trucks': 50},
+    'medium': {'zones': 2000, 'streets': 20000, 'debts': 10000, 'history': 100000, 'orders': 5000, 'trucks': 200},
+    'large': {'zones': 5000, 'streets': 50000, 'debts': 50000, 'history': 1000000, 'orders': 20000, 'trucks': 1000},
+}
+
+_SYLLABLES = ['ба', 'ве', 'го', 'да', 'жи', 'за', 'ки', 'ло', 'ми', 'но', 'пе', 'ра', 'со', 'ту', 'фе',
+              'ха', 'це', 'чи', 'ша', 'ям', 'ор', 'ис', 'ан', 'ен', 'ут', 'ок', 'ел', 'ар', 'ин', 'ус']
+_STREET_TYPES = ['ул.', 'пер.', 'пр-т', 'пр-д', 'б-р', 'туп.']
+_STREET_ENDINGS = ['ая', 'ский', 'ова', 'ина', 'ная', 'евская']
+_OPERATIONS = ["Добавление долга", "Погашение долга"]
+_ORDER_STATUSES = ["В ожидании", "В пути", "Выполнен", "Отменён"]
+_ORDER_STATUS_WEIGHTS = [0.15, 0.1, 0.7, 0.05]
+_TRUCK_STATUSES = ["Свободен", "В пути", "На ремонте", "Занят"]
+_TRUCK_STATUS_WEIGHTS = [0.6, 0.25, 0.05, 0.1]
+
+
+def _names(rng, count):
+    seen = {}
+    while len(seen) < count:
+        parts = rng.integers(0, len(_SYLLABLES), (count, 4))
+        lengths = rng.integers(2, 5, count)
+        endings = rng.integers(0, len(_STREET_ENDINGS), count)
+        for row, length, ending in zip(parts, lengths, endings):
+            name = ''.join(_SYLLABLES[i] for i in row[:length]).capitalize() + _STREET_ENDINGS[ending]
+            seen[name] = None
+            if len(seen) == count:
+                break
+    return list(seen)
+
+
+def _people(rng, count):
+    return [f"{surname} {name[:1]}." for surname, name in zip(_names(rng, count), _names(rng, count))]
+
+
+def make_delivery(rng, zones, streets):
+    street_names = _names(rng, streets)
+    street_types = rng.integers(0, len(_STREET_TYPES), streets)
+    owner = np.sort(rng.integers(0, zones, streets))
+    bounds = np.searchsorted(owner, np.arange(zones + 1))
+    base = rng.integers(5, 30, zones) * 100
+    return pd.DataFrame({
+        'Название зоны': [f"Зона {name}" for name in _names(rng, zones)],
+        'ID зоны': [f"id{i + 1}" for i in range(zones)],
+        'Название улиц в зоне': [
+            ', '.join(f"{_STREET_TYPES[street_types[j]]} {street_names[j]}" for j in range(bounds[i], bounds[i + 1]))
+            for i in range(zones)
+        ],
+        'Стоимость доставки ГАЗель': base.astype(float),
+        'Стоимость доставки Валдай/ ГАЗон, ЗиЛ': (base + 200).astype(float),
+        'Стоимость доставки КАМаз': (base + 600).astype(float),
+        'Ср. расстояние от базы (км)': np.round(rng.uniform(0, 40, zones), 2),
+    })
+
+
+def _clients(rng, count):
+    clients = _people(rng, count)
+    organizations = [f"ООО «{name}»" for name in _names(rng, count)]
+    return clients, organizations
+
+
+def make_debts(rng, rows, clients, organizations, today):
+    who = rng.integers(0, len(clients), rows)
+    return pd.DataFrame({
+        'Клиент': np.asarray(clients, dtype=object)[who],
+        'Организация': np.asarray(organizations, dtype=object)[who],
+        'Сумма долга': np.round(rng.gamma(2, 15000, rows), 2),
+        'Номер документа': [f"РН-{i + 1:07d}" for i in range(rows)],
+        'Срок оплаты': today + pd.to_timedelta(rng.integers(-120, 60, rows), unit='D'),
+        'Выдавший долг': np.asarray(_people(rng, 20), dtype=object)[rng.integers(0, 20, rows)],
+    })
+
+
+def make_history(rng, rows, clients, organizations, today):
+    who = rng.integers(0, len(clients), rows)
+    operations = rng.integers(0, len(_OPERATIONS), rows)
+    seconds = np.sort(rng.integers(0, 3 * 365 * 86400, rows))
+    return pd.DataFrame({
+        'Клиент': np.asarray(clients, dtype=object)[who],
+        'Организация': np.asarray(organizations, dtype=object)[who],
+        'Операция': np.asarray(_OPERATIONS, dtype=object)[operations],
+        'Сумма': np.round(rng.gamma(2, 10000, rows), 2),
+        'Дата операции': (today - pd.Timedelta(days=3 * 365) + pd.to_timedelta(seconds, unit='s')).normalize(),
+        'Кто выполнил операцию': np.asarray(_people(rng, 20), dtype=object)[rng.integers(0, 20, rows)],
+        'Примечания': [f"ПКО-{i}" if op else f"РН-{i}" for i, op in enumerate(operations)],
+    })
+
+
+def make_trucks(rng, rows):
+    capacity = np.round(rng.choice([1.5, 3.0, 3.5, 5.0, 6.5, 10.0, 13.5, 20.0], rows), 1)
+    return pd.DataFrame({
+        'Имя водителя': _people(rng, rows),
+        'Макс. грузоподъемность': capacity,
+        'Боковая выгрузка': np.where(rng.random(rows) < 0.5, "Да", "Нет"),
+        'Статус авто': rng.choice(_TRUCK_STATUSES, rows, p=_TRUCK_STATUS_WEIGHTS),
+    })
+
+
+def make_orders(rng, rows, drivers, streets, now):
+    statuses = rng.choice(_ORDER_STATUSES, rows, p=_ORDER_STATUS_WEIGHTS)
+    added = now - pd.to_timedelta(np.sort(rng.integers(0, 90 * 86400, rows))[::-1], unit='s')
+    return pd.DataFrame({
+        'Номер заказа': [f"З-{i + 1:06d}" for i in range(rows)],
+        'Время добавления': added.strftime('%Y-%m-%d %H:%M:%S'),
+        'Статус': statuses,
+        'Имя водителя': np.asarray(drivers, dtype=object)[rng.integers(0, len(drivers), rows)],
+        'Кто закрыл заказ': '',
+        'Выполненные заказы': (statuses == "Выполнен").astype(int),
+        'Адрес доставки': [f"{streets[i]}, д. {n}" for i, n in zip(rng.integers(0, len(streets), rows),
+                                                                   rng.integers(1, 150, rows))],
+        'Вес груза (т)': np.round(rng.uniform(0.2, 15, rows), 1),
+        'Боковая выгрузка': np.where(rng.random(rows) < 0.2, "Да", "Нет"),
+    })
+
+
+# Все таблицы набора; sizes — словарь как в SIZES (можно переопределить отдельные размеры)
+def make_dataset(sizes, seed=0):
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp('2024-06-01 12:00:00')
+    today = now.normalize()
+    clients, organizations = _clients(rng, max(sizes['debts'] // 5, 10))
+    delivery = make_delivery(rng, sizes['zones'], sizes['streets'])
+    streets = [s.strip() for value in delivery['Название улиц в зоне'] for s in value.split(',') if s.strip()]
+    trucks = make_trucks(rng, sizes['trucks'])
+    return {
+        'delivery': delivery,
+        'debts': make_debts(rng, sizes['debts'], clients, organizations, today),
+        'history': make_history(rng, sizes['history'], clients, organizations, today),
+        'orders': make_orders(rng, sizes['orders'], list(trucks['Имя водителя']), streets, now),
+        'trucks': trucks,
+    }
+
+
+# Запись набора через data_store (в каталог и хранилище из PRORAB_DATA_DIR/PRORAB_STORAGE)
+def write_dataset(tables, log=print):
+    import data_store
+
+    for name, df in tables.items():
+        started = time.perf_counter()
+        data_store.save_table(name, df)
+        log(f"{name}: {len(df)} строк, {time.perf_counter() - started:.1f} с")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетических таблиц")
+    parser.add_argument('--size', choices=list(SIZES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    for table in SIZES['small']:
+        parser.add_argument(f'--{table}', type=int, help=f"переопределить размер ({table})")
+    args = parser.parse_args(argv)
+
+    sizes = {table: getattr(args, table) or count for table, count in SIZES[args.size].items()}
+    write_dataset(make_dataset(sizes, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+import argparse
+import codecs
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import assignments
+import data_store
+import schema
+
+# Строк в одной порции чтения файла
+CHUNK = 5000
+
+ORDER_STATUSES = ["В ожидании", "В пути", "Выполнен", "Отменён"]
+YES_NO = ["Нет", "Да"]
+
+# Описание импорта таблицы: key — столбец для поиска дублей, required — обязательные,
+# numeric и dates — числа (не меньше нуля) и даты, choices — допустимые значения
+# (список или функция, возвращающая множество), defaults — значения для пустых ячеек
+ImportSpec = namedtuple('ImportSpec', ['key', 'required', 'numeric', 'dates', 'choices', 'defaults'])
+
+PRICE_COLUMNS = ['Стоимость доставки ГАЗель', 'Стоимость доставки Валдай/ ГАЗон, ЗиЛ', 'Стоимость доставки КАМаз']
+
+
+def _drivers():
+    return set(data_store.load_table('trucks')['Имя водителя'].dropna())
+
+
+SPECS = {
+    'delivery': ImportSpec(
+        key='ID зоны',
+        required=['Название зоны', 'ID зоны'],
+        numeric=PRICE_COLUMNS + ['Ср. расстояние от базы (км)'],
+        dates=[],
+        choices={},
+        defaults={column: 0.0 for column in PRICE_COLUMNS + ['Ср. расстояние от базы (км)']},
+    ),
+    'orders': ImportSpec(
+        key='Номер заказа',
+        required=['Номер заказа'],
+        numeric=['Вес груза (т)', 'Выполненные заказы'],
+        dates=[],
+        choices={'Статус': ORDER_STATUSES, 'Боковая выгрузка': YES_NO, 'Имя водителя': _drivers},
+        defaults={'Статус': "В ожидании", 'Боковая выгрузка': "Нет", 'Выполненные заказы': 0.0, 'Вес груза (т)': 0.0,
+                  'Имя водителя': None, 'Время добавления': lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S')},
+    ),
+    'debts': ImportSpec(
+        key='Номер документа',
+        required=['Клиент', 'Сумма долга', 'Номер документа', 'Срок оплаты'],
+        numeric=['Сумма долга'],
+        dates=['Срок оплаты'],
+        choices={},
+        defaults={},
+    ),
+}
+
+# Итог импорта: read — строк в файле, imported — добавлено, duplicates — пропущено дублей,
+# errors — отклонённые строки и дубли (DataFrame: Строка, Ключ, Причина), seconds — время
+ImportResult = namedtuple('ImportResult', ['table', 'read', 'imported', 'duplicates', 'errors', 'seconds'])
+
+ERROR_COLUMNS = ['Строка', 'Ключ', 'Причина']
+
+
+# Скорость обработки файла, строк в секунду
+def rate(result):
+    return result.read / result.seconds if result.seconds else float('inf')
+
+
+def _header(values):
+    return [str(v).replace('\n', ' ').strip() if v is not None else '' for v in values]
+
+
+# Кодировка CSV: UTF-8 (в том числе с BOM) или Windows-1251 из Excel
+def _encoding(head):
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return 'cp1251'
+    return 'utf-8-sig'
+
+
+def _csv_chunks(f, chunksize):
+    head = f.read(65536)
+    f.seek(0)
+    encoding = _encoding(head)
+    first_line = head.decode(encoding, errors='ignore').splitlines()[0] if head.strip() else ''
+    # Разделитель — самый частый в заголовке (Excel с русской локалью сохраняет CSV через «;»)
+    sep = max([';', '\t', ','], key=first_line.count)
+    # Всё читается текстом: числа и даты разбираются при проверке, ID вроде «007» не портятся
+    reader = pd.read_csv(f, sep=sep, encoding=encoding, dtype=str, keep_default_na=False, chunksize=chunksize)
+    line = 2
+    for chunk in reader:
+        chunk.columns = _header(chunk.columns)
+        chunk.index = pd.RangeIndex(line, line + len(chunk))
+        line += len(chunk)
+        yield chunk
+
+
+def _xlsx_chunks(f, chunksize):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(f, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, []))
+        batch, lines = [], []
+        empty = True
+        for line, values in enumerate(rows, start=2):
+            if not any(v is not None and v != '' for v in values):
+                continue
+            batch.append(values[:len(header)])
+            lines.append(line)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header, index=lines)
+                batch, lines, empty = [], [], False
+        # Файл без строк данных — одна пустая порция, чтобы проверились заголовки
+        if batch or empty:
+            yield pd.DataFrame(batch, columns=header, index=lines)
+    finally:
+        wb.close()
+
+
+# Потоковое чтение CSV/xlsx порциями; индекс порции — номер строки в файле.
+# source — путь или файловый объект (загруженный файл), filename — для определения формата.
+def read_chunks(source, filename=None, chunksize=CHUNK):
+    filename = filename or getattr(source, 'name', None) or source
+    reader = _xlsx_chunks if str(filename).lower().endswith(('.xlsx', '.xlsm')) else _csv_chunks
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from reader(f, chunksize)
+    else:
+        source.seek(0)
+        yield from reader(source, chunksize)
+
+
+def _cell_text(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    # Целые числа из xlsx (ID зоны 12.0) записываются без дробной части
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+# Текст без пробелов по краям; пустые ячейки — пустая строка
+def _text(series):
+    if pd.api.types.is_string_dtype(series):
+        return series.fillna('').str.strip()
+    return series.map(_cell_text)
+
+
+# Проверка и приведение порции: возвращает принятые строки (столбцы таблицы) и причину
+# отказа для каждой строки (None — строка принята)
+def validate(chunk, name, choices=None):
+    spec = SPECS[name]
+    columns = data_store.TABLES[name][1]
+    missing = [c for c in spec.required if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"В файле нет обязательных столбцов: {', '.join(missing)}")
+
+    rows = pd.DataFrame(index=chunk.index)
+    reasons = pd.Series(None, index=chunk.index, dtype=object)
+
+    def reject(mask, reason):
+        nonlocal reasons
+        reasons = reasons.mask(np.asarray(mask) & reasons.isna().to_numpy(), reason)
+
+    for column in columns:
+        raw = chunk[column] if column in chunk.columns else pd.Series(None, index=chunk.index, dtype=object)
+        text = _text(raw)
+        empty = text == ''
+        if column in spec.required:
+            reject(empty, f"не заполнено: {column}")
+        if column in spec.numeric:
+            # Пробелы-разделители разрядов и десятичная запятая из русского Excel
+            values = pd.to_numeric(text.str.replace(r'\s', '', regex=True).str.replace(',', '.'), errors='coerce')
+            reject(~empty & values.isna(), f"не число: {column}")
+            reject(values < 0, f"отрицательное значение: {column}")
+            value = values
+        elif column in spec.dates:
+            parsed = schema.parse_dates(raw.where(~empty))
+            reject(~empty & parsed.isna(), f"не дата: {column}")
+            value = parsed
+        else:
+            value = text.where(~empty, None)
+        if column in spec.defaults:
+            default = spec.defaults[column]
+            value = value.where(~empty, default() if callable(default) else default)
+        if column in spec.choices:
+            allowed = (choices or {}).get(column, spec.choices[column])
+            known = value.isna() | value.isin(list(allowed))
+            reject(~known, f"недопустимое значение: {column}")
+        rows[column] = value
+    return rows, reasons
+
+
+def _errors(lines, keys, reasons):
+    return pd.DataFrame({'Строка': lines, 'Ключ': keys, 'Причина': reasons}, columns=ERROR_COLUMNS)
+
+
+# Ключи таблицы текстом, как ключи из файла: «007» остаётся «007», 12.0 — «12»
+def _keys(values):
+    return set(schema.to_text(values).dropna())
+
+
+# Импорт файла в таблицу name: порции проверяются по мере чтения, дубли ключа (в файле
+# и в таблице) пропускаются, все принятые строки записываются одной операцией,
+# записи истории/назначений — одной пачкой. dry_run — только проверка.
+def import_file(name, source, filename=None, chunksize=CHUNK, performed_by='', dry_run=False):
+    started = time.perf_counter()
+    spec = SPECS[name]
+    choices = {column: allowed() if callable(allowed) else allowed for column, allowed in spec.choices.items()}
+    existing = _keys(data_store.load_table(name)[spec.key])
+
+    accepted, errors = [], []
+    seen = set()
+    read = duplicates = 0
+    for chunk in read_chunks(source, filename, chunksize):
+        read += len(chunk)
+        rows, reasons = validate(chunk, name, choices)
+        keys = schema.to_text(rows[spec.key])
+        in_table = keys.isin(existing).to_numpy() & reasons.isna().to_numpy()
+        in_file = (keys.isin(seen) | keys.duplicated()).to_numpy() & reasons.isna().to_numpy() & ~in_table
+        reasons = reasons.mask(in_table, "уже есть в таблице").mask(in_file, "повтор в файле")
+        duplicates += int(in_table.sum() + in_file.sum())
+        ok = reasons.isna().to_numpy()
+        seen.update(keys[ok])
+        accepted.append(rows[ok])
+        if not ok.all():
+            errors.append(_errors(rows.index[~ok], rows.loc[~ok, spec.key], reasons[~ok]))
+
+    df = pd.concat(accepted) if accepted else pd.DataFrame(columns=data_store.TABLES[name][1])
+    errors = pd.concat(errors, ignore_index=True) if errors else _errors([], [], [])
+    if dry_run or df.empty:
+        return ImportResult(name, read, len(df), duplicates, errors, time.perf_counter() - started)
+
+    with data_store.write_lock(name):
+        # Ключи, добавленные другими пользователями, пока файл читался
+        current = _keys(data_store.load_table(name)[spec.key])
+        late = schema.to_text(df[spec.key]).isin(current).to_numpy()
+        if late.any():
+            errors = pd.concat([errors, _errors(df.index[late], df.loc[late, spec.key], "уже есть в таблице")],
+                               ignore_index=True)
+            duplicates += int(late.sum())
+            df = df[~late]
+        records = [{k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+                   for row in df.to_dict('records')]
+        data_store.insert_rows(name, records)
+        _record(name, df, performed_by)
+    return ImportResult(name, read, len(df), duplicates, errors, time.perf_counter() - started)
+
+
+# Исполнитель из файла, если указан, иначе — кто запустил импорт
+def _who(value, performed_by):
+    return performed_by if pd.isna(value) or value == '' else value
+
+
+# Сопутствующие записи одной пачкой: история для долгов, назначения и статусы машин для заказов
+def _record(name, df, performed_by):
+    if df.empty:
+        return
+    if name == 'debts':
+        today = pd.Timestamp(datetime.now().date())
+        data_store.insert_rows('history', [{
+            'Клиент': row['Клиент'],
+            'Организация': row['Организация'],
+            'Операция': "Добавление долга",
+            'Сумма': row['Сумма долга'],
+            'Дата операции': today,
+            'Кто выполнил операцию': _who(row['Выдавший долг'], performed_by),
+            'Примечания': row['Номер документа'],
+        } for row in df.to_dict('records')])
+    elif name == 'orders':
+        assigned = df[df['Имя водителя'].notna()]
+        if assigned.empty:
+            return
+        assignments.record_many([(number, driver, status, _who(closed_by, performed_by)) for number, driver, status, closed_by
+                                 in zip(assigned['Номер заказа'], assigned['Имя водителя'], assigned['Статус'],
+                                        assigned['Кто закрыл заказ'])])
+        # Статус машины — по последнему заказу водителя в файле, одна запись таблицы машин
+        with data_store.batch('trucks'):
+            for driver, status in assigned.groupby('Имя водителя', sort=False)['Статус'].last().items():
+                data_store.update_rows('trucks', {'Имя водителя': driver}, {'Статус авто': status})
+
+
+# Пустой файл с заголовками таблицы — шаблон для заполнения
+def template(name):
+    return pd.DataFrame(columns=data_store.TABLES[name][1]).to_csv(index=False).encode('utf-8-sig')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт зон, заказов и долгов из CSV/xlsx")
+    parser.add_argument('table', choices=list(SPECS))
+    parser.add_argument('file')
+    parser.add_argument('--chunksize', type=int, default=CHUNK)
+    parser.add_argument('--by', default='импорт', help="кто выполнил импорт (для истории и назначений)")
+    parser.add_argument('--dry-run', action='store_true', help="только проверить файл")
+    parser.add_argument('--errors', help="сохранить отклонённые строки в CSV")
+    args = parser.parse_args(argv)
+
+    result = import_file(args.table, args.file, chunksize=args.chunksize, performed_by=args.by, dry_run=args.dry_run)
+    action = "Проверено" if args.dry_run else "Добавлено"
+    print(f"Прочитано строк: {result.read}, {action.lower()}: {result.imported}, "
+          f"дублей: {result.duplicates}, ошибок: {len(result.errors) - result.duplicates}")
+    print(f"Время: {result.seconds:.2f} с, {rate(result):.0f} строк/с")
+    if len(result.errors):
+        print(result.errors.head(20).to_string(index=False))
+        if args.errors:
+            result.errors.to_csv(args.errors, index=False, encoding='utf-8-sig')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+import os
+import sys
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import locking
+import profiling
+import schema
+import storage
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Папка с данными (по умолчанию рядом с приложением)
+DATA_DIR = os.environ.get('PRORAB_DATA_DIR', BASE_DIR)
+LOCK_DIR = os.path.join(DATA_DIR, '.locks')
+
+# Описание таблиц: имя -> (файл, столбцы по умолчанию)
+TABLES = {
+    'delivery': ('logisticpricebase.xlsx', ['Название зоны', 'ID зоны', 'Название улиц в зоне',
+                                            'Стоимость доставки ГАЗель', 'Стоимость доставки Валдай/ ГАЗон, ЗиЛ',
+                                            'Стоимость доставки КАМаз', 'Ср. расстояние от базы (км)']),
+    'debts': ('debtbase.xlsx', ['Клиент', 'Организация', 'Сумма долга', 'Номер документа', 'Срок оплаты', 'Выдавший долг']),
+    'history': ('historybase.xlsx', ['Клиент', 'Организация', 'Операция', 'Сумма', 'Дата операции', 'Кто выполнил операцию', 'Примечания']),
+    'orders': ('orders.xlsx', ['Номер заказа', 'Время добавления', 'Статус', 'Имя водителя', 'Кто закрыл заказ', 'Выполненные заказы',
+                               'Адрес доставки', 'Вес груза (т)', 'Боковая выгрузка']),
+    'trucks': ('drivers.xlsx', ['Имя водителя', 'Макс. грузоподъемность', 'Боковая выгрузка', 'Статус авто']),
+    'assignments': ('assignments.xlsx', ['Номер заказа', 'Имя водителя', 'Статус', 'Время изменения', 'Кто изменил']),
+}
+
+# Таблицы, которые в xlsx-хранилище ведутся как журнал только для добавления
+JOURNALS = {
+    'history': 'historybase.jsonl',
+    'assignments': 'assignments.jsonl',
+}
+
+# Описание записи для инкрементального обновления производных структур:
+# op — 'insert', 'update' или 'delete'; rows — добавленные строки (список словарей)
+# или затронутые строки до изменения (DataFrame); values и increments — что изменено
+WriteEvent = namedtuple('WriteEvent', ['op', 'rows', 'values', 'increments'])
+
+# Служебный столбец с версией строки для обнаружения одновременных правок
+VERSION_COLUMN = '_version'
+
+# Таблицы с версиями строк (история только дополняется, её строки не меняются)
+VERSIONED = {'delivery', 'debts', 'orders', 'trucks'}
+
+# Хранилище выбирается переменной окружения PRORAB_STORAGE (xlsx по умолчанию или sqlite)
+backend = storage.get_backend(DATA_DIR, TABLES, JOURNALS)
+
+# Кэш на уровне процесса (общий для всех сессий): имя -> (подпись хранилища, DataFrame)
+_cache = {}
+_derived = {}
+_locks = {name: threading.RLock() for name in TABLES}
+
+# Изменения, накопленные внутри batch(): имя таблицы -> список операций для backend.patch
+_batches = {}
+
+# Таблицы, журнал которых сейчас переносится в снимок фоновым потоком
+_compacting = set()
+
+
+# Строки изменились в другой сессии после того, как пользователь открыл форму
+class ConflictError(Exception):
+    def __init__(self, name, where, columns=None):
+        self.name = name
+        self.where = where
+        self.columns = columns or []
+        if columns:
+            message = f"Данные уже изменены другим пользователем: {', '.join(columns)}"
+        else:
+            message = "Данные уже изменены или удалены другим пользователем"
+        super().__init__(message)
+
+
+# Блокировка таблицы на запись: между сессиями и между процессами
+def write_lock(name):
+    return locking.table_lock(LOCK_DIR, name)
+
+
+# Таблица из кэша вместе со служебными столбцами (не копия — только для чтения).
+# Прочитанная таблица приводится к типам из schema.SCHEMAS.
+def _load(name):
+    signature = backend.signature(name)
+    with _locks[name]:
+        cached = _cache.get(name)
+        if cached is None or cached[0] != signature:
+            with profiling.span(f'read:{name}'):
+                df = backend.read(name)
+            with profiling.span(f'coerce:{name}'):
+                cached = (signature, schema.coerce(name, df))
+            _cache[name] = cached
+    return cached[1]
+
+
+# Загрузка таблицы: данные читаются один раз, пока не изменятся в хранилище
+def load_table(name):
+    # Копия, чтобы изменения в сессии не портили общий кэш
+    with profiling.span(f'load:{name}'):
+        return _load(name).drop(columns=VERSION_COLUMN, errors='ignore')
+
+
+# Производная структура (индекс, агрегаты), построенная по таблице функцией builder.
+# Пересчитывается только после изменения таблицы в хранилище или смены token
+# (например, текущей даты для расчёта просрочки). С chunked=True builder получает
+# порции iter_table: большая таблица (история) не загружается в кэш целиком.
+def derived(name, key, builder, token=None, chunked=False):
+    signature = (backend.signature(name), token)
+    with _locks[name]:
+        cached = _derived.get((name, key))
+        if cached is None or cached[0] != signature:
+            with profiling.span(f'build:{name}.{key}'):
+                if chunked:
+                    source = (chunk.drop(columns=VERSION_COLUMN, errors='ignore') for chunk in iter_table(name, 50000))
+                else:
+                    source = load_table(name)
+                cached = (signature, builder(source))
+            _derived[(name, key)] = cached
+    return cached[1]
+
+
+# Сохранение таблицы целиком с обновлением кэша
+def save_table(name, df):
+    with write_lock(name), _locks[name], profiling.span(f'save:{name}', rows=len(df)):
+        backend.write(name, df)
+        _cache[name] = (backend.signature(name), schema.coerce(name, df.copy()))
+        # Полная запись уже содержит всё, что накопилось в batch()
+        if name in _batches:
+            _batches[name].clear()
+
+
+# Несколько изменений одной таблицы — одна запись файла. Блокировка держится весь блок,
+# изменения сразу видны через кэш, а в xlsx записываются одним patch при выходе.
+# При исключении (в том числе при ошибке записи) незаписанные изменения отбрасываются. В SQLite каждое изменение
+# записывается сразу, блок только держит блокировку.
+@contextmanager
+def batch(name):
+    with write_lock(name):
+        if name in _batches or backend.row_level:
+            yield
+            return
+        _batches[name] = []
+        try:
+            yield
+        except BaseException:
+            del _batches[name]
+            invalidate(name)
+            raise
+        changes = _batches.pop(name)
+        if changes:
+            try:
+                _flush(name, changes)
+            except BaseException:
+                # Файл не записан (например, занят в Windows): кэш с незаписанными
+                # изменениями сбрасывается, иначе их увидели бы другие сессии
+                invalidate(name)
+                raise
+
+
+# Запись накопленных изменений; производные структуры, уже учитывающие их, сохраняются
+def _flush(name, changes):
+    with _locks[name], profiling.span(f'flush:{name}', changes=len(changes)):
+        before, df = _cache[name]
+        # None — изменение, которое нельзя внести в ячейки (новый столбец): файл пишется целиком
+        if not (backend.can_patch(name) and None not in changes and backend.patch(name, changes)):
+            backend.write(name, df)
+        after = backend.signature(name)
+        _cache[name] = (after, df)
+        for key, (signature, value) in list(_derived.items()):
+            if key[0] == name and signature[0] == before:
+                _derived[key] = ((after, signature[1]), value)
+
+
+# Запись изменённой таблицы df, полученной операцией change (см. backend.patch):
+# внутри batch() — только в кэш, иначе точечно в файл или, если нельзя, целиком
+def _commit(name, df, change):
+    if name in _batches:
+        with _locks[name]:
+            _cache[name] = (_cache[name][0], df)
+            _batches[name].append(change)
+        return
+    if change is None or not backend.can_patch(name):
+        save_table(name, df)
+        return
+    with _locks[name], profiling.span(f'patch:{name}'):
+        if not backend.patch(name, [change]):
+            backend.write(name, df)
+        _cache[name] = (backend.signature(name), df)
+
+
+# Последние n строк таблицы (журнал читается потоково, без загрузки целиком)
+def tail_table(name, n):
+    return schema.coerce(name, backend.tail(name, n))
+
+
+# Количество строк в таблице
+def count_rows(name):
+    return backend.count(name)
+
+
+# Потоковое чтение таблицы порциями. Порции не приводятся к схеме: их читают один раз
+# (выгрузка, итоги), а категории в разных порциях всё равно получились бы разные.
+def iter_table(name, chunksize=10000):
+    return backend.iter_chunks(name, chunksize)
+
+
+# Маска строк, у которых все столбцы из where равны заданным значениям
+def _match(df, where):
+    mask = pd.Series(True, index=df.index)
+    for column, value in where.items():
+        if column not in df.columns:
+            return pd.Series(False, index=df.index)
+        mask &= df[column].isna() if pd.isna(value) else df[column] == value
+    return mask
+
+
+# Текущие строки по условию (вместе с версиями)
+def _current_rows(name, where):
+    df = _load(name)
+    return df[_match(df, schema.text_values(name, where))]
+
+
+# Версия строки: запоминается при открытии формы и передаётся при сохранении
+def row_version(name, where):
+    rows = _current_rows(name, where)
+    if rows.empty:
+        return None
+    if VERSION_COLUMN not in rows.columns:
+        return 0
+    return int(rows[VERSION_COLUMN].fillna(0).max())
+
+
+# Значения строки, которые видел пользователь (основа для слияния правок)
+def row_values(name, where):
+    rows = _current_rows(name, where).drop(columns=VERSION_COLUMN, errors='ignore')
+    if rows.empty:
+        return None
+    return rows.iloc[0].to_dict()
+
+
+def _same(a, b):
+    if pd.isna(a) and pd.isna(b):
+        return True
+    try:
+        return a == b or float(a) == float(b)
+    except (TypeError, ValueError):
+        return False
+
+
+# Проверка версии. Если строку успели изменить, правки сливаются по столбцам:
+# применяются только те поля, которые пользователь поменял, а другой — нет.
+def _resolve(name, where, current, values, expected_version, base):
+    if expected_version is None:
+        return values
+    if current.empty:
+        raise ConflictError(name, where)
+    version = int(current[VERSION_COLUMN].fillna(0).max()) if VERSION_COLUMN in current.columns else 0
+    if version == expected_version:
+        return values
+    if base is None:
+        raise ConflictError(name, where)
+
+    row = current.iloc[0]
+    merged, conflicts = {}, []
+    for column, value in values.items():
+        if _same(value, base.get(column)):
+            continue  # пользователь это поле не менял — оставляем чужое значение
+        if not _same(row.get(column), base.get(column)) and not _same(row.get(column), value):
+            conflicts.append(column)
+        else:
+            merged[column] = value
+    if conflicts:
+        raise ConflictError(name, where, conflicts)
+    return merged
+
+
+# Добавление строк в конец таблицы
+def insert_rows(name, rows):
+    rows = [schema.text_values(name, row) for row in rows]
+    if name in VERSIONED:
+        rows = [{**row, VERSION_COLUMN: 1} for row in rows]
+    with write_lock(name), profiling.span(f'insert:{name}', rows=len(rows)):
+        before = backend.signature(name)
+        if backend.can_append(name):
+            backend.insert_rows(name, rows)
+        else:
+            current = _load(name)
+            df = schema.concat(name, current, pd.DataFrame(rows))
+            # В файл пишутся приведённые значения (даты — датами). Новые столбцы: файл
+            # переписывается целиком, чтобы столбец был заполнен во всех строках
+            added = df.iloc[len(current):]
+            change = ('append', added.to_dict('records')) if set(df.columns) <= set(current.columns) else None
+            _commit(name, df, change)
+        _notify(name, before, WriteEvent('insert', rows, {}, {}))
+    if backend.compact_due(name):
+        _compact_later(name)
+    return len(rows)
+
+
+# Перенос журнала в снимок после записи пользователя, в фоновом потоке: сам пользователь
+# не ждёт перезаписи снимка, а таблица блокируется только на подмену файлов
+def _compact_later(name):
+    with _locks[name]:
+        if name in _compacting:
+            return
+        _compacting.add(name)
+    threading.Thread(target=_compact, args=(name,), daemon=True).start()
+
+
+def _compact(name):
+    try:
+        backend.compact(name, lambda: _keeping_cache(name), lambda: storage.compaction_lock(LOCK_DIR, name))
+    except locking.LockTimeout:
+        pass  # таблица занята или перенос уже идёт — он повторится после следующей записи
+    except Exception as error:
+        # Перенос — только уплотнение: при ошибке журнал остаётся как был, поток не падает
+        print(f"Перенос журнала {name} не выполнен: {error!r}", file=sys.stderr)
+    finally:
+        with _locks[name]:
+            _compacting.discard(name)
+
+
+# Блокировка на подмену файлов с тем же содержимым: кэш и производные структуры,
+# построенные до подмены, остаются действительными с новой подписью
+@contextmanager
+def _keeping_cache(name):
+    with write_lock(name), _locks[name]:
+        before = backend.signature(name)
+        yield
+        after = backend.signature(name)
+        cached = _cache.get(name)
+        if cached is not None and cached[0] == before:
+            _cache[name] = (after, cached[1])
+        for key, (signature, value) in list(_derived.items()):
+            if key[0] == name and signature[0] == before:
+                _derived[key] = ((after, signature[1]), value)
+
+
+# Изменение строк по условию: values — новые значения, increments — прибавка к текущим.
+# С expected_version правка применяется, только если строку никто не менял; base —
+# значения, которые видел пользователь, для слияния правок.
+def update_rows(name, where, values=None, increments=None, expected_version=None, base=None):
+    where = schema.text_values(name, where)
+    with write_lock(name), profiling.span(f'update:{name}'):
+        before = backend.signature(name)
+        current = _current_rows(name, where)
+        values = _resolve(name, where, current, values or {}, expected_version, base)
+        values = schema.text_values(name, values)
+        increments = dict(increments or {})
+        if not values and not increments:
+            return 0
+        if name in VERSIONED:
+            increments[VERSION_COLUMN] = 1
+
+        if backend.row_level:
+            count = backend.update_rows(name, where, values, increments)
+        else:
+            df = _load(name).copy()
+            mask = _match(df, where)
+            new_columns = [c for c in list(values) + list(increments) if c not in df.columns]
+            for column, value in values.items():
+                _assign(df, mask, column, value)
+            for column, delta in increments.items():
+                if column not in df.columns:
+                    df[column] = 0
+                df.loc[mask, column] = df.loc[mask, column].fillna(0) + delta
+            columns = list(values) + list(increments)
+            positions = np.flatnonzero(mask.to_numpy())
+            change = ('update', [(int(position), dict(zip(columns, row)))
+                                 for position, row in zip(positions, df.loc[mask, columns].itertuples(index=False))])
+            _commit(name, df, None if new_columns else change)
+            count = int(mask.sum())
+        _notify(name, before, WriteEvent('update', current, values, increments))
+    return count
+
+
+# Запись значения в столбец (новое значение категории добавляется, дата разбирается);
+# если тип столбца не подходит (например, текст в числовой столбец), столбец переводится в object
+def _assign(df, mask, column, value):
+    value = schema.cast(df, column, value)
+    try:
+        df.loc[mask, column] = value
+    except (TypeError, ValueError):
+        df[column] = df[column].astype(object)
+        df.loc[mask, column] = value
+
+
+# Удаление строк по условию (с expected_version — только если строку никто не менял)
+def delete_rows(name, where, expected_version=None):
+    where = schema.text_values(name, where)
+    with write_lock(name), profiling.span(f'delete:{name}'):
+        before = backend.signature(name)
+        current = _current_rows(name, where)
+        _resolve(name, where, current, {}, expected_version, None)
+        if backend.row_level:
+            count = backend.delete_rows(name, where)
+        else:
+            df = _load(name)
+            mask = _match(df, where)
+            _commit(name, df[~mask], ('delete', [int(p) for p in np.flatnonzero(mask.to_numpy())]))
+            count = int(mask.sum())
+        _notify(name, before, WriteEvent('delete', current, {}, {}))
+    return count
+
+
+# Производные структуры с методом apply(event) обновляются на месте после своей же записи
+# (apply может вернуть False, если событие так не обработать); остальные, а также
+# устаревшие после записи из другого процесса, перестроятся при следующем обращении
+def _notify(name, before, event):
+    after = backend.signature(name)
+    with _locks[name]:
+        for key, (signature, value) in list(_derived.items()):
+            if key[0] != name:
+                continue
+            if signature[0] == before and hasattr(value, 'apply') and value.apply(event) is not False:
+                _derived[key] = ((after, signature[1]), value)
+            else:
+                del _derived[key]
+
+
+# Сброс кэша одной таблицы или всех сразу
+def invalidate(name=None):
+    names = [name] if name else list(TABLES)
+    for table in names:
+        with _locks[table]:
+            _cache.pop(table, None)
+            for key in [k for k in _derived if k[0] == table]:
+                del _derived[key]
@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import data_store
+
+OVERDUE_STYLE = 'background-color: red'
+
+# Интервалы просрочки в днях
+AGING_BUCKETS = ["Не просрочен", "0–30 дней", "31–60 дней", "Более 60 дней"]
+
+
+# Маска просроченных долгов (срок оплаты прошёл, сумма больше нуля) — для всей таблицы сразу
+def overdue_mask(df, today=None):
+    today = pd.Timestamp(today or datetime.now().date())
+    due = pd.to_datetime(df['Срок оплаты'], errors='coerce')
+    amount = pd.to_numeric(df['Сумма долга'], errors='coerce')
+    return (due < today) & (amount > 0)
+
+
+# Интервал просрочки для каждой строки
+def aging_buckets(df, today=None):
+    today = pd.Timestamp(today or datetime.now().date())
+    due = pd.to_datetime(df['Срок оплаты'], errors='coerce')
+    days = (today - due).dt.days
+    bucket = np.select([days > 60, days > 30, days > 0], AGING_BUCKETS[:0:-1], default=AGING_BUCKETS[0])
+    return pd.Series(pd.Categorical(bucket, categories=AGING_BUCKETS), index=df.index)
+
+
+# Стили для Styler.apply(axis=None): вся строка просроченного долга красная
+def overdue_styles(df, mask):
+    styles = np.where(mask.reindex(df.index, fill_value=False).to_numpy()[:, None], OVERDUE_STYLE, '')
+    return pd.DataFrame(np.broadcast_to(styles, df.shape), index=df.index, columns=df.columns)
+
+
+# Все показатели по долгам, посчитанные за один проход groupby
+class DebtAnalytics:
+    def __init__(self, df, today=None):
+        self.today = pd.Timestamp(today or datetime.now().date())
+        self.df = df
+        amount = pd.to_numeric(df['Сумма долга'], errors='coerce').fillna(0)
+        self.overdue = overdue_mask(df, self.today)
+        self.buckets = aging_buckets(df, self.today)
+
+        work = pd.DataFrame({
+            'Клиент': df['Клиент'],
+            'Сумма долга': amount,
+            'Просрочено': amount.where(self.overdue, 0),
+            'Интервал': self.buckets,
+        })
+        grouped = work.groupby('Клиент', sort=False, dropna=False, observed=True)
+        summary = grouped.agg(**{
+            'Документов': ('Сумма долга', 'size'),
+            'Сумма долга': ('Сумма долга', 'sum'),
+            'Просрочено': ('Просрочено', 'sum'),
+        })
+        aging = work.pivot_table(index='Клиент', columns='Интервал', values='Сумма долга',
+                                 aggfunc='sum', fill_value=0, observed=False, dropna=False)
+        organizations = df.groupby('Клиент', sort=False, dropna=False)['Организация'].first()
+        self.summary = (summary.join(aging.reindex(columns=AGING_BUCKETS, fill_value=0))
+                        .join(organizations)
+                        .reset_index())
+        self.summary = self.summary[['Клиент', 'Организация', 'Документов', 'Сумма долга', 'Просрочено'] + AGING_BUCKETS]
+
+        # Номера строк каждого клиента: детализация берётся срезом без фильтрации всей таблицы
+        self.groups = grouped.indices
+
+    @property
+    def clients(self):
+        return list(self.groups)
+
+    # Документы одного клиента
+    def client_rows(self, client):
+        return self.df.iloc[self.groups.get(client, [])]
+
+    # Документы со стилями просрочки; строки сопоставляются по индексу исходной таблицы
+    def styled(self, df):
+        return df.style.apply(overdue_styles, mask=self.overdue, axis=None)
+
+    # Сводка по клиентам: клиент подсвечивается, если у него есть просроченные долги
+    def styled_summary(self, columns=None):
+        summary = self.summary if columns is None else self.summary[columns]
+        return summary.style.apply(overdue_styles, mask=self.summary['Просрочено'] > 0, axis=None)
+
+
+# Аналитика для текущей версии таблицы долгов (пересчёт после изменений или смены дня)
+def get_analytics():
+    today = datetime.now().date()
+    return data_store.derived('debts', 'analytics', lambda df: DebtAnalytics(df, today), token=today)
@@ -0,0 +1,222 @@
+import argparse
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import assignments
+import data_store
+import order_index
+import quotes
+
+PENDING_STATUS = "В ожидании"
+
+# Машины в этих статусах в распределении не участвуют
+UNAVAILABLE_TRUCK_STATUSES = {"В пути", "На ремонте", "Занят"}
+
+# Причины, по которым заказ остался без машины
+REASON_NO_ZONE = "Зона доставки не найдена"
+REASON_NO_TRUCK = "Нет машины с нужной грузоподъёмностью или выгрузкой"
+REASON_NO_SLOT = "Не хватило свободных машин"
+
+# Стоимость недопустимой пары заказ–машина: больше любой суммы реальных стоимостей
+_INFEASIBLE = 1e12
+
+PLAN_COLUMNS = ['Номер заказа', 'Имя водителя', 'Рейс', 'Адрес доставки', 'Вес груза (т)', 'Название зоны',
+                'Класс машины', 'Стоимость доставки', quotes.DISTANCE_COLUMN]
+
+# assignments — назначения (DataFrame), unassigned — заказы без машины с причиной,
+# total_cost — суммарная стоимость, versions — версии строк заказов на момент расчёта
+DispatchPlan = namedtuple('DispatchPlan', ['assignments', 'unassigned', 'total_cost', 'versions'])
+
+
+# Венгерский алгоритм (кратчайшие увеличивающие пути с потенциалами), O(n²·m).
+# Внутренний цикл по столбцам выполняется векторно в numpy. Матрица может быть
+# прямоугольной; возвращает пары (строка, столбец) минимальной суммарной стоимости.
+def solve_assignment(cost):
+    cost = np.asarray(cost, dtype=float)
+    if cost.size == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)  # строка (с 1), которой отдан столбец; 0 — свободен
+    way = np.zeros(m + 1, dtype=int)
+    for row in range(1, n + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while owner[column] != 0:
+            used[column] = True
+            current_row = owner[column]
+            free = ~used
+            free[0] = False
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            better = free[1:] & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = column
+            candidates = np.where(free, min_reduced, np.inf)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_reduced[free] -= delta
+            column = next_column
+        # Разворот увеличивающего пути
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    columns = np.nonzero(owner[1:])[0]
+    rows = owner[1:][columns] - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows, kind='stable')
+    return rows[order], columns[order]
+
+
+def _column(df, column, default=None):
+    return df[column] if column in df.columns else pd.Series(default, index=df.index, dtype=object)
+
+
+# Заказы, ожидающие машину
+def pending_orders(df_orders):
+    return df_orders[_column(df_orders, 'Статус') == PENDING_STATUS]
+
+
+# Машины, которые можно назначить: не в рейсе, не на ремонте и без заказов в пути.
+# Водители с заказами «В ожидании» участвуют — эти заказы распределяются заново.
+def available_trucks(df_trucks):
+    index = order_index.get_index()
+    in_transit = {driver for driver in index.busy_drivers
+                  if any(index.orders[number][1] != PENDING_STATUS for number in index.active_orders(driver))}
+    status = _column(df_trucks, 'Статус авто')
+    capacity = pd.to_numeric(_column(df_trucks, 'Макс. грузоподъемность'), errors='coerce')
+    mask = ~status.isin(UNAVAILABLE_TRUCK_STATUSES) & ~df_trucks['Имя водителя'].isin(in_transit) & capacity.notna()
+    return df_trucks[mask]
+
+
+# Матрица стоимостей «заказ × рейс машины». Стоимость — цена доставки в зону заказа
+# для класса машины; каждый следующий рейс той же машины дороже на путь до базы и обратно
+# (trip_penalty за км). Недопустимые пары (не хватает грузоподъёмности или нет
+# боковой выгрузки) получают _INFEASIBLE.
+def cost_matrix(zones, weights, side_unloading, capacities, truck_side, trips=1, trip_penalty=50.0):
+    prices = quotes.get_prices()
+    classes = quotes.truck_class(capacities)
+    cost = prices.prices[zones[:, None], classes[None, :]]
+    feasible = (capacities[None, :] >= weights[:, None]) & (~side_unloading[:, None] | truck_side[None, :])
+    feasible &= ~np.isnan(cost)
+    cost = np.where(feasible, cost, _INFEASIBLE)
+    if trips > 1:
+        distance = np.nan_to_num(prices.distances[zones])
+        cost = np.concatenate([
+            np.where(feasible, cost + trip * 2 * distance[:, None] * trip_penalty, _INFEASIBLE)
+            for trip in range(trips)
+        ], axis=1)
+    return cost
+
+
+# План распределения ожидающих заказов по свободным машинам с минимальной суммарной
+# стоимостью. trips — сколько заказов одна машина может взять за один план.
+def build_plan(df_orders=None, df_trucks=None, trips=1, trip_penalty=50.0):
+    df_orders = data_store.load_table('orders') if df_orders is None else df_orders
+    df_trucks = data_store.load_table('trucks') if df_trucks is None else df_trucks
+    orders = pending_orders(df_orders)
+    trucks = available_trucks(df_trucks)
+
+    prices = quotes.get_prices()
+    addresses = _column(orders, 'Адрес доставки').fillna('').astype(str)
+    zones = np.array([prices.locate(address) if address else -1 for address in addresses], dtype=int)
+    weights = pd.to_numeric(_column(orders, 'Вес груза (т)'), errors='coerce').fillna(0).to_numpy(dtype=float)
+    side_unloading = (_column(orders, 'Боковая выгрузка') == "Да").to_numpy()
+    capacities = pd.to_numeric(trucks['Макс. грузоподъемность'], errors='coerce').to_numpy(dtype=float)
+    truck_side = (_column(trucks, 'Боковая выгрузка') == "Да").to_numpy()
+    drivers = trucks['Имя водителя'].to_numpy(dtype=object)
+
+    reasons = pd.Series(None, index=orders.index, dtype=object)
+    reasons[zones < 0] = REASON_NO_ZONE
+    located = np.nonzero(zones >= 0)[0]
+    rows, slots = np.empty(0, dtype=int), np.empty(0, dtype=int)
+    cost = np.empty((0, 0))
+    if len(located) and len(drivers):
+        cost = cost_matrix(zones[located], weights[located], side_unloading[located],
+                           capacities, truck_side, trips, trip_penalty)
+        # Заказы, которые не везёт ни одна машина, в задачу о назначениях не попадают
+        no_truck = (cost >= _INFEASIBLE).all(axis=1)
+        reasons.iloc[located[no_truck]] = REASON_NO_TRUCK
+        located, cost = located[~no_truck], cost[~no_truck]
+        rows, slots = solve_assignment(cost)
+        assigned = cost[rows, slots] < _INFEASIBLE
+        rows, slots = rows[assigned], slots[assigned]
+    elif len(located):
+        reasons.iloc[located] = REASON_NO_TRUCK
+    assigned_positions = located[rows]
+    reasons[reasons.isna() & ~np.isin(np.arange(len(orders)), assigned_positions)] = REASON_NO_SLOT
+
+    trucks_of = slots % max(len(drivers), 1)
+    order_zones = zones[assigned_positions]
+    plan = pd.DataFrame({
+        'Номер заказа': orders['Номер заказа'].to_numpy(dtype=object)[assigned_positions],
+        'Имя водителя': drivers[trucks_of],
+        'Рейс': 0,
+        'Адрес доставки': addresses.to_numpy(dtype=object)[assigned_positions],
+        'Вес груза (т)': weights[assigned_positions],
+        'Название зоны': prices.names[order_zones],
+        'Класс машины': np.array([name for name, _, _ in quotes.TRUCK_CLASSES], dtype=object)[
+            quotes.truck_class(capacities[trucks_of])],
+        'Стоимость доставки': prices.prices[order_zones, quotes.truck_class(capacities[trucks_of])],
+        quotes.DISTANCE_COLUMN: prices.distances[order_zones],
+    }, columns=PLAN_COLUMNS).sort_values(['Имя водителя', quotes.DISTANCE_COLUMN], kind='stable', ignore_index=True)
+    # Рейсы машины нумеруются от ближней зоны к дальней
+    plan['Рейс'] = plan.groupby('Имя водителя', sort=False).cumcount() + 1
+
+    unassigned = orders.loc[reasons.notna(), ['Номер заказа']].assign(**{'Причина': reasons[reasons.notna()]})
+    versions = {number: data_store.row_version('orders', {'Номер заказа': number}) for number in plan['Номер заказа']}
+    return DispatchPlan(plan, unassigned.reset_index(drop=True), float(cost[rows, slots].sum()), versions)
+
+
+# Запись плана: водитель назначается заказу, назначение попадает в журнал.
+# Заказы, изменённые после расчёта плана, пропускаются и возвращаются списком.
+def apply_plan(plan, changed_by=''):
+    conflicts, entries = [], []
+    # Все назначения записываются в файлы заказов и машин один раз, в конце
+    with data_store.batch('orders'), data_store.batch('trucks'):
+        for number, driver in zip(plan.assignments['Номер заказа'], plan.assignments['Имя водителя']):
+            try:
+                data_store.update_rows('orders', {'Номер заказа': number}, {'Имя водителя': driver},
+                                       expected_version=plan.versions.get(number))
+            except data_store.ConflictError:
+                conflicts.append(number)
+                continue
+            entries.append((number, driver, PENDING_STATUS, changed_by))
+            data_store.update_rows('trucks', {'Имя водителя': driver}, {'Статус авто': PENDING_STATUS})
+    # Журнал — только после записи заказов и машин: если пачка не записалась, назначений не было
+    if entries:
+        assignments.record_many(entries)
+    return conflicts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Распределение ожидающих заказов по свободным машинам")
+    parser.add_argument('--trips', type=int, default=1, help="сколько заказов может взять одна машина")
+    parser.add_argument('--apply', action='store_true', help="записать назначения")
+    args = parser.parse_args(argv)
+
+    plan = build_plan(trips=args.trips)
+    print(plan.assignments.to_string(index=False) if len(plan.assignments) else "Назначений нет")
+    print(f"Суммарная стоимость: {plan.total_cost:.0f}")
+    if len(plan.unassigned):
+        print(plan.unassigned.to_string(index=False))
+    if args.apply:
+        conflicts = apply_plan(plan, changed_by='распределение')
+        print(f"Назначено: {len(plan.assignments) - len(conflicts)}, изменены другими: {len(conflicts)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+import datetime as dt
+import json
+import os
+import threading
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from locking import remove_file, replace_file, temp_path
+
+# После скольких строк в журнале он переносится в снимок xlsx
+COMPACT_THRESHOLD = 5000
+
+
+# Журнал только для добавления: снимок xlsx + хвост новых записей в JSON Lines.
+# Добавление пишет одну строку в конец файла, не трогая накопленные данные.
+class AppendJournal:
+    def __init__(self, snapshot_path, journal_path, columns, date_columns=(), compact_threshold=COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.columns = list(columns)
+        self.date_columns = list(date_columns)
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._journal_rows = None
+        self._snapshot_rows = None
+        self._snapshot_tail = None
+
+    # Подпись для кэша: меняется при изменении снимка или журнала
+    def signature(self):
+        return _stat(self.snapshot_path), _stat(self.journal_path)
+
+    # Добавление пачки строк одной записью в файл
+    def append(self, rows):
+        if not rows:
+            return
+        payload = ''.join(json.dumps(row, ensure_ascii=False, default=_json_default) + '\n' for row in rows)
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_rows = self._count_journal() if self._journal_rows is None else self._journal_rows + len(rows)
+
+    # Пора ли перенести журнал в снимок (сам перенос — compact, не внутри записи пользователя)
+    def compact_due(self):
+        with self._lock:
+            if self._journal_rows is None:
+                self._journal_rows = self._count_journal()
+            return self._journal_rows >= self.compact_threshold
+
+    # Количество строк в снимке и журнале без чтения данных
+    def count(self):
+        return self._count_snapshot() + self._count_journal()
+
+    # Число строк снимка запоминается до следующего изменения файла
+    def _count_snapshot(self):
+        signature = _stat(self.snapshot_path)
+        if signature is None:
+            return 0
+        if self._snapshot_rows is None or self._snapshot_rows[0] != signature:
+            # openpyxl импортируется только при работе со снимком (в SQLite-хранилище не нужен)
+            from openpyxl import load_workbook
+
+            wb = load_workbook(self.snapshot_path, read_only=True)
+            ws = wb.active
+            if ws.max_row is not None:
+                rows = max(ws.max_row - 1, 0)
+            else:
+                # В файлах, записанных потоково, размер листа не указан
+                rows = max(sum(1 for _ in ws.iter_rows(values_only=True)) - 1, 0)
+            wb.close()
+            self._snapshot_rows = (signature, rows)
+        return self._snapshot_rows[1]
+
+    def _count_journal(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, 'rb') as f:
+            return sum(1 for line in f if line.strip())
+
+    # Потоковое чтение: сначала снимок, затем журнал, порциями по chunksize строк
+    def iter_chunks(self, chunksize=10000):
+        for rows in _batched(self._iter_rows(), chunksize):
+            yield self._frame(rows)
+
+    def _iter_rows(self):
+        yield from self._iter_snapshot()
+        yield from self._iter_journal()
+
+    def _iter_snapshot(self):
+        if os.path.exists(self.snapshot_path):
+            from openpyxl import load_workbook
+
+            wb = load_workbook(self.snapshot_path, read_only=True)
+            try:
+                rows = wb.active.iter_rows(values_only=True)
+                header = [str(c).replace('\n', ' ') if c is not None else c for c in next(rows, [])]
+                for values in rows:
+                    if any(v is not None for v in values):
+                        yield dict(zip(header, values))
+            finally:
+                wb.close()
+
+    # Записи журнала; с limit — только из первых limit байт файла
+    def _iter_journal(self, limit=None):
+        if not os.path.exists(self.journal_path):
+            return
+        if limit is not None:
+            with open(self.journal_path, 'rb') as f:
+                lines = f.read(limit).decode('utf-8').splitlines()
+            yield from (json.loads(line) for line in lines if line.strip())
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _frame(self, rows):
+        df = pd.DataFrame(rows, columns=self.columns) if rows else pd.DataFrame(columns=self.columns)
+        for column in self.date_columns:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+        return df
+
+    # Полное чтение таблицы
+    def read(self):
+        chunks = list(self.iter_chunks())
+        if not chunks:
+            return self._frame([])
+        return pd.concat(chunks, ignore_index=True)
+
+    # Последние n строк без материализации всей таблицы. Хвост снимка запоминается до
+    # изменения файла снимка, поэтому при каждом вызове дочитывается только журнал
+    def tail(self, n):
+        rows = list(deque(self._iter_journal(), maxlen=n))
+        if len(rows) < n:
+            rows = self._tail_of_snapshot(n - len(rows)) + rows
+        return self._frame(rows)
+
+    def _tail_of_snapshot(self, n):
+        signature = _stat(self.snapshot_path)
+        if signature is None:
+            return []
+        cached = self._snapshot_tail
+        if cached is None or cached[0] != signature or cached[1] < n:
+            cached = (signature, n, list(deque(self._iter_snapshot(), maxlen=n)))
+            self._snapshot_tail = cached
+        return cached[2][-n:]
+
+    # Перенос журнала в снимок. Новый xlsx пишется потоково без блокировки таблицы — из
+    # снимка и журнала до его текущего конца; lock (функция, возвращающая блокировку таблицы)
+    # берётся, только чтобы запомнить конец журнала и подменить файлы. Записи, добавленные
+    # за время переноса, остаются в журнале. Если снимок за это время заменили, перенос
+    # отменяется (возвращается False). exclusive — блокировка на весь перенос, общая для всех
+    # процессов (приложение, второй его экземпляр, storage.py compact): переносы не идут разом.
+    def compact(self, lock=nullcontext, exclusive=nullcontext):
+        with exclusive():
+            tmp_path = temp_path(self.snapshot_path)
+            try:
+                return self._compact(lock, tmp_path)
+            finally:
+                remove_file(tmp_path)  # после подмены файла его уже нет
+
+    def _compact(self, lock, tmp_path):
+        from openpyxl import Workbook
+
+        with lock():
+            snapshot = _stat(self.snapshot_path)
+            offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(self.columns)
+        for rows in (self._iter_snapshot(), self._iter_journal(offset)):
+            for row in rows:
+                ws.append([_excel_value(row.get(c), c in self.date_columns) for c in self.columns])
+        wb.save(tmp_path)
+
+        with lock(), self._lock:
+            if _stat(self.snapshot_path) != snapshot:
+                return False
+            rest = b''
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(offset)
+                    rest = f.read()
+            if rest.strip():
+                tmp_journal = temp_path(self.journal_path)
+                try:
+                    with open(tmp_journal, 'wb') as f:
+                        f.write(rest)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    replace_file(tmp_path, self.snapshot_path)
+                    replace_file(tmp_journal, self.journal_path)
+                finally:
+                    remove_file(tmp_journal)
+            else:
+                replace_file(tmp_path, self.snapshot_path)
+                remove_file(self.journal_path)
+            self._journal_rows = sum(1 for line in rest.splitlines() if line.strip())
+        return True
+
+    # Полная замена содержимого (импорт, миграция)
+    def write(self, df):
+        with self._lock:
+            tmp_path = temp_path(self.snapshot_path)
+            try:
+                df.to_excel(tmp_path, index=False, engine='openpyxl')
+                replace_file(tmp_path, self.snapshot_path)
+            finally:
+                remove_file(tmp_path)
+            remove_file(self.journal_path)
+            self._journal_rows = 0
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_default(value):
+    if isinstance(value, (pd.Timestamp, dt.datetime, dt.date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Тип {type(value).__name__} не поддерживается журналом")
+
+
+# Значения из JSON в формате, удобном для xlsx (даты — как даты, а не текст)
+def _excel_value(value, is_date=False):
+    if is_date and isinstance(value, str):
+        try:
+            return dt.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
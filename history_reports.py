@@ -0,0 +1,322 @@
+import argparse
+import io
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import schema
+
+ISSUED = "Добавление долга"
+REPAID = "Погашение долга"
+OPERATIONS = [ISSUED, REPAID]
+
+DATE_COLUMN = 'Дата операции'
+
+# Разрезы сводки: название -> столбец истории
+DIMENSIONS = {
+    'Организация': 'Организация',
+    'Сотрудник': 'Кто выполнил операцию',
+}
+
+# Периоды сводки: название -> частота pandas
+PERIODS = {'День': 'D', 'Месяц': 'M'}
+
+ROLLUP_COLUMNS = ['Выдано', 'Погашено', 'Операций']
+
+# Размер порции при потоковой выгрузке
+EXPORT_CHUNK = 50000
+
+
+def _dates(values):
+    return pd.to_datetime(pd.Series(values), errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+
+# Границы периода: start включительно, end — по конец дня включительно
+def _bounds(start=None, end=None):
+    start = np.datetime64(pd.Timestamp(start).normalize(), 'ns') if start is not None else None
+    end = np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1), 'ns') if end is not None else None
+    return start, end
+
+
+# Маска строк истории по фильтрам (для потоковой выгрузки, без индекса)
+def filter_mask(df, start=None, end=None, client=None, operation=None):
+    start, end = _bounds(start, end)
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None or end is not None:
+        dates = _dates(df[DATE_COLUMN])
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates < end
+    if client is not None:
+        mask &= (df['Клиент'] == client).to_numpy()
+    if operation is not None:
+        mask &= (df['Операция'] == operation).to_numpy()
+    return mask
+
+
+# Индекс истории для запросов по периоду и клиенту: порядок строк по дате (для
+# бинарного поиска границ периода) и номера строк каждого клиента. Новые записи
+# добавляются в индекс без пересчёта (история только дополняется). История хранится
+# приведённой к схеме: клиенты, организации и операции — категориями.
+class HistoryIndex:
+    def __init__(self, chunks):
+        frames = list(chunks)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=data_store.TABLES['history'][1])
+        self.df = schema.coerce('history', df)
+        self.dates = _dates(self.df[DATE_COLUMN])
+        self.order = np.argsort(self.dates, kind='stable')
+        self.groups = {client: positions for client, positions in
+                       self.df.groupby('Клиент', sort=False, dropna=True).indices.items()}
+
+    @property
+    def clients(self):
+        return sorted(self.groups, key=str)
+
+    # Границы дат в истории (None, если дат нет)
+    def date_range(self):
+        valid = self.dates[~np.isnat(self.dates)]
+        if not len(valid):
+            return None, None
+        return pd.Timestamp(valid.min()), pd.Timestamp(valid.max())
+
+    # Операции за период, по клиенту и виду операции — в порядке дат
+    def query(self, start=None, end=None, client=None, operation=None):
+        start, end = _bounds(start, end)
+        if client is not None:
+            positions = self.groups.get(client, np.array([], dtype=np.intp))
+            dates = self.dates[positions]
+            keep = np.ones(len(positions), dtype=bool)
+            if start is not None:
+                keep &= dates >= start
+            if end is not None:
+                keep &= dates < end
+            positions = positions[keep]
+            positions = positions[np.argsort(self.dates[positions], kind='stable')]
+        elif start is not None or end is not None:
+            # Порядок по дате: NaT в конце, границы находятся бинарным поиском
+            sorted_dates = self.dates[self.order]
+            valid = int((~np.isnat(sorted_dates)).sum())
+            lo = np.searchsorted(sorted_dates[:valid], start) if start is not None else 0
+            hi = np.searchsorted(sorted_dates[:valid], end) if end is not None else valid
+            positions = self.order[lo:hi]
+        else:
+            positions = self.order
+        if operation is not None:
+            positions = positions[(self.df['Операция'].to_numpy()[positions] == operation)]
+        return self.df.iloc[positions]
+
+    # Добавление записей (WriteEvent от data_store); остальные изменения — перестроение
+    def apply(self, event):
+        if event.op != 'insert':
+            return False
+        rows = pd.DataFrame(event.rows).reindex(columns=self.df.columns)
+        first = len(self.df)
+        self.df = schema.concat('history', self.df, rows)
+        self.dates = np.concatenate([self.dates, _dates(rows[DATE_COLUMN])])
+        # Порядок почти отсортирован: устойчивая сортировка проходит его за линейное время
+        self.order = np.argsort(self.dates, kind='stable')
+        for client, positions in rows.groupby('Клиент', sort=False, dropna=True).indices.items():
+            self.groups[client] = np.concatenate([self.groups.get(client, np.array([], dtype=np.intp)),
+                                                  positions + first])
+        return True
+
+
+# Суммы за день по значению разреза: выдано, погашено и число операций
+def _aggregate(df, column):
+    amount = pd.to_numeric(df['Сумма'], errors='coerce').fillna(0)
+    work = pd.DataFrame({
+        'Дата': pd.to_datetime(df[DATE_COLUMN], errors='coerce').dt.normalize(),
+        column: df[column].fillna('').astype(str),
+        'Выдано': amount.where(df['Операция'] == ISSUED, 0),
+        'Погашено': amount.where(df['Операция'] == REPAID, 0),
+        'Операций': 1.0,
+    })
+    return work.groupby(['Дата', column]).sum()
+
+
+# Дневные итоги по организациям и сотрудникам. Строятся за один потоковый проход
+# по истории и дополняются при каждой новой записи; месячные — из дневных.
+class HistoryRollups:
+    def __init__(self, chunks):
+        parts = {column: [] for column in DIMENSIONS.values()}
+        for chunk in chunks:
+            for column in parts:
+                parts[column].append(_aggregate(chunk, column))
+        self.daily = {}
+        for column, frames in parts.items():
+            if frames:
+                self.daily[column] = pd.concat(frames).groupby(level=[0, 1]).sum().sort_index()
+            else:
+                index = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)],
+                                                  names=['Дата', column])
+                self.daily[column] = pd.DataFrame({c: pd.Series(dtype=float) for c in ROLLUP_COLUMNS}, index=index)
+
+    def apply(self, event):
+        if event.op != 'insert':
+            return False
+        rows = pd.DataFrame(event.rows).reindex(columns=data_store.TABLES['history'][1])
+        for column, daily in self.daily.items():
+            new = _aggregate(rows, column)
+            existing = new.index.isin(daily.index)
+            daily = daily.copy()
+            if existing.any():
+                daily.loc[new.index[existing], ROLLUP_COLUMNS] += new[existing].to_numpy()
+            if not existing.all():
+                added = new[~existing]
+                daily = pd.concat([daily, added])
+                # Обычно запись за последний день — порядок сохраняется без сортировки
+                if not daily.index.is_monotonic_increasing:
+                    daily = daily.sort_index()
+            self.daily[column] = daily
+        return True
+
+    # Первый и последний день с операциями (None, если операций нет)
+    def date_range(self):
+        dates = next(iter(self.daily.values())).index.get_level_values(0)
+        if not len(dates):
+            return None, None
+        return dates.min(), dates.max()
+
+    # Итоги по периодам (freq: 'D' или 'M') для разреза dimension за период start..end
+    def report(self, dimension='Организация', freq='D', start=None, end=None):
+        column = DIMENSIONS[dimension]
+        daily = self._slice(column, start, end)
+        if freq == 'M':
+            dates = daily.index.get_level_values(0).to_period('M').to_timestamp()
+            daily = daily.groupby([dates, daily.index.get_level_values(1)]).sum()
+            daily.index.names = ['Дата', column]
+        result = daily.reset_index()
+        result['Разница'] = result['Выдано'] - result['Погашено']
+        result['Операций'] = result['Операций'].astype(int)
+        return result
+
+    # Итоги за весь период по каждому значению разреза (самые крупные — сверху)
+    def totals(self, dimension='Организация', start=None, end=None):
+        column = DIMENSIONS[dimension]
+        totals = self._slice(column, start, end).groupby(level=1).sum()
+        totals['Разница'] = totals['Выдано'] - totals['Погашено']
+        totals['Операций'] = totals['Операций'].astype(int)
+        return totals.sort_values('Выдано', ascending=False).reset_index()
+
+    def _slice(self, column, start, end):
+        daily = self.daily[column]
+        start, end = _bounds(start, end)
+        if start is None and end is None:
+            return daily
+        dates = daily.index.get_level_values(0).to_numpy(dtype='datetime64[ns]')
+        lo = np.searchsorted(dates, start) if start is not None else 0
+        hi = np.searchsorted(dates, end) if end is not None else len(dates)
+        return daily.iloc[lo:hi]
+
+
+# Индекс и сводки для текущей версии истории (строятся потоково, без кэша всей таблицы)
+def get_index():
+    return data_store.derived('history', 'index', HistoryIndex, chunked=True)
+
+
+def get_rollups():
+    return data_store.derived('history', 'rollups', HistoryRollups, chunked=True)
+
+
+# Потоковая выгрузка операций по фильтрам в CSV или xlsx (fmt): история читается порциями,
+# в памяти одновременно только одна порция. target — путь или двоичный файловый объект.
+# Возвращает число выгруженных строк.
+def export(target, fmt='csv', chunksize=EXPORT_CHUNK, **filters):
+    if isinstance(target, str):
+        with open(target, 'wb') as f:
+            return export(f, fmt, chunksize, **filters)
+    chunks = (chunk[filter_mask(chunk, **filters)] for chunk in data_store.iter_table('history', chunksize))
+    if fmt == 'xlsx':
+        return _export_xlsx(target, chunks)
+    return _export_csv(target, chunks)
+
+
+def _export_csv(target, chunks):
+    # BOM — чтобы Excel открыл кириллицу без выбора кодировки
+    target.write('\ufeff'.encode('utf-8'))
+    count = 0
+    header = True
+    for chunk in chunks:
+        if not len(chunk) and not header:
+            continue
+        chunk.to_csv(target, index=False, header=header, encoding='utf-8', date_format='%Y-%m-%d')
+        header = False
+        count += len(chunk)
+    if header:
+        pd.DataFrame(columns=data_store.TABLES['history'][1]).to_csv(target, index=False, encoding='utf-8')
+    return count
+
+
+def _export_xlsx(target, chunks):
+    from openpyxl import Workbook
+
+    # Потоковая запись: строки не хранятся в памяти книги
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("История")
+    columns = None
+    count = 0
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+            ws.append(columns)
+        for row in chunk.itertuples(index=False):
+            ws.append([_excel_value(value) for value in row])
+        count += len(chunk)
+    if columns is None:
+        ws.append(data_store.TABLES['history'][1])
+    wb.save(target)
+    return count
+
+
+def _excel_value(value):
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.to_pydatetime()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+# Выгрузка в память (для кнопки скачивания в приложении)
+def export_bytes(fmt='csv', **filters):
+    buffer = io.BytesIO()
+    count = export(buffer, fmt, **filters)
+    return buffer.getvalue(), count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отчёты по истории операций")
+    parser.add_argument('--from', dest='start', help="начало периода (ГГГГ-ММ-ДД)")
+    parser.add_argument('--to', dest='end', help="конец периода включительно")
+    parser.add_argument('--client', help="операции клиента (список или выгрузка)")
+    parser.add_argument('--operation', choices=OPERATIONS, help="операции этого вида (список или выгрузка)")
+    parser.add_argument('--by', choices=list(DIMENSIONS), default='Организация', help="разрез сводки")
+    parser.add_argument('--period', choices=list(PERIODS), help="итоги по дням или месяцам (без него — за весь период)")
+    parser.add_argument('--export', help="выгрузить операции по фильтрам в файл .csv или .xlsx")
+    args = parser.parse_args(argv)
+
+    filters = {'start': args.start, 'end': args.end, 'client': args.client, 'operation': args.operation}
+    if args.export:
+        fmt = 'xlsx' if args.export.lower().endswith('.xlsx') else 'csv'
+        count = export(args.export, fmt, **filters)
+        print(f"Выгружено операций: {count} -> {args.export}")
+        return
+
+    if args.client or args.operation:
+        operations = get_index().query(**filters)
+        print(operations.to_string(index=False) if len(operations) else "Операций нет")
+        return
+
+    rollups = get_rollups()
+    if args.period:
+        report = rollups.report(args.by, PERIODS[args.period], args.start, args.end)
+    else:
+        report = rollups.totals(args.by, args.start, args.end)
+    print(report.to_string(index=False) if len(report) else "Операций нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class LockTimeout(Exception):
+    pass
+
+
+# Межпроцессная блокировка на файле (fcntl в Linux/macOS, msvcrt в Windows).
+# Повторный захват тем же потоком разрешён, поэтому операции можно вкладывать.
+class FileLock:
+    def __init__(self, path, timeout=30.0, poll_interval=0.01):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise LockTimeout(f"Не удалось получить блокировку {self.path}")
+        if self._depth:
+            self._depth += 1
+            return
+        try:
+            self._file = open(self.path, 'a+b')
+            while not self._try_lock():
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Не удалось получить блокировку {self.path}")
+                time.sleep(self.poll_interval)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+        self._depth = 1
+
+    def _try_lock(self):
+        try:
+            if os.name == 'nt':
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if os.name == 'nt':
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# Новый временный файл рядом с исходным (расширение сохраняется для pandas/openpyxl).
+# Имя уникальное, поэтому одновременные записи одного файла не пишут в один временный.
+def temp_path(path):
+    root, ext = os.path.splitext(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(root)}.', suffix=f'.tmp{ext}',
+                                    dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    return tmp_path
+
+
+# Удаление временного файла после неудачной записи (если он уже удалён — ничего)
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Атомарная подмена файла. В Windows файл, открытый читателем, заменить нельзя — повторяем.
+def replace_file(src, dst, attempts=50, delay=0.05):
+    for attempt in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay)
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+# Блокировка таблицы: один объект на файл блокировки в пределах процесса
+# (timeout задаётся при первом обращении к блокировке)
+def table_lock(lock_dir, name, timeout=30.0):
+    path = os.path.join(lock_dir, f'{name}.lock')
+    with _registry_lock:
+        lock = _registry.get(path)
+        if lock is None:
+            os.makedirs(lock_dir, exist_ok=True)
+            lock = _registry[path] = FileLock(path, timeout)
+    return lock
@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+import pandas as pd
+
+import data_store
+
+# Заказы в этих статусах занимают водителя
+ACTIVE_STATUSES = {"В ожидании", "В пути"}
+COMPLETED_STATUSES = {"Выполнен"}
+
+
+# Индекс заказов по водителям: активные и выполненные заказы каждого водителя.
+# Строится один раз и обновляется по событиям записи в таблицу заказов,
+# поэтому вопрос «занят ли водитель» решается за O(1).
+class DriverOrderIndex:
+    def __init__(self, df):
+        self.orders = {}  # номер заказа -> (водитель, статус)
+        self.active = defaultdict(set)
+        self.completed = defaultdict(set)
+        numbers = df['Номер заказа'] if 'Номер заказа' in df else []
+        drivers = df['Имя водителя'] if 'Имя водителя' in df else [None] * len(numbers)
+        statuses = df['Статус'] if 'Статус' in df else [None] * len(numbers)
+        for number, driver, status in zip(numbers, drivers, statuses):
+            self.add(number, driver, status)
+
+    def add(self, number, driver, status):
+        if _missing(number):
+            return
+        self.remove(number)
+        self.orders[number] = (driver, status)
+        if status in ACTIVE_STATUSES:
+            self.active[driver].add(number)
+        elif status in COMPLETED_STATUSES:
+            self.completed[driver].add(number)
+
+    def remove(self, number):
+        driver, _ = self.orders.pop(number, (None, None))
+        for groups in (self.active, self.completed):
+            orders = groups.get(driver)
+            if orders is not None:
+                orders.discard(number)
+                if not orders:
+                    del groups[driver]
+
+    # Обновление по событию записи из data_store
+    def apply(self, event):
+        if event.op == 'insert':
+            for row in event.rows:
+                self.add(row.get('Номер заказа'), row.get('Имя водителя'), row.get('Статус'))
+            return
+        numbers = [n for n in event.rows.get('Номер заказа', pd.Series(dtype=object)) if not _missing(n)]
+        if event.op == 'delete':
+            for number in numbers:
+                self.remove(number)
+            return
+        for number in numbers:
+            driver, status = self.orders.get(number, (None, None))
+            new_number = event.values.get('Номер заказа', number)
+            self.add(new_number, event.values.get('Имя водителя', driver), event.values.get('Статус', status))
+            if new_number != number:
+                self.remove(number)
+
+    def is_busy(self, driver):
+        return bool(self.active.get(driver))
+
+    def active_orders(self, driver):
+        return sorted(self.active.get(driver, ()), key=str)
+
+    def completed_orders(self, driver):
+        return sorted(self.completed.get(driver, ()), key=str)
+
+    # Водители, у которых сейчас есть активные заказы
+    @property
+    def busy_drivers(self):
+        return set(self.active)
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+# Индекс для текущей версии таблицы заказов
+def get_index():
+    return data_store.derived('orders', 'driver_orders', DriverOrderIndex)
@@ -0,0 +1,127 @@
+import streamlit as st
+
+import data_store
+import profiling
+from pagination import paginated_view
+
+
+# Запоминаем версию строки при открытии формы, чтобы при сохранении заметить чужие правки
+def remember_row(form_key, table, where):
+    state_key = f"seen_{form_key}"
+    seen = st.session_state.get(state_key)
+    if seen is None or seen['table'] != table or seen['where'] != where:
+        seen = {
+            'table': table,
+            'where': where,
+            'version': data_store.row_version(table, where),
+            'base': data_store.row_values(table, where),
+        }
+        st.session_state[state_key] = seen
+    return seen
+
+
+# Сохранение правки с проверкой версии строки; при конфликте показывает ошибку
+def save_row(form_key, values=None, increments=None, delete=False):
+    seen = st.session_state.pop(f"seen_{form_key}")
+    try:
+        if delete:
+            data_store.delete_rows(seen['table'], seen['where'], expected_version=seen['version'])
+        else:
+            data_store.update_rows(seen['table'], seen['where'], values, increments,
+                                   expected_version=seen['version'], base=seen['base'])
+    except data_store.ConflictError as e:
+        st.error(f"{e}. Проверьте актуальные данные и сохраните ещё раз.")
+        return False
+    forget_rows(seen['table'], seen['where'])
+    return True
+
+
+# После своей записи в таблицу версии, запомненные другими формами для тех же строк,
+# сбрасываются и при следующем показе формы запоминаются заново — иначе своя же правка
+# считается чужой. where — условие изменённых строк (None — вся таблица)
+def forget_rows(table, where=None):
+    for key in [k for k in st.session_state if str(k).startswith('seen_')]:
+        seen = st.session_state[key]
+        if seen['table'] != table:
+            continue
+        base = seen['base'] or {}
+        if where is None or seen['where'] == where or all(base.get(c) == v for c, v in where.items()):
+            del st.session_state[key]
+
+
+# Функция для получения уникальных значений из столбца
+def get_unique_values(column_name, df):
+    return df[column_name].dropna().unique().tolist()
+
+
+# Функция для добавления записи в историю
+def add_to_history(client, organization, operation, amount, operation_date, performed_by, notes):
+    new_history_entry = {
+        'Клиент': client,
+        'Организация': organization,
+        'Операция': operation,
+        'Сумма': amount,
+        'Дата операции': operation_date,
+        'Кто выполнил операцию': performed_by,
+        'Примечания': notes
+    }
+    data_store.insert_rows('history', [new_history_entry])
+
+
+# Подсветка статусов заказов и машин
+def highlight_status(status):
+    if status == "Свободен":
+        return 'background-color: yellow'
+    elif status == "В пути" or status == "Занят":
+        return 'background-color: orange'
+    elif status == "На ремонте":
+        return 'background-color: green'
+    return ''
+
+
+# Раздел массового импорта таблицы из CSV/xlsx: проверка, загрузка одной пачкой и отчёт
+def import_section(name, title):
+    # Модуль импорта нужен только здесь, поэтому загружается при открытии раздела
+    import bulk_import
+
+    st.header(title)
+    spec = bulk_import.SPECS[name]
+    st.caption(f"Обязательные столбцы: {', '.join(spec.required)}. "
+               f"Строки с уже существующим значением «{spec.key}» пропускаются.")
+    st.download_button("Скачать шаблон", bulk_import.template(name), file_name=f"{name}_template.csv",
+                       mime="text/csv", key=f"{name}_import_template")
+
+    uploaded = st.file_uploader("Файл CSV или xlsx", type=['csv', 'xlsx'], key=f"{name}_import_file")
+    dry_run = st.checkbox("Только проверить, без записи", key=f"{name}_import_dry_run")
+    performed_by = st.text_input("Кто выполняет импорт", key=f"{name}_import_by")
+    if uploaded is not None and st.button("Импортировать", key=f"{name}_import_run"):
+        try:
+            with profiling.span(f'import:{name}', dry_run=dry_run):
+                result = bulk_import.import_file(name, uploaded, uploaded.name,
+                                                 performed_by=performed_by, dry_run=dry_run)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.session_state[f"{name}_import_result"] = (uploaded.name, dry_run, result)
+            if name == 'orders' and not dry_run:
+                forget_rows('trucks')  # импорт заказов меняет статусы машин
+
+    # Итог последнего импорта остаётся на экране, пока выбран тот же файл
+    saved = st.session_state.get(f"{name}_import_result")
+    if saved and uploaded is not None and saved[0] == uploaded.name:
+        _, checked, result = saved
+        if checked:
+            st.info(f"Проверка без записи: к импорту готово {result.imported} строк")
+        else:
+            st.success(f"Импортировано строк: {result.imported}")
+        col_read, col_imported, col_duplicates, col_rate = st.columns(4)
+        col_read.metric("Строк в файле", result.read)
+        col_imported.metric("Принято", result.imported)
+        col_duplicates.metric("Дубли", result.duplicates)
+        col_rate.metric("Строк/с", f"{bulk_import.rate(result):,.0f}".replace(',', ' '))
+        if len(result.errors):
+            st.warning(f"Отклонено строк: {len(result.errors)}")
+            paginated_view(result.errors, f"{name}_import_errors")
+            st.download_button("Скачать отклонённые строки", result.errors.to_csv(index=False).encode('utf-8-sig'),
+                               file_name=f"{name}_import_errors.csv", mime="text/csv",
+                               key=f"{name}_import_errors_download")
@@ -0,0 +1,141 @@
+import pandas as pd
+import streamlit as st
+
+import data_store
+import debt_analytics
+import profiling
+from page_common import add_to_history, forget_rows, import_section
+
+TITLE = "Управление долгами клиентов"
+
+
+# Раздел "Список должников"
+def _debtors():
+    st.header("Список должников")
+    # Сводка по клиентам и интервалам просрочки считается один раз на версию таблицы
+    analytics = debt_analytics.get_analytics()
+    with profiling.span('render:debts_summary', rows=len(analytics.summary)):
+        st.dataframe(analytics.styled_summary(), use_container_width=True)
+
+    # Просмотр долгов по клиенту в разрезе: документы выводятся только по запросу
+    for client in analytics.clients:
+        with st.expander(f"Долги по клиенту: {client}"):
+            if st.checkbox("Показать документы", key=f"debt_docs_{client}"):
+                client_debts = analytics.client_rows(client)
+                st.dataframe(analytics.styled(client_debts[['Номер документа', 'Сумма долга', 'Срок оплаты', 'Выдавший долг']]), use_container_width=True)
+
+
+# Раздел "Добавить новый долг"
+def _add_debt():
+    df_debts = data_store.load_table('debts')
+    st.header("Добавить новый долг")
+    existing_client = st.selectbox("Выберите существующего клиента", ["Добавить нового"] + df_debts['Клиент'].tolist(), key="existing_client")
+
+    if existing_client == "Добавить нового":
+        new_client = st.text_input("Имя нового клиента", key="new_client")
+        new_org = st.text_input("Название организации", key="new_org")
+    else:
+        new_client = existing_client
+        new_org = df_debts[df_debts['Клиент'] == existing_client]['Организация'].values[0]
+
+    new_debt_amount = st.number_input("Сумма долга", min_value=0.0, key="new_debt_amount")
+    new_doc_number = st.text_input("Номер документа", key="new_doc_number")
+    new_due_date = st.date_input("Срок оплаты", key="new_due_date")
+    new_issuer = st.text_input("Кто выдал долг", key="new_issuer")
+
+    if st.button("Добавить долг"):
+        new_debt_data = {
+            'Клиент': new_client,
+            'Организация': new_org,
+            'Сумма долга': new_debt_amount,
+            'Номер документа': new_doc_number,
+            'Срок оплаты': new_due_date,
+            'Выдавший долг': new_issuer
+        }
+
+        data_store.insert_rows('debts', [new_debt_data])
+
+        # Запись в историю
+        add_to_history(new_client, new_org, "Добавление долга", new_debt_amount, new_due_date, new_issuer, new_doc_number)
+        st.rerun()  # Перезапуск приложения после добавления нового долга
+
+
+# Погашение долга клиента: сумма распределяется по его документам, начиная с самого
+# раннего срока оплаты, и ни один документ не уходит в минус; погашенные документы
+# (сумма <= 0) удаляются. Документ определяется номером (по нему же импорт ищет дубли).
+# Остатки читаются под блокировкой таблицы, поэтому параллельное погашение не задвоится.
+# Возвращает фактически погашенную сумму.
+def _repay(client, amount):
+    paid = 0.0
+    with data_store.batch('debts'):
+        df_debts = data_store.load_table('debts')
+        rows = df_debts[df_debts['Клиент'] == client]
+        documents = (rows.groupby('Номер документа', dropna=False, sort=False)
+                     .agg(due=('Срок оплаты', 'min'), owed=('Сумма долга', 'sum'))
+                     .sort_values('due', na_position='last'))
+        for document, owed in documents['owed'].items():
+            where = {'Клиент': client, 'Номер документа': document}
+            pay = min(max(amount - paid, 0.0), max(float(owed), 0.0))
+            if pay >= owed:
+                data_store.delete_rows('debts', where)
+            elif pay > 0:
+                data_store.update_rows('debts', where, increments={'Сумма долга': -pay})
+            paid += pay
+    return paid
+
+
+# Непогашенный остаток клиента (строки с суммой <= 0 не считаются)
+def _outstanding(debtor_data):
+    return float(pd.to_numeric(debtor_data['Сумма долга'], errors='coerce').clip(lower=0).sum())
+
+
+# Раздел "Редактировать долг"
+def _edit_debt():
+    df_debts = data_store.load_table('debts')
+    st.header("Редактировать долг")
+    selected_debtor = st.selectbox("Выберите должника", df_debts['Клиент'].unique(), key="selected_debtor")
+    
+    if selected_debtor:
+        debtor_data = df_debts[df_debts['Клиент'] == selected_debtor]
+        st.write(debtor_data)
+
+        outstanding = _outstanding(debtor_data)
+        reduce_amount = st.number_input("Сумма для частичного погашения", min_value=0.0, max_value=outstanding, key="reduce_amount")
+        close_debt = st.checkbox("Закрыть долг полностью?", key="close_debt")
+
+        if close_debt:
+            reduce_amount = outstanding
+
+        close_date = st.date_input("Дата закрытия", key="close_date")
+        closed_by = st.text_input("Кто закрыл", key="closed_by")
+        note = st.text_input("Примечания", key="note")
+        pko_number = st.text_input("Номер ПКО", key="pko_number")
+
+        if (note or pko_number) and st.button("Обновить долг"):
+            # Уменьшение и удаление погашенных документов — одна запись файла
+            paid = _repay(selected_debtor, reduce_amount)
+
+            # Запись в историю — только после записи долгов: если она не удалась, погашения не было
+            add_to_history(selected_debtor, debtor_data['Организация'].values[0], "Погашение долга", paid, close_date, closed_by, pko_number or note)
+            forget_rows('debts', {'Клиент': selected_debtor})
+            st.rerun()  # Перезапуск приложения после обновления долга
+
+
+# Раздел "Импорт долгов": загрузка из CSV/xlsx
+def _import():
+    import_section('debts', "Импорт долгов")
+
+
+SECTIONS = {
+    "Список должников": _debtors,
+    "Добавить новый долг": _add_debt,
+    "Редактировать долг": _edit_debt,
+    "Импорт долгов": _import,
+}
+
+
+def render():
+    st.title(TITLE)
+    section = st.radio("Раздел", list(SECTIONS), horizontal=True, key="debts_section", label_visibility="collapsed")
+    with profiling.span(f'section:{section}'):
+        SECTIONS[section]()
@@ -0,0 +1,148 @@
+import streamlit as st
+
+import data_store
+import profiling
+import zone_search
+from page_common import import_section, remember_row, save_row
+from pagination import paginated_view
+
+TITLE = "Управление доставками"
+
+
+# Раздел поиска зон доставки
+def _search():
+    df_delivery = data_store.load_table('delivery')
+    st.header("Поиск зон доставки")
+
+    # Компонент тегов нужен только здесь, поэтому импортируется при открытии раздела
+    from streamlit_tags import st_tags
+
+    # Поисковый индекс строится один раз на версию таблицы зон
+    options = zone_search.get_index().suggestions
+    query = st_tags(
+        label='Введите адрес или зону',
+        text='Press enter to add more',
+        value='',
+        suggestions=options,
+        maxtags=1,
+        key='search_zone'
+    )
+
+    if query:
+        query = query[0]
+        matching_results = zone_search.search_zones(df_delivery, query)
+        if not matching_results.empty:
+            st.dataframe(matching_results, use_container_width=True)
+
+            selected_index = st.selectbox("Выберите строку для отображения деталей", matching_results.index)
+            selected_row = matching_results.loc[selected_index]
+            st.markdown(f"**Зона:** {selected_row['Название зоны']}")
+            st.markdown(f"**ID зоны:** {selected_row['ID зоны']}")
+            st.markdown(f"<b>ГАЗель:</b> {selected_row['Стоимость доставки ГАЗель']}", unsafe_allow_html=True)
+            st.markdown(f"<b>Валдай/ ГАЗон, ЗиЛ:</b> {selected_row['Стоимость доставки Валдай/ ГАЗон, ЗиЛ']}", unsafe_allow_html=True)
+            st.markdown(f"<b>КАМаз:</b> {selected_row['Стоимость доставки КАМаз']}", unsafe_allow_html=True)
+            st.markdown(f"**Расстояние от базы:** {selected_row['Ср. расстояние от базы (км)']} км")
+
+
+# Раздел добавления новой зоны
+def _add_zone():
+    st.header("Добавление новой зоны")
+
+    zone_name = st.text_input("Название зоны", "")
+    zone_id = st.text_input("ID зоны", "")
+    streets = st.text_input("Название улиц в зоне", "")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        gazel_cost = st.number_input("ГАЗель", key="gazel_cost")
+    with col2:
+        valday_cost = st.number_input("Валдай/ ГАЗон, ЗиЛ", key="valday_cost")
+    with col3:
+        kamaz_cost = st.number_input("КАМаз", key="kamaz_cost")
+
+    distance = st.number_input("Ср. расстояние от базы (км)", key="distance")
+
+    if st.button("Добавить зону"):
+        new_data = {
+            "Название зоны": zone_name,
+            "ID зоны": zone_id,
+            "Название улиц в зоне": streets,
+            "Стоимость доставки ГАЗель": gazel_cost,
+            "Стоимость доставки Валдай/ ГАЗон, ЗиЛ": valday_cost,
+            "Стоимость доставки КАМаз": kamaz_cost,
+            "Ср. расстояние от базы (км)": distance
+        }
+        data_store.insert_rows('delivery', [new_data])
+        st.rerun()  # Перезапуск приложения после добавления новой зоны
+
+
+# Раздел редактирования зон
+def _edit_zones():
+    df_delivery = data_store.load_table('delivery')
+    st.header("Редактирование зон")
+    selected_zone = st.selectbox("Выберите зону для редактирования", df_delivery['Название зоны'].unique(), key="edit_zone")
+    
+    if selected_zone:
+        zone_data = df_delivery[df_delivery['Название зоны'] == selected_zone].iloc[0]
+        remember_row("zone_edit", 'delivery', {'Название зоны': selected_zone})
+        
+        zone_name_edit = st.text_input("Название зоны", value=zone_data['Название зоны'], key="zone_name_edit")
+        zone_id_edit = st.text_input("ID зоны", value=zone_data['ID зоны'], key="zone_id_edit")
+        streets_edit = st.text_input("Название улиц в зоне", value=zone_data['Название улиц в зоне'], key="streets_edit")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            gazel_cost_edit = st.number_input("ГАЗель", value=zone_data['Стоимость доставки ГАЗель'], key="gazel_cost_edit")
+        with col2:
+            valday_cost_edit = st.number_input("Валдай/ ГАЗон, ЗиЛ", value=zone_data['Стоимость доставки Валдай/ ГАЗон, ЗиЛ'], key="valday_cost_edit")
+        with col3:
+            kamaz_cost_edit = st.number_input("КАМаз", value=zone_data['Стоимость доставки КАМаз'], key="kamaz_cost_edit")
+        distance_edit = st.number_input("Ср. расстояние от базы (км)", value=zone_data['Ср. расстояние от базы (км)'], key="distance_edit")
+
+        if st.button("Сохранить изменения") and save_row("zone_edit", {
+            'Название зоны': zone_name_edit,
+            'ID зоны': zone_id_edit,
+            'Название улиц в зоне': streets_edit,
+            'Стоимость доставки ГАЗель': gazel_cost_edit,
+            'Стоимость доставки Валдай/ ГАЗон, ЗиЛ': valday_cost_edit,
+            'Стоимость доставки КАМаз': kamaz_cost_edit,
+            'Ср. расстояние от базы (км)': distance_edit
+        }):
+            st.success("Данные успешно обновлены!")
+            st.rerun()
+
+    st.header("Удаление зоны")
+    selected_zone_del = st.selectbox("Выберите зону для удаления", df_delivery['Название зоны'].unique(), key="del_zone")
+    remember_row("zone_delete", 'delivery', {'Название зоны': selected_zone_del})
+    if st.button("Удалить зону") and save_row("zone_delete", delete=True):
+        st.success(f"Зона '{selected_zone_del}' успешно удалена!")
+        st.rerun()
+
+
+# Раздел списка зон
+def _zone_list():
+    df_delivery = data_store.load_table('delivery')
+    st.header("Список зон доставки")
+    paginated_view(df_delivery, "zones_list")
+
+
+# Раздел "Импорт зон": загрузка из CSV/xlsx
+def _import():
+    import_section('delivery', "Импорт зон доставки")
+
+
+# Раздел выбирается переключателем: выполняется только он (st.tabs выполняет все вкладки сразу)
+SECTIONS = {
+    "Поиск": _search,
+    "Добавление зоны": _add_zone,
+    "Редактирование зон": _edit_zones,
+    "Список зон": _zone_list,
+    "Импорт зон": _import,
+}
+
+
+def render():
+    st.title(TITLE)
+    section = st.radio("Раздел", list(SECTIONS), horizontal=True, key="deliveries_section", label_visibility="collapsed")
+    with profiling.span(f'section:{section}'):
+        SECTIONS[section]()
@@ -0,0 +1,116 @@
+import streamlit as st
+
+import data_store
+import history_reports
+import profiling
+from pagination import paginated_view
+
+TITLE = "История операций"
+
+ALL = "Все"
+
+
+# Раздел "Последние операции"
+def _recent():
+    # Отображение последних операций: журнал читается потоково, без загрузки всей истории
+    total_operations = data_store.count_rows('history')
+    rows_to_show = st.number_input("Сколько последних операций показать", min_value=1, value=500, step=100, key="history_rows")
+    st.caption(f"Всего операций: {total_operations}")
+    paginated_view(data_store.tail_table('history', int(rows_to_show)), "history")
+
+
+# Период из поля выбора дат (пока выбрана одна дата — только начало)
+def _period(key, first, last):
+    value = st.date_input("Период", value=(first.date(), last.date()), key=key)
+    if isinstance(value, (list, tuple)):
+        return (value[0] if len(value) > 0 else None), (value[1] if len(value) > 1 else None)
+    return value, value
+
+
+# Раздел "Поиск операций": запрос по индексу истории и выгрузка того же отбора
+def _search():
+    index = history_reports.get_index()
+    first, last = index.date_range()
+    if first is None:
+        st.info("В истории нет операций")
+        return
+
+    col_period, col_client, col_operation = st.columns([2, 2, 1])
+    with col_period:
+        start, end = _period("history_search_period", first, last)
+    with col_client:
+        client = st.selectbox("Клиент", [ALL] + index.clients, key="history_search_client")
+    with col_operation:
+        operation = st.selectbox("Операция", [ALL] + history_reports.OPERATIONS, key="history_search_operation")
+
+    filters = {'start': start, 'end': end,
+               'client': None if client == ALL else client,
+               'operation': None if operation == ALL else operation}
+    with profiling.span('query:history', **filters):
+        found = index.query(**filters)
+    st.caption(f"Найдено операций: {len(found)}")
+    paginated_view(found, "history_search")
+
+    # Файл собирается по запросу: история читается порциями, без загрузки целиком
+    col_format, col_button = st.columns([1, 3])
+    with col_format:
+        fmt = st.selectbox("Формат", ['csv', 'xlsx'], key="history_export_format")
+    with col_button:
+        if st.button("Подготовить выгрузку", key="history_export"):
+            with profiling.span('export:history', fmt=fmt):
+                data, count = history_reports.export_bytes(fmt, **filters)
+            st.session_state["history_export_file"] = (filters, fmt, data, count)
+    # Подготовленный файл показывается, пока отбор и формат не изменились
+    prepared = st.session_state.get("history_export_file")
+    if prepared and prepared[:2] == (filters, fmt):
+        _, fmt, data, count = prepared
+        st.download_button(f"Скачать ({count} операций)", data, file_name=f"history.{fmt}",
+                           mime="text/csv" if fmt == 'csv' else
+                           "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                           key="history_download")
+
+
+# Раздел "Сводка": выдано и погашено по организациям или сотрудникам по дням/месяцам
+def _summary():
+    rollups = history_reports.get_rollups()
+    first, last = rollups.date_range()
+    if first is None:
+        st.info("В истории нет операций")
+        return
+
+    col_dimension, col_period, col_range = st.columns([1, 1, 2])
+    with col_dimension:
+        dimension = st.selectbox("Разрез", list(history_reports.DIMENSIONS), key="history_summary_dimension")
+    with col_period:
+        period = st.selectbox("Итоги", ["За период"] + list(history_reports.PERIODS), key="history_summary_period")
+    with col_range:
+        start, end = _period("history_summary_range", first, last)
+
+    with profiling.span('summary:history', dimension=dimension, period=period):
+        if period == "За период":
+            report = rollups.totals(dimension, start, end)
+        else:
+            report = rollups.report(dimension, history_reports.PERIODS[period], start, end)
+
+    col_issued, col_repaid, col_count = st.columns(3)
+    col_issued.metric("Выдано", f"{report['Выдано'].sum():,.2f}".replace(',', ' '))
+    col_repaid.metric("Погашено", f"{report['Погашено'].sum():,.2f}".replace(',', ' '))
+    col_count.metric("Операций", int(report['Операций'].sum()))
+
+    if period != "За период" and len(report):
+        st.bar_chart(report.groupby('Дата')[['Выдано', 'Погашено']].sum())
+    paginated_view(report, "history_summary")
+
+
+SECTIONS = {
+    "Последние операции": _recent,
+    "Поиск операций": _search,
+    "Сводка": _summary,
+}
+
+
+def render():
+    st.title(TITLE)
+    section = st.radio("Раздел", list(SECTIONS), horizontal=True, key="history_section", label_visibility="collapsed")
+    with profiling.span(f'section:{section}'):
+        SECTIONS[section]()
@@ -0,0 +1,265 @@
+from datetime import datetime
+
+import streamlit as st
+
+import assignments
+import data_store
+import dispatch
+import order_index
+import profiling
+from page_common import forget_rows, highlight_status, import_section, remember_row, save_row
+from pagination import page_controls, paginated_view
+
+TITLE = "Менеджер заказов доставки"
+
+
+# Раздел "Список заказов"
+def _order_list():
+    df_orders = data_store.load_table('orders')
+    st.header("Список заказов")
+    # Подсветка статусов применяется только к видимой странице
+    visible_orders = paginated_view(df_orders, "orders_list", style=lambda page: page.style.map(highlight_status, subset=['Статус']))
+
+    selected_order_index = st.selectbox("Выберите заказ для удаления", visible_orders.index, format_func=lambda x: df_orders.loc[x, "Номер заказа"])
+
+    if selected_order_index is not None:
+        selected_order = df_orders.loc[selected_order_index]
+
+        st.markdown(f"**Выбранный заказ:** {selected_order['Номер заказа']}")
+        st.markdown(f"**Статус:** {selected_order['Статус']}")
+        st.markdown(f"**Водитель:** {selected_order['Имя водителя']}")
+        remember_row("order_delete", 'orders', {'Номер заказа': selected_order['Номер заказа']})
+
+        # Кнопка для удаления заказа
+        if st.button("Удалить заказ") and save_row("order_delete", delete=True):
+            st.success(f"Заказ {selected_order['Номер заказа']} успешно удален.")
+            st.rerun()  # Перезапуск приложения для обновления данных
+
+
+# Раздел "Добавить новый заказ"
+def _add_order():
+    df_trucks = data_store.load_table('trucks')
+    st.header("Добавить новый заказ")
+
+    # Получаем список водителей из таблицы с машинами; без водителя заказ назначит распределение
+    driver_name = st.selectbox("Выберите водителя", [None] + list(df_trucks['Имя водителя'].unique()), key="driver_name",
+                               format_func=lambda name: "Не назначен (распределить автоматически)" if name is None else name)
+    active_driver_orders = order_index.get_index().active_orders(driver_name)
+    if active_driver_orders:
+        st.info(f"У водителя уже есть активные заказы: {', '.join(map(str, active_driver_orders))}")
+    order_number = st.text_input("Номер заказа", key="order_number")
+    order_address = st.text_input("Адрес доставки", key="order_address")
+    order_weight = st.number_input("Вес груза (т)", min_value=0.0, step=0.5, key="order_weight")
+    order_side_unloading = st.selectbox("Нужна боковая выгрузка", ["Нет", "Да"], key="order_side_unloading")
+    order_status = st.selectbox("Статус заказа", ["В ожидании", "В пути", "Выполнен", "Отменён"], key="order_status")
+    closed_by = st.text_input("Кто закрыл заказ (оператор)", key="closed_by_order")
+
+    if st.button("Добавить заказ"):
+        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        new_order = {
+            'Номер заказа': order_number,
+            'Время добавления': current_time,
+            'Статус': order_status,
+            'Имя водителя': driver_name,
+            'Кто закрыл заказ': closed_by,
+            'Выполненные заказы': 0,  # Изначально ноль, увеличиваем только по факту выполнения
+            'Адрес доставки': order_address,
+            'Вес груза (т)': order_weight,
+            'Боковая выгрузка': order_side_unloading,
+        }
+        data_store.insert_rows('orders', [new_order])
+        if driver_name is not None:
+            assignments.record(order_number, driver_name, order_status, closed_by)
+            # Обновляем статус машины
+            data_store.update_rows('trucks', {'Имя водителя': driver_name}, {'Статус авто': order_status})
+            forget_rows('trucks', {'Имя водителя': driver_name})
+        st.rerun()  # Перезапуск приложения после добавления нового заказа
+
+
+# Раздел "Редактировать заказ"
+def _edit_order():
+    df_orders = data_store.load_table('orders')
+    st.header("Редактировать заказ")
+    selected_order = st.selectbox("Выберите заказ", df_orders['Номер заказа'].unique(), key="selected_order")
+
+    if not selected_order:
+        st.warning("Выберите заказ для редактирования.")
+    else:
+        order_data = df_orders[df_orders['Номер заказа'] == selected_order]
+
+        if not order_data.empty:
+            current_status = order_data['Статус'].values[0]
+            try:
+                status_index = ["В ожидании", "В пути", "Выполнен", "Отменён"].index(current_status)
+            except ValueError:
+                status_index = 0
+
+            new_status = st.selectbox(
+                "Изменить статус", 
+                ["В ожидании", "В пути", "Выполнен", "Отменён"],
+                index=status_index,
+                key="new_status"
+            )
+            remember_row("order_edit", 'orders', {'Номер заказа': selected_order})
+
+            if st.button("Обновить статус заказа") and save_row(
+                    "order_edit", {'Статус': new_status},
+                    increments={'Выполненные заказы': 1} if new_status == "Выполнен" else None):
+                # Обновляем статус машины
+                driver_name = order_data['Имя водителя'].values[0]
+                assignments.record(selected_order, driver_name, new_status)
+                data_store.update_rows('trucks', {'Имя водителя': driver_name}, {'Статус авто': new_status})
+                forget_rows('trucks', {'Имя водителя': driver_name})
+                st.rerun()  # Перезапуск приложения после обновления заказа
+
+
+# Раздел "Машины"
+def _trucks():
+    df_trucks = data_store.load_table('trucks')
+    st.header("Список машин и их текущий статус")
+
+    # Индекс активных заказов по водителям: проверка без фильтрации всей таблицы заказов
+    driver_orders = order_index.get_index()
+    driver_assignments = assignments.get_index()
+
+    def can_change_status(driver_name):
+        return not driver_orders.is_busy(driver_name)
+
+    # Виджеты строятся только для машин на текущей странице
+    visible_trucks, trucks_caption = page_controls(df_trucks, "trucks_list", search_columns=['Имя водителя', 'Статус авто'],
+                                                   page_size=25, sortable=False)
+    st.caption(trucks_caption)
+
+    for index, row in visible_trucks.iterrows():
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(
+                f"<div style='font-size: 18px;'><strong>Водитель: {row['Имя водителя']}</strong></div>",
+                unsafe_allow_html=True
+            )
+            st.markdown(
+                f"<div style='font-size: 16px; {highlight_status(row['Статус авто'])}'>Текущий статус: {row['Статус авто']}</div>",
+                unsafe_allow_html=True
+            )
+            driver_stats = driver_assignments.driver_stats(row['Имя водителя'])
+            st.caption(f"Заказов: {driver_stats['Заказов']}, выполнено: {driver_stats['Выполнено']}")
+        with col2:
+            if can_change_status(row['Имя водителя']):
+                try:
+                    status_index = ["Свободен", "В пути", "На ремонте", "Занят"].index(row['Статус авто'])
+                except ValueError:
+                    status_index = 0
+
+                new_status = st.selectbox(
+                    "Изменить статус",
+                    ["Свободен", "В пути", "На ремонте", "Занят"],
+                    index=status_index,
+                    key=f"status_{index}"
+                )
+                remember_row(f"truck_{index}", 'trucks', {'Имя водителя': row['Имя водителя']})
+                if st.button(f"✔", key=f"save_status_{index}") and save_row(f"truck_{index}", {'Статус авто': new_status}):
+                    st.rerun()  # Перезапуск приложения после изменения статуса машины
+                    st.success(f"Статус для {row['Имя водителя']} обновлен")
+            else:
+                st.warning(f"Статус для {row['Имя водителя']} нельзя изменить, т.к. есть активные заказы")
+
+    st.header("Редактирование или удаление водителя")
+
+    # Выбор водителя для редактирования или удаления
+    selected_driver = st.selectbox("Выберите водителя для редактирования или удаления", df_trucks['Имя водителя'].unique(), key="selected_driver")
+
+    if selected_driver:
+        driver_data = df_trucks[df_trucks['Имя водителя'] == selected_driver].iloc[0]
+
+        with st.expander("История заказов водителя"):
+            st.dataframe(driver_assignments.driver_history(selected_driver), use_container_width=True)
+
+        # Поля для редактирования информации о водителе
+        new_driver_name = st.text_input("Имя водителя", value=driver_data['Имя водителя'], key="edit_driver_name")
+        new_capacity = st.number_input("Макс. грузоподъемность (тонн)", value=driver_data['Макс. грузоподъемность'], key="edit_capacity")
+        new_side_unloading = st.selectbox("Боковая выгрузка", ["Да", "Нет"], index=0 if driver_data['Боковая выгрузка'] == "Да" else 1, key="edit_side_unloading")
+        new_status = st.selectbox("Статус авто", ["Свободен", "В пути", "На ремонте", "Занят"], key="edit_status")
+        remember_row("driver_edit", 'trucks', {'Имя водителя': selected_driver})
+
+        # Кнопка для сохранения изменений водителя
+        if st.button("Сохранить изменения водителя") and save_row("driver_edit", {
+            'Имя водителя': new_driver_name,
+            'Макс. грузоподъемность': new_capacity,
+            'Боковая выгрузка': new_side_unloading,
+            'Статус авто': new_status
+        }):
+            st.success(f"Информация о водителе {selected_driver} успешно обновлена!")
+            st.rerun()
+
+        # Кнопка для удаления водителя
+        if st.button("Удалить водителя") and save_row("driver_edit", delete=True):
+            st.success(f"Водитель {selected_driver} успешно удалён!")
+            st.rerun()
+
+    st.header("Добавить новую машину")
+    
+    new_driver_name = st.text_input("Имя водителя", key="new_driver_name")
+    max_capacity = st.number_input("Макс. грузоподъемность (тонн)", min_value=0.0, key="new_capacity")
+    side_unloading = st.selectbox("Боковая выгрузка", ["Да", "Нет"], key="new_side_unloading")
+    initial_status = st.selectbox("Начальный статус", ["Свободен", "В пути", "На ремонте", "Занят"], key="new_initial_status")
+
+    if st.button("Добавить машину"):
+        new_truck = {
+            'Имя водителя': new_driver_name,
+            'Макс. грузоподъемность': max_capacity,
+            'Боковая выгрузка': side_unloading,
+            'Статус авто': initial_status
+        }
+        data_store.insert_rows('trucks', [new_truck])
+        st.rerun()  # Перезапуск приложения после добавления новой машины
+        st.success("Новая машина добавлена")
+
+
+# Раздел "Распределение": ожидающие заказы по свободным машинам с минимальной стоимостью
+def _dispatch():
+    df_orders = data_store.load_table('orders')
+    df_trucks = data_store.load_table('trucks')
+    st.header("Автоматическое распределение заказов")
+    trips = st.number_input("Заказов на одну машину", min_value=1, max_value=10, value=1, key="dispatch_trips")
+
+    if st.button("Рассчитать распределение"):
+        st.session_state["dispatch_plan"] = dispatch.build_plan(df_orders, df_trucks, trips=int(trips))
+
+    plan = st.session_state.get("dispatch_plan")
+    if plan is not None:
+        st.dataframe(plan.assignments, use_container_width=True)
+        st.caption(f"Назначений: {len(plan.assignments)}, суммарная стоимость: {plan.total_cost:,.0f}")
+        if len(plan.unassigned):
+            st.subheader("Заказы без машины")
+            st.dataframe(plan.unassigned, use_container_width=True)
+        dispatcher = st.text_input("Кто распределил", key="dispatch_by")
+        if len(plan.assignments) and st.button("Применить распределение"):
+            conflicts = dispatch.apply_plan(st.session_state.pop("dispatch_plan"), dispatcher)
+            forget_rows('orders')
+            forget_rows('trucks')
+            if conflicts:
+                st.warning(f"Заказы изменены другим пользователем, пропущены: {', '.join(map(str, conflicts))}")
+            else:
+                st.rerun()
+
+
+# Раздел "Импорт заказов": загрузка из CSV/xlsx
+def _import():
+    import_section('orders', "Импорт заказов")
+
+
+SECTIONS = {
+    "Список заказов": _order_list,
+    "Добавить новый заказ": _add_order,
+    "Редактировать заказ": _edit_order,
+    "Машины": _trucks,
+    "Распределение": _dispatch,
+    "Импорт заказов": _import,
+}
+
+
+def render():
+    st.title(TITLE)
+    section = st.radio("Раздел", list(SECTIONS), horizontal=True, key="orders_section", label_visibility="collapsed")
+    with profiling.span(f'section:{section}'):
+        SECTIONS[section]()
@@ -0,0 +1,77 @@
+import math
+
+import pandas as pd
+import streamlit as st
+
+import profiling
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+# Фильтр по подстроке сразу во всех (или выбранных) столбцах, без построчного apply
+def filter_rows(df, query, columns=None):
+    if not query:
+        return df
+    columns = columns or list(df.columns)
+    mask = pd.Series(False, index=df.index)
+    for column in columns:
+        mask |= df[column].astype(str).str.contains(query, case=False, regex=False, na=False)
+    return df[mask]
+
+
+# Сортировка по столбцу (пустые значения — в конце)
+def sort_rows(df, column=None, ascending=True):
+    if not column or column not in df.columns:
+        return df
+    return df.sort_values(column, ascending=ascending, na_position='last', kind='stable')
+
+
+# Срез одной страницы; номер страницы приводится к допустимому диапазону
+def paginate(df, page, page_size):
+    pages = max(math.ceil(len(df) / page_size), 1)
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size], page, pages
+
+
+# Фильтр, сортировка и выбор страницы. Возвращает видимую страницу и подпись к ней.
+def page_controls(df, key, search_columns=None, page_size=50, sortable=True):
+    col_filter, col_sort, col_order, col_size = st.columns([3, 2, 1, 1])
+    with col_filter:
+        query = st.text_input("Фильтр", key=f"{key}_filter")
+    sort_column, ascending = None, True
+    if sortable:
+        with col_sort:
+            sort_column = st.selectbox("Сортировка", [None] + list(df.columns), key=f"{key}_sort",
+                                       format_func=lambda c: "—" if c is None else c)
+        with col_order:
+            ascending = st.selectbox("Порядок", ["↑", "↓"], key=f"{key}_order") == "↑"
+    with col_size:
+        size = st.selectbox("Строк", PAGE_SIZES, index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+                            key=f"{key}_size")
+
+    with profiling.span(f'filter:{key}', rows=len(df)):
+        view = sort_rows(filter_rows(df, query, search_columns), sort_column, ascending)
+    pages = max(math.ceil(len(view) / size), 1)
+    # После фильтрации страниц может стать меньше, чем выбранный номер
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = st.number_input(f"Страница (всего {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    visible, page, pages = paginate(view, page, size)
+
+    if len(view):
+        first = (page - 1) * size + 1
+        caption = f"Строки {first}–{first + len(visible) - 1} из {len(view)}"
+    else:
+        caption = "Нет строк"
+    return visible, caption
+
+
+# Таблица с фильтром, сортировкой и постраничным выводом: в браузер уходит только
+# видимая страница, стили (style) применяются только к ней
+def paginated_view(df, key, style=None, search_columns=None, page_size=50):
+    visible, caption = page_controls(df, key, search_columns, page_size)
+    with profiling.span(f'render:{key}', rows=len(visible)):
+        st.dataframe(style(visible) if style else visible, use_container_width=True)
+    st.caption(caption)
+    return visible
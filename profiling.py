@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+# Замеры включаются переменной окружения PRORAB_PROFILE=1; без неё span() ничего не делает
+ENABLED = os.environ.get('PRORAB_PROFILE', '') not in ('', '0')
+
+# Сколько последних перезапусков хранить в сессии для панели
+KEEP_RERUNS = int(os.environ.get('PRORAB_PROFILE_KEEP', 20))
+
+# Каждая сессия Streamlit выполняет скрипт в своём потоке: текущий перезапуск — поточный
+_local = threading.local()
+
+
+# Один перезапуск скрипта: интервалы (spans) в порядке начала, время — от старта перезапуска
+class Rerun:
+    def __init__(self, label=''):
+        self.label = label
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.open = []  # номера незавершённых интервалов (стек вложенности)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.origin
+
+    # Суммарное и собственное время (без вложенных интервалов) по названию интервала
+    def breakdown(self):
+        totals = defaultdict(lambda: [0, 0.0, 0.0])
+        children = defaultdict(float)
+        for span in self.spans:
+            if span['parent'] is not None:
+                children[span['parent']] += span['duration']
+        for index, span in enumerate(self.spans):
+            total = totals[span['name']]
+            total[0] += 1
+            total[1] += span['duration']
+            total[2] += span['duration'] - children[index]
+        return sorted(((name, count, total, own) for name, (count, total, own) in totals.items()),
+                      key=lambda item: -item[3])
+
+    def to_dict(self):
+        return {'label': self.label, 'started': self.started, 'duration': self.duration, 'spans': self.spans}
+
+
+# Начало перезапуска в текущем потоке; None, если замеры выключены
+def start_rerun(label=''):
+    if not ENABLED:
+        return None
+    _local.rerun = Rerun(label)
+    return _local.rerun
+
+
+def finish_rerun():
+    rerun = getattr(_local, 'rerun', None)
+    _local.rerun = None
+    if rerun is not None:
+        rerun.finish()
+    return rerun
+
+
+@contextmanager
+def _span(rerun, name, attrs):
+    span = {'name': name, 'start': time.perf_counter() - rerun.origin, 'duration': 0.0,
+            'depth': len(rerun.open), 'parent': rerun.open[-1] if rerun.open else None}
+    if attrs:
+        span['args'] = attrs
+    rerun.spans.append(span)
+    rerun.open.append(len(rerun.spans) - 1)
+    try:
+        yield
+    finally:
+        rerun.open.pop()
+        span['duration'] = time.perf_counter() - rerun.origin - span['start']
+
+
+# Замер участка кода: with span('load:orders', rows=100): ...
+def span(name, **attrs):
+    rerun = getattr(_local, 'rerun', None) if ENABLED else None
+    if rerun is None:
+        return nullcontext()
+    return _span(rerun, name, attrs)
+
+
+# Экспорт в JSON: список перезапусков с интервалами
+def to_json(reruns):
+    return json.dumps([rerun.to_dict() for rerun in reruns], ensure_ascii=False, indent=2, default=str)
+
+
+# Экспорт в формат Chrome trace (chrome://tracing, Perfetto): события «X» в микросекундах
+def to_chrome_trace(reruns):
+    pid = os.getpid()
+    events = []
+    for number, rerun in enumerate(reruns):
+        base = rerun.started * 1e6
+        events.append({'name': f"rerun: {rerun.label}", 'ph': 'X', 'pid': pid, 'tid': number,
+                       'ts': base, 'dur': (rerun.duration or 0) * 1e6})
+        for span in rerun.spans:
+            event = {'name': span['name'], 'ph': 'X', 'pid': pid, 'tid': number,
+                     'ts': base + span['start'] * 1e6, 'dur': span['duration'] * 1e6}
+            if 'args' in span:
+                event['args'] = {key: str(value) for key, value in span['args'].items()}
+            events.append(event)
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False)
+
+
+# Сохранение перезапуска в сессии (в том числе прерванного st.rerun после записи)
+def remember(rerun):
+    if rerun is None:
+        return
+    import streamlit as st
+
+    st.session_state.setdefault('profile_reruns', deque(maxlen=KEEP_RERUNS)).append(rerun)
+
+
+# Панель в боковом меню: разбивка последних перезапусков сессии и выгрузка замеров
+def render_panel():
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    reruns = st.session_state.get('profile_reruns')
+    if not reruns:
+        return
+
+    with st.sidebar.expander("Профилирование", expanded=False):
+        history = list(reversed(reruns))
+        st.dataframe(pd.DataFrame({
+            'Время': [time.strftime('%H:%M:%S', time.localtime(r.started)) for r in history],
+            'Страница': [r.label for r in history],
+            'мс': [round((r.duration or 0) * 1000, 1) for r in history],
+        }), hide_index=True, use_container_width=True)
+
+        chosen = st.selectbox("Перезапуск", range(len(history)), key="profile_rerun",
+                              format_func=lambda i: f"{time.strftime('%H:%M:%S', time.localtime(history[i].started))} "
+                                                    f"{history[i].label} ({(history[i].duration or 0) * 1000:.0f} мс)")
+        selected = history[chosen or 0]
+        rows = [(name, count, round(total * 1000, 1), round(own * 1000, 1))
+                for name, count, total, own in selected.breakdown()]
+        st.dataframe(pd.DataFrame(rows, columns=['Участок', 'Раз', 'Всего, мс', 'Собственное, мс']),
+                     hide_index=True, use_container_width=True)
+
+        st.download_button("Скачать JSON", to_json(reruns), file_name="prorab-profile.json",
+                           mime="application/json", key="profile_json")
+        st.download_button("Скачать Chrome trace", to_chrome_trace(reruns), file_name="prorab-trace.json",
+                           mime="application/json", key="profile_trace")
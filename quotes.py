@@ -0,0 +1,229 @@
+import argparse
+import json
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import zone_search
+
+# Классы машин по грузоподъёмности (т): верхняя граница класса и столбец цены в таблице зон
+TRUCK_CLASSES = [
+    ('ГАЗель', 3.5, 'Стоимость доставки ГАЗель'),
+    ('Валдай/ ГАЗон, ЗиЛ', 10.0, 'Стоимость доставки Валдай/ ГАЗон, ЗиЛ'),
+    ('КАМаз', np.inf, 'Стоимость доставки КАМаз'),
+]
+CLASS_LIMITS = np.array([limit for _, limit, _ in TRUCK_CLASSES])
+DISTANCE_COLUMN = 'Ср. расстояние от базы (км)'
+
+QUOTE_COLUMNS = ['Адрес', 'Вес груза (т)', 'Название зоны', 'ID зоны', 'Класс машины',
+                 'Стоимость доставки', DISTANCE_COLUMN, 'Подходящих машин']
+
+
+# Класс машины (номер в TRUCK_CLASSES) для массива весов или грузоподъёмностей
+def truck_class(weights):
+    classes = np.searchsorted(CLASS_LIMITS, np.asarray(weights, dtype=float), side='left')
+    return np.minimum(classes, len(TRUCK_CLASSES) - 1)
+
+
+# Таблица цен: матрица «зона × класс машины» и индекс поиска зоны по адресу
+class PriceTable:
+    def __init__(self, df):
+        self.index = zone_search.ZoneIndex(df)
+        self.positions = {label: position for position, label in enumerate(df.index)}
+        self.prices = np.column_stack([
+            pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float) if column in df
+            else np.full(len(df), np.nan)
+            for _, _, column in TRUCK_CLASSES
+        ]) if len(df) else np.empty((0, len(TRUCK_CLASSES)))
+        self.names = _column(df, 'Название зоны')
+        self.ids = _column(df, 'ID зоны')
+        self.distances = pd.to_numeric(df[DISTANCE_COLUMN], errors='coerce').to_numpy(dtype=float) \
+            if DISTANCE_COLUMN in df else np.full(len(df), np.nan)
+
+    # Позиция строки зоны для адреса или -1, если зона не найдена
+    def locate(self, address):
+        row_index = self.index.locate(address)
+        return -1 if row_index is None else self.positions[row_index]
+
+
+# Машины, отсортированные по грузоподъёмности: подходящие для веса ищутся бинарным поиском
+class Fleet:
+    def __init__(self, df):
+        capacity = pd.to_numeric(df['Макс. грузоподъемность'], errors='coerce') if 'Макс. грузоподъемность' in df \
+            else pd.Series(dtype=float)
+        known = capacity.notna()
+        order = np.argsort(capacity[known].to_numpy(dtype=float), kind='stable')
+        self.capacities = capacity[known].to_numpy(dtype=float)[order]
+        self.names = _column(df[known], 'Имя водителя')[order]
+        self.statuses = _column(df[known], 'Статус авто')[order]
+        self.classes = truck_class(self.capacities)
+
+    # Номер первой машины, которая поднимает заданный вес (для массива весов)
+    def first_eligible(self, weights):
+        return np.searchsorted(self.capacities, weights, side='left')
+
+    def eligible(self, weight):
+        start = int(self.first_eligible(weight))
+        return [{'Имя водителя': name, 'Макс. грузоподъемность': float(capacity), 'Статус авто': status}
+                for name, capacity, status in zip(self.names[start:], self.capacities[start:], self.statuses[start:])]
+
+
+def _column(df, column):
+    return df[column].to_numpy(dtype=object) if column in df else np.full(len(df), None, dtype=object)
+
+
+def get_prices():
+    return data_store.derived('delivery', 'prices', PriceTable)
+
+
+def get_fleet():
+    return data_store.derived('trucks', 'fleet', Fleet)
+
+
+# Расчёт для списка адресов и весов. Каждый уникальный адрес ищется один раз,
+# цены, классы машин и число подходящих машин считаются массивами numpy.
+def quote_batch(addresses, weights):
+    prices, fleet = get_prices(), get_fleet()
+    addresses = pd.Series(list(addresses), dtype=object)
+    weights = pd.to_numeric(pd.Series(list(weights)), errors='coerce').fillna(0).to_numpy(dtype=float)
+    if len(weights) != len(addresses):
+        raise ValueError("Количество адресов и весов не совпадает")
+
+    codes, unique = pd.factorize(addresses.fillna('').astype(str))
+    zone_of_unique = np.array([prices.locate(address) for address in unique], dtype=int)
+    zones = zone_of_unique[codes] if len(codes) else np.empty(0, dtype=int)
+    found = zones >= 0
+
+    # Класс машины: самая маленькая машина парка, которая поднимает груз;
+    # если такой машины нет — класс определяется только по весу
+    first = fleet.first_eligible(weights)
+    has_truck = first < len(fleet.capacities)
+    classes = truck_class(weights)
+    classes[has_truck] = fleet.classes[first[has_truck]]
+
+    price = np.full(len(zones), np.nan)
+    price[found] = prices.prices[zones[found], classes[found]]
+    distance = np.full(len(zones), np.nan)
+    distance[found] = prices.distances[zones[found]]
+    class_names = np.array([name for name, _, _ in TRUCK_CLASSES], dtype=object)
+
+    return pd.DataFrame({
+        'Адрес': addresses.to_numpy(),
+        'Вес груза (т)': weights,
+        'Название зоны': np.where(found, prices.names[np.maximum(zones, 0)], None) if len(zones) else [],
+        'ID зоны': np.where(found, prices.ids[np.maximum(zones, 0)], None) if len(zones) else [],
+        'Класс машины': class_names[classes],
+        'Стоимость доставки': price,
+        DISTANCE_COLUMN: distance,
+        'Подходящих машин': len(fleet.capacities) - first,
+    }, columns=QUOTE_COLUMNS)
+
+
+# Расчёт для одного адреса: то же, что в пакетном режиме, плюс список подходящих машин
+def quote(address, weight=0):
+    row = quote_batch([address], [weight]).iloc[0]
+    result = {column: _plain(row[column]) for column in QUOTE_COLUMNS}
+    result['Машины'] = get_fleet().eligible(float(row['Вес груза (т)']))
+    return result
+
+
+def _plain(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+# Чтение адресов для пакетного расчёта из csv/xlsx
+def read_addresses(path, address_column='Адрес', weight_column='Вес груза (т)'):
+    df = pd.read_excel(path) if path.lower().endswith(('.xlsx', '.xls')) else pd.read_csv(path)
+    if address_column not in df.columns:
+        raise ValueError(f"В файле нет столбца «{address_column}»")
+    weights = df[weight_column] if weight_column in df.columns else pd.Series(0, index=df.index)
+    return df[address_column], weights
+
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    # GET /quote?address=...&weight=... — один адрес
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/quote':
+            return self._reply(404, {'error': 'not found'})
+        params = parse_qs(url.query)
+        address = params.get('address', [''])[0]
+        if not address:
+            return self._reply(400, {'error': 'address is required'})
+        try:
+            weight = float(params.get('weight', ['0'])[0] or 0)
+        except ValueError:
+            return self._reply(400, {'error': 'weight must be a number'})
+        self._reply(200, quote(address, weight))
+
+    # POST /quote с телом [{"address": ..., "weight": ...}, ...] — пакетный расчёт
+    def do_POST(self):
+        if urlparse(self.path).path != '/quote':
+            return self._reply(404, {'error': 'not found'})
+        try:
+            items = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'[]')
+            addresses = [item.get('address', '') for item in items]
+            weights = [item.get('weight', 0) for item in items]
+        except (ValueError, AttributeError, TypeError):
+            return self._reply(400, {'error': 'expected a JSON list of {"address", "weight"}'})
+        result = quote_batch(addresses, weights)
+        self._reply(200, [{column: _plain(value) for column, value in row.items()}
+                          for row in result.to_dict('records')])
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), QuoteHandler)
+    print(f"Расчёт доставки: http://{host}:{port}/quote")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Расчёт стоимости доставки по адресу и весу груза")
+    parser.add_argument('address', nargs='?', help="адрес доставки")
+    parser.add_argument('--weight', type=float, default=0, help="вес груза, т")
+    parser.add_argument('--file', help="csv/xlsx со столбцами «Адрес» и «Вес груза (т)»")
+    parser.add_argument('--output', help="куда сохранить результат пакетного расчёта (csv/xlsx)")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="запустить HTTP-сервер")
+    parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.host)
+    elif args.file:
+        result = quote_batch(*read_addresses(args.file))
+        if args.output:
+            if args.output.lower().endswith('.xlsx'):
+                result.to_excel(args.output, index=False)
+            else:
+                result.to_csv(args.output, index=False)
+        else:
+            result.to_csv(sys.stdout, index=False)
+    elif args.address:
+        print(json.dumps(quote(args.address, args.weight), ensure_ascii=False, indent=2))
+    else:
+        parser.error("укажите адрес, --file или --serve")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import argparse
+
+import pandas as pd
+
+# Типы столбцов таблиц. Ключи (номера заказов и документов, ID и названия зон, водители
+# в таблице машин) — всегда текст, повторяющиеся значения (статусы, водители, организации) —
+# категории из текста, даты — datetime64, суммы, веса и расстояния — float. Таблица
+# приводится к этим типам при загрузке; столбец, который нельзя привести без потери
+# значений (например, в дате текст), остаётся как есть.
+TEXT = 'text'
+CATEGORY = 'category'
+DATETIME = 'datetime'
+FLOAT = 'float'
+
+SCHEMAS = {
+    'delivery': {
+        'Название зоны': TEXT,
+        'ID зоны': TEXT,
+        'Стоимость доставки ГАЗель': FLOAT,
+        'Стоимость доставки Валдай/ ГАЗон, ЗиЛ': FLOAT,
+        'Стоимость доставки КАМаз': FLOAT,
+        'Ср. расстояние от базы (км)': FLOAT,
+    },
+    'debts': {
+        'Клиент': CATEGORY,
+        'Организация': CATEGORY,
+        'Сумма долга': FLOAT,
+        'Номер документа': TEXT,
+        'Срок оплаты': DATETIME,
+        'Выдавший долг': CATEGORY,
+    },
+    'history': {
+        'Клиент': CATEGORY,
+        'Организация': CATEGORY,
+        'Операция': CATEGORY,
+        'Сумма': FLOAT,
+        'Дата операции': DATETIME,
+        'Кто выполнил операцию': CATEGORY,
+    },
+    'orders': {
+        'Номер заказа': TEXT,
+        'Время добавления': DATETIME,
+        'Статус': CATEGORY,
+        'Имя водителя': CATEGORY,
+        'Кто закрыл заказ': CATEGORY,
+        'Вес груза (т)': FLOAT,
+        'Боковая выгрузка': CATEGORY,
+    },
+    'trucks': {
+        'Имя водителя': TEXT,
+        'Макс. грузоподъемность': FLOAT,
+        'Боковая выгрузка': CATEGORY,
+        'Статус авто': CATEGORY,
+    },
+    'assignments': {
+        'Номер заказа': TEXT,
+        'Имя водителя': CATEGORY,
+        'Статус': CATEGORY,
+        'Время изменения': DATETIME,
+        'Кто изменил': CATEGORY,
+    },
+}
+
+# Категории выгодны, только если значения повторяются: различных значений не больше этой доли строк
+CATEGORY_RATIO = 0.5
+
+
+# Столбцы, которые читаются из файла текстом (иначе «007» прочитается как число 7)
+def text_columns(name):
+    return [column for column, kind in SCHEMAS.get(name, {}).items() if kind in (TEXT, CATEGORY)]
+
+
+# Значение ключа текстом: целые числа из xlsx (12.0) — без дробной части
+def _text_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# Столбец текстом (пропуски остаются пропусками)
+def to_text(values):
+    if isinstance(values.dtype, pd.StringDtype):
+        return values
+    return values.map(_text_value, na_action='ignore').astype('str')
+
+
+# Значения строки или условия (столбец -> значение) с ключами и категориями текстом,
+# чтобы номер 7 из формы совпадал с «7» в таблице на любом хранилище
+def text_values(name, values):
+    columns = text_columns(name)
+    return {column: _text_value(value) if column in columns and pd.api.types.is_scalar(value) and not pd.isna(value) else value
+            for column, value in values.items()}
+
+
+# Даты: сначала ISO (2024-05-01), остальные — как принято у нас, день первым (01.05.2024)
+def parse_dates(values):
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    rest = parsed.isna() & values.notna()
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], errors='coerce', dayfirst=True, format='mixed')
+    return parsed
+
+
+# Пустые значения: пропуски и строки из одних пробелов
+def _empty(values):
+    empty = values.isna()
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        empty |= values.map(lambda value: isinstance(value, str) and not value.strip(), na_action='ignore').fillna(False)
+    return empty.astype(bool)
+
+
+def _to_category(values):
+    present = values.dropna()
+    if present.empty or present.nunique() > len(present) * CATEGORY_RATIO:
+        return None
+    return to_text(values).astype('category')
+
+
+def _to_datetime(values):
+    parsed = parse_dates(values)
+    return None if (parsed.isna() & ~_empty(values)).any() else parsed
+
+
+def _to_float(values):
+    parsed = pd.to_numeric(values.where(~_empty(values)), errors='coerce')
+    return None if (parsed.isna() & ~_empty(values)).any() else parsed.astype(float)
+
+
+_CONVERTERS = {TEXT: to_text, CATEGORY: _to_category, DATETIME: _to_datetime, FLOAT: _to_float}
+
+_CHECKS = {
+    TEXT: lambda values: isinstance(values.dtype, pd.StringDtype),
+    CATEGORY: lambda values: isinstance(values.dtype, pd.CategoricalDtype),
+    DATETIME: lambda values: pd.api.types.is_datetime64_any_dtype(values.dtype),
+    FLOAT: lambda values: pd.api.types.is_float_dtype(values.dtype),
+}
+
+
+# Приведение таблицы к схеме. Уже приведённые столбцы не трогаются, поэтому повторный
+# вызов для типизированной таблицы почти бесплатный.
+def coerce(name, df):
+    converted = {}
+    for column, kind in SCHEMAS.get(name, {}).items():
+        if column in df.columns and not _CHECKS[kind](df[column]):
+            values = _CONVERTERS[kind](df[column])
+            if values is not None:
+                converted[column] = values
+    return df.assign(**converted) if converted else df
+
+
+# Столбцы схемы, которые остались без типа (значения не приводятся без потерь или не повторяются)
+def untyped(name, df):
+    return [column for column, kind in SCHEMAS.get(name, {}).items()
+            if column in df.columns and not _CHECKS[kind](df[column])]
+
+
+# Добавление строк к приведённой таблице. Новые значения дописываются в категории,
+# поэтому столбцы остаются категориями без пересчёта всей таблицы.
+def concat(name, df, rows):
+    rows = coerce(name, rows)
+    for column in df.columns:
+        if column not in rows.columns or not isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        values = to_text(rows[column])
+        categories = df[column].cat.categories
+        new = [value for value in pd.unique(values.dropna()) if value not in categories]
+        if new:
+            df = df.assign(**{column: df[column].cat.add_categories(new)})
+        rows = rows.assign(**{column: pd.Categorical(values, categories=df[column].cat.categories)})
+    return pd.concat([df, rows], ignore_index=True)
+
+
+# Значение для записи в приведённый столбец df: ключ и категория — текстом (новая
+# категория добавляется в столбец), дата из текста или date разбирается
+def cast(df, column, value):
+    if column not in df.columns or pd.api.types.is_list_like(value) or pd.isna(value):
+        return value
+    dtype = df[column].dtype
+    if isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype)):
+        value = _text_value(value)
+    if isinstance(dtype, pd.CategoricalDtype) and value not in dtype.categories:
+        df[column] = df[column].cat.add_categories([value])
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        parsed = parse_dates(pd.Series([value], dtype=object))[0]
+        if not pd.isna(parsed):
+            return parsed
+    return value
+
+
+# Память таблиц до и после приведения: tables — имя -> таблица в том виде, как прочитана
+def memory_report(tables):
+    rows = []
+    for name, raw in tables.items():
+        typed = coerce(name, raw)
+        before = raw.memory_usage(deep=True).sum()
+        after = typed.memory_usage(deep=True).sum()
+        rows.append({
+            'Таблица': name,
+            'Строк': len(raw),
+            'До, МБ': before / 2 ** 20,
+            'После, МБ': after / 2 ** 20,
+            'Экономия, %': (1 - after / before) * 100 if before else 0.0,
+            'Без типа': ', '.join(untyped(name, typed)),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экономия памяти от приведения таблиц к схеме")
+    parser.add_argument('tables', nargs='*', help="таблицы (по умолчанию все)")
+    args = parser.parse_args(argv)
+
+    import data_store
+
+    names = args.tables or list(data_store.TABLES)
+    report = memory_report({name: data_store.backend.read(name) for name in names})
+    print(report.to_string(index=False, float_format=lambda value: f'{value:.2f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 @echo off
+rem Для хранения данных в SQLite вместо xlsx (после "py storage.py migrate"):
+rem set PRORAB_STORAGE=sqlite
+rem Замеры времени каждого перезапуска (панель «Профилирование» в боковом меню):
+rem set PRORAB_PROFILE=1
 start "" "http://localhost:8501"
 start /B py -m streamlit run app.py
 timeout /t 5 > nul  # Ждём 5 секунд для запуска Streamlit
@@ -0,0 +1,369 @@
+import argparse
+import datetime as dt
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+import schema
+import xlsx_patch
+from history_log import AppendJournal
+from locking import LockTimeout, remove_file, replace_file, table_lock, temp_path
+
+# Столбцы с датами, которые в SQLite хранятся текстом ISO и разбираются при чтении
+DATE_COLUMNS = {
+    'debts': ['Срок оплаты'],
+    'history': ['Дата операции'],
+}
+
+
+# Хранилище в виде xlsx-файлов: таблица читается целиком, изменения строк вносятся
+# в ячейки существующего файла (patch), в таблицы с журналом (journals) строки дописываются
+class XlsxBackend:
+    name = 'xlsx'
+    row_level = False
+
+    def __init__(self, base_dir, tables, journals=None):
+        self.base_dir = base_dir
+        self.tables = tables
+        self.journals = {
+            name: AppendJournal(self.path(name), os.path.join(base_dir, journal_file),
+                                tables[name][1], DATE_COLUMNS.get(name, ()))
+            for name, journal_file in (journals or {}).items()
+        }
+
+    # Путь к файлу таблицы
+    def path(self, name):
+        return os.path.join(self.base_dir, self.tables[name][0])
+
+    # Подпись файла (время изменения и размер); None, если файла нет
+    def signature(self, name):
+        if name in self.journals:
+            return self.journals[name].signature()
+        try:
+            stat = os.stat(self.path(name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read(self, name):
+        if name in self.journals:
+            return self.journals[name].read()
+        path = self.path(name)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=self.tables[name][1])
+        # Ключи и категории читаются текстом, чтобы «007» не превратилось в 7
+        df = pd.read_excel(path, dtype={column: str for column in schema.text_columns(name)})
+        # Исправление названий столбцов с переносами строк
+        df.columns = df.columns.str.replace('\n', ' ')
+        return df
+
+    def write(self, name, df):
+        if name in self.journals:
+            self.journals[name].write(df)
+            return
+        # Запись во временный файл и подмена: читатели без блокировки не видят полузаписанный файл
+        path = self.path(name)
+        tmp_path = temp_path(path)
+        try:
+            df.to_excel(tmp_path, index=False, engine='openpyxl')
+            replace_file(tmp_path, path)
+        finally:
+            remove_file(tmp_path)
+
+    # Дописывать строки без перезаписи можно только в таблицы с журналом
+    def can_append(self, name):
+        return name in self.journals
+
+    # Точечно изменить можно уже существующий файл (журналы ведутся отдельно)
+    def can_patch(self, name):
+        return name not in self.journals and os.path.exists(self.path(name))
+
+    # Изменение строк существующего файла без перезаписи всей таблицы (см. xlsx_patch).
+    # changes — операции по порядку, номера строк данных считаются с 0 на момент операции:
+    #   ('update', [(номер строки, {столбец: значение}), ...])
+    #   ('delete', [номера строк])
+    #   ('append', [{столбец: значение}, ...])
+    # False — лист в неподдерживаемом виде, таблицу нужно записать целиком.
+    def patch(self, name, changes):
+        try:
+            xlsx_patch.patch_file(self.path(name), changes)
+        except xlsx_patch.Unpatchable:
+            return False
+        return True
+
+    def insert_rows(self, name, rows):
+        self.journals[name].append(rows)
+
+    # Журнал, который пора перенести в снимок
+    def compact_due(self, name):
+        return name in self.journals and self.journals[name].compact_due()
+
+    # Перенос журнала в снимок; lock — функция, возвращающая блокировку таблицы,
+    # exclusive — блокировку на весь перенос (общую для процессов)
+    def compact(self, name, lock, exclusive):
+        return self.journals[name].compact(lock, exclusive)
+
+    # Последние n строк таблицы; для журнала — без чтения всей истории в память
+    def tail(self, name, n):
+        if name in self.journals:
+            return self.journals[name].tail(n)
+        return self.read(name).tail(n)
+
+    # Количество строк таблицы
+    def count(self, name):
+        if name in self.journals:
+            return self.journals[name].count()
+        return len(self.read(name))
+
+    # Потоковое чтение таблицы порциями
+    def iter_chunks(self, name, chunksize=10000):
+        if name in self.journals:
+            yield from self.journals[name].iter_chunks(chunksize)
+            return
+        df = self.read(name)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+
+# Встроенная база SQLite (режим WAL): изменения отдельных строк без перезаписи таблицы
+class SqliteBackend:
+    name = 'sqlite'
+    row_level = True
+
+    def __init__(self, db_path, tables):
+        self.db_path = db_path
+        self.tables = tables
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # Отдельное соединение на каждый поток Streamlit
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._init_lock:
+                if not self._initialized:
+                    self._create_schema(conn)
+                    self._initialized = True
+        return conn
+
+    def _create_schema(self, conn):
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS _meta (name TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            for name, (_, columns) in self.tables.items():
+                cols = ', '.join(_quote(c) for c in columns)
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {_quote(name)} ({cols})')
+
+    # Счётчик изменений таблицы, увеличивается в той же транзакции, что и запись
+    def signature(self, name):
+        row = self.connection().execute('SELECT version FROM _meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump(self, conn, name):
+        conn.execute('INSERT INTO _meta (name, version) VALUES (?, 1) '
+                     'ON CONFLICT(name) DO UPDATE SET version = version + 1', (name,))
+
+    def _columns(self, conn, name):
+        return [row[1] for row in conn.execute(f'PRAGMA table_info({_quote(name)})')]
+
+    # Добавление недостающих столбцов (например, при импорте xlsx с новыми колонками)
+    def _ensure_columns(self, conn, name, columns):
+        existing = set(self._columns(conn, name))
+        for column in columns:
+            if column not in existing:
+                conn.execute(f'ALTER TABLE {_quote(name)} ADD COLUMN {_quote(column)}')
+
+    def read(self, name):
+        conn = self.connection()
+        df = pd.read_sql_query(f'SELECT * FROM {_quote(name)} ORDER BY rowid', conn)
+        return self._parse_dates(name, df)
+
+    # Даты хранятся текстом в разном виде (дата из формы — без времени), поэтому
+    # формат разбирается для каждого значения, а не угадывается по первому
+    def _parse_dates(self, name, df):
+        for column in DATE_COLUMNS.get(name, []):
+            if column in df.columns:
+                df[column] = schema.parse_dates(df[column])
+        return df
+
+    def write(self, name, df):
+        conn = self.connection()
+        with conn:
+            self._ensure_columns(conn, name, df.columns)
+            conn.execute(f'DELETE FROM {_quote(name)}')
+            self._insert(conn, name, df.to_dict('records'))
+            self._bump(conn, name)
+
+    def _insert(self, conn, name, rows):
+        if not rows:
+            return
+        columns = list(dict.fromkeys(c for row in rows for c in row))
+        self._ensure_columns(conn, name, columns)
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f'INSERT INTO {_quote(name)} ({", ".join(_quote(c) for c in columns)}) VALUES ({placeholders})'
+        conn.executemany(sql, [[_to_sql(row.get(c)) for c in columns] for row in rows])
+
+    def can_append(self, name):
+        return True
+
+    # Журналов нет — переносить нечего
+    def compact_due(self, name):
+        return False
+
+    # Строки меняются запросами, точечная запись файла не нужна
+    def can_patch(self, name):
+        return False
+
+    def tail(self, name, n):
+        conn = self.connection()
+        df = pd.read_sql_query(f'SELECT * FROM (SELECT rowid AS _rowid, * FROM {_quote(name)} '
+                               f'ORDER BY rowid DESC LIMIT ?) ORDER BY _rowid', conn, params=(int(n),))
+        return self._parse_dates(name, df.drop(columns='_rowid'))
+
+    def count(self, name):
+        return self.connection().execute(f'SELECT COUNT(*) FROM {_quote(name)}').fetchone()[0]
+
+    def iter_chunks(self, name, chunksize=10000):
+        conn = self.connection()
+        for df in pd.read_sql_query(f'SELECT * FROM {_quote(name)} ORDER BY rowid', conn, chunksize=chunksize):
+            yield self._parse_dates(name, df)
+
+    def insert_rows(self, name, rows):
+        conn = self.connection()
+        with conn:
+            self._insert(conn, name, rows)
+            self._bump(conn, name)
+
+    # values — новые значения столбцов, increments — прибавка к текущим значениям
+    def update_rows(self, name, where, values=None, increments=None):
+        assignments, params = [], []
+        for column, value in (values or {}).items():
+            assignments.append(f'{_quote(column)} = ?')
+            params.append(_to_sql(value))
+        for column, delta in (increments or {}).items():
+            assignments.append(f'{_quote(column)} = COALESCE({_quote(column)}, 0) + ?')
+            params.append(_to_sql(delta))
+        if not assignments:
+            return 0
+        condition, where_params = _where(where)
+        conn = self.connection()
+        with conn:
+            self._ensure_columns(conn, name, list(values or {}) + list(increments or {}))
+            cursor = conn.execute(f'UPDATE {_quote(name)} SET {", ".join(assignments)} WHERE {condition}',
+                                  params + where_params)
+            self._bump(conn, name)
+        return cursor.rowcount
+
+    def delete_rows(self, name, where):
+        condition, params = _where(where)
+        conn = self.connection()
+        with conn:
+            cursor = conn.execute(f'DELETE FROM {_quote(name)} WHERE {condition}', params)
+            self._bump(conn, name)
+        return cursor.rowcount
+
+
+def _quote(identifier):
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _where(where):
+    parts, params = [], []
+    for column, value in where.items():
+        if _is_missing(value):
+            parts.append(f'{_quote(column)} IS NULL')
+        else:
+            parts.append(f'{_quote(column)} = ?')
+            params.append(_to_sql(value))
+    return ' AND '.join(parts) or '1', params
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT
+
+
+# Приведение значений pandas/numpy к типам, которые понимает sqlite3
+def _to_sql(value):
+    if _is_missing(value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (pd.Timestamp, dt.datetime)):
+        return value.isoformat(sep=' ')
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    return value
+
+
+# Блокировка переноса журнала в снимок: не ждёт — если перенос уже идёт в другом
+# процессе или потоке, второй не нужен (LockTimeout)
+def compaction_lock(lock_dir, name):
+    return table_lock(lock_dir, f'{name}.compact', timeout=0)
+
+
+# Создание хранилища по переменным окружения PRORAB_STORAGE и PRORAB_DB
+def get_backend(base_dir, tables, journals=None):
+    kind = os.environ.get('PRORAB_STORAGE', 'xlsx').lower()
+    if kind == 'sqlite':
+        db_path = os.environ.get('PRORAB_DB', os.path.join(base_dir, 'prorab.db'))
+        return SqliteBackend(db_path, tables)
+    if kind == 'xlsx':
+        return XlsxBackend(base_dir, tables, journals)
+    raise ValueError(f"Неизвестный тип хранилища: {kind}")
+
+
+# Однократный перенос данных из xlsx-файлов в SQLite
+def migrate(base_dir, tables, db_path, journals=None):
+    source = XlsxBackend(base_dir, tables, journals)
+    target = SqliteBackend(db_path, tables)
+    for name in tables:
+        df = source.read(name)
+        target.write(name, df)
+        print(f"{name}: перенесено строк — {len(df)}")
+
+
+# Выгрузка таблиц из SQLite обратно в xlsx
+def export(base_dir, tables, db_path, out_dir, journals=None):
+    source = SqliteBackend(db_path, tables)
+    target = XlsxBackend(out_dir, tables, journals)
+    os.makedirs(out_dir, exist_ok=True)
+    for name in tables:
+        df = source.read(name)
+        target.write(name, df)
+        print(f"{name}: выгружено строк — {len(df)} -> {target.path(name)}")
+
+
+def main(argv=None):
+    from data_store import DATA_DIR, JOURNALS, LOCK_DIR, TABLES
+
+    parser = argparse.ArgumentParser(description="Перенос данных между xlsx и SQLite")
+    parser.add_argument('command', choices=['migrate', 'export', 'compact'])
+    parser.add_argument('--db', default=os.environ.get('PRORAB_DB', os.path.join(DATA_DIR, 'prorab.db')))
+    parser.add_argument('--out', default=DATA_DIR, help="Папка для выгрузки xlsx")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        migrate(DATA_DIR, TABLES, args.db, JOURNALS)
+    elif args.command == 'export':
+        export(DATA_DIR, TABLES, args.db, args.out, JOURNALS)
+    else:
+        # Перенос журналов в снимки xlsx
+        for name, journal in XlsxBackend(DATA_DIR, TABLES, JOURNALS).journals.items():
+            try:
+                done = journal.compact(lambda name=name: table_lock(LOCK_DIR, name),
+                                       lambda name=name: compaction_lock(LOCK_DIR, name))
+            except LockTimeout:
+                done = False
+            print(f"{name}: журнал перенесён в {journal.snapshot_path}" if done
+                  else f"{name}: перенос пропущен (таблица занята или журнал уже переносится)")
+
+
+if __name__ == '__main__':
+    main()
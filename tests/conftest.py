@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# data_store на пустом хранилище во временной папке; тест запускается для xlsx и SQLite
+@pytest.fixture(params=['xlsx', 'sqlite'])
+def store(request, tmp_path, monkeypatch):
+    import data_store
+    import storage
+
+    if request.param == 'sqlite':
+        backend = storage.SqliteBackend(str(tmp_path / 'prorab.db'), data_store.TABLES)
+    else:
+        backend = storage.XlsxBackend(str(tmp_path), data_store.TABLES, data_store.JOURNALS)
+    monkeypatch.setattr(data_store, 'backend', backend)
+    monkeypatch.setattr(data_store, 'LOCK_DIR', str(tmp_path / '.locks'))
+    data_store.invalidate()
+    yield data_store
+    data_store.invalidate()
@@ -0,0 +1,143 @@
+# Массовый импорт (bulk_import): разбор CSV/xlsx, поиск дублей по ключу, отклонённые строки.
+# Запуск: python -m pytest tests
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import bulk_import
+
+ZONE_HEADER = ['Название зоны', 'ID зоны', 'Название улиц в зоне', 'Стоимость доставки ГАЗель',
+               'Стоимость доставки Валдай/ ГАЗон, ЗиЛ', 'Стоимость доставки КАМаз', 'Ср. расстояние от базы (км)']
+
+
+def _csv(rows, sep=';', encoding='cp1251'):
+    text = '\r\n'.join(sep.join(str(value) for value in row) for row in rows) + '\r\n'
+    return io.BytesIO(text.encode(encoding))
+
+
+def _xlsx(rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    f = io.BytesIO()
+    wb.save(f)
+    return f
+
+
+def _reasons(result):
+    return dict(zip(result.errors['Строка'], result.errors['Причина']))
+
+
+# CSV из русского Excel: Windows-1251, «;», десятичная запятая и пробел между разрядами
+@pytest.mark.parametrize('encoding', ['cp1251', 'utf-8-sig'])
+def test_csv_russian_excel(store, encoding):
+    source = _csv([
+        ZONE_HEADER,
+        ['Центр', '007', 'ул. Ленина, ул. Мира', '1 200,50', '2000', '3000', '5,5'],
+        ['Заречье', '12', 'ул. Речная', '', '', '', ''],
+    ], encoding=encoding)
+    result = bulk_import.import_file('delivery', source, 'zones.csv')
+    assert (result.read, result.imported, result.duplicates) == (2, 2, 0) and result.errors.empty
+    df = store.load_table('delivery')
+    assert df['ID зоны'].tolist() == ['007', '12']
+    assert df['Название улиц в зоне'].iloc[0] == 'ул. Ленина, ул. Мира'
+    assert df['Стоимость доставки ГАЗель'].tolist() == [1200.5, 0.0]
+    assert df['Ср. расстояние от базы (км)'].iloc[0] == 5.5
+
+
+@pytest.mark.parametrize('sep', [',', '\t'])
+def test_csv_other_separators(store, sep):
+    source = _csv([['Название зоны', 'ID зоны'], ['Центр', '1']], sep=sep, encoding='utf-8')
+    assert bulk_import.import_file('delivery', source, 'zones.csv').imported == 1
+
+
+# Ключи из xlsx (число 12.0) и из таблицы («12», «007») совпадают при повторном импорте
+def test_reimport_matches_keys(store):
+    bulk_import.import_file('delivery', _csv([['Название зоны', 'ID зоны'], ['Центр', '007'], ['Заречье', '12']]),
+                            'zones.csv')
+    store.invalidate()
+    source = _xlsx([['Название зоны', 'ID зоны'], ['Центр', '007'], ['Заречье', 12.0], ['Север', 7], ['Юг', 13.0]])
+    result = bulk_import.import_file('delivery', source, 'zones.xlsx')
+    assert (result.read, result.imported, result.duplicates) == (4, 2, 2)
+    assert _reasons(result) == {2: "уже есть в таблице", 3: "уже есть в таблице"}
+    assert store.load_table('delivery')['ID зоны'].tolist() == ['007', '12', '7', '13']
+
+
+# Повтор ключа в файле находится и между порциями чтения; принимается первая строка.
+# CSV читается текстом, поэтому «2.0» — другой ключ, чем «2»
+@pytest.mark.parametrize('chunksize', [1, 2, bulk_import.CHUNK])
+def test_duplicates_in_file(store, chunksize):
+    source = _csv([['Название зоны', 'ID зоны'], ['А', '1'], ['Б', '2'], ['А2', '1'], ['Б2', '2.0'], ['В', '2']])
+    result = bulk_import.import_file('delivery', source, 'zones.csv', chunksize=chunksize)
+    assert (result.read, result.imported, result.duplicates) == (5, 3, 2)
+    assert _reasons(result) == {4: "повтор в файле", 6: "повтор в файле"}
+    assert store.load_table('delivery')['Название зоны'].tolist() == ['А', 'Б', 'Б2']
+
+
+def test_missing_required_columns(store):
+    with pytest.raises(ValueError, match='Номер документа, Срок оплаты'):
+        bulk_import.import_file('debts', _csv([['Клиент', 'Сумма долга'], ['Иванов', '100']]), 'debts.csv')
+    with pytest.raises(ValueError, match='ID зоны'):
+        bulk_import.import_file('delivery', _xlsx([['Название зоны']]), 'zones.xlsx')
+
+
+DEBT_HEADER = ['Клиент', 'Организация', 'Сумма долга', 'Номер документа', 'Срок оплаты', 'Выдавший долг']
+
+
+# Отклонённые строки — с номером строки файла и первой причиной; принятые долги попадают в историю
+def test_debts_rejections_and_history(store):
+    source = _csv([
+        DEBT_HEADER,
+        ['Иванов', 'ООО Ромашка', '1 500,00', 'Д-1', '15.05.2024', 'Петрова'],
+        ['Петров', '', 'сто', 'Д-2', '2024-05-01', ''],
+        ['Сидоров', '', '-5', 'Д-3', '2024-05-01', ''],
+        ['Смирнов', '', '100', 'Д-4', 'до пятницы', ''],
+        ['', '', '100', 'Д-5', '2024-05-01', ''],
+        ['Козлов', '', '200', 'Д-6', '2024-06-01', ''],
+    ])
+    result = bulk_import.import_file('debts', source, 'debts.csv', performed_by='импорт')
+    assert (result.read, result.imported, result.duplicates) == (6, 2, 0)
+    assert _reasons(result) == {
+        3: "не число: Сумма долга",
+        4: "отрицательное значение: Сумма долга",
+        5: "не дата: Срок оплаты",
+        6: "не заполнено: Клиент",
+    }
+    debts = store.load_table('debts')
+    assert debts['Номер документа'].tolist() == ['Д-1', 'Д-6']
+    assert debts['Сумма долга'].tolist() == [1500.0, 200.0]
+    assert debts['Срок оплаты'].iloc[0] == pd.Timestamp('2024-05-15')
+    history = store.load_table('history')
+    assert history['Кто выполнил операцию'].tolist() == ['Петрова', 'импорт']
+    assert history['Сумма'].tolist() == [1500.0, 200.0]
+
+
+def test_dry_run_writes_nothing(store):
+    source = _csv([DEBT_HEADER, ['Иванов', '', '100', 'Д-1', '2024-05-01', ''], ['Петров', '', 'сто', 'Д-2', '', '']])
+    result = bulk_import.import_file('debts', source, 'debts.csv', dry_run=True)
+    assert (result.read, result.imported, len(result.errors)) == (2, 1, 1)
+    assert store.load_table('debts').empty and store.load_table('history').empty
+
+
+# Заказы: значения по умолчанию, проверка статуса и водителя, назначения и статус машины
+def test_orders(store):
+    store.insert_rows('trucks', [{'Имя водителя': 'Иванов', 'Макс. грузоподъемность': 5.0,
+                                  'Боковая выгрузка': 'Да', 'Статус авто': 'Свободен'}])
+    source = _csv([
+        ['Номер заказа', 'Статус', 'Имя водителя', 'Адрес доставки', 'Вес груза (т)'],
+        ['001', '', '', 'ул. Ленина, 1', '2,5'],
+        ['002', 'В пути', 'Иванов', 'ул. Мира, 2', '1'],
+        ['003', 'Потерян', '', 'ул. Мира, 3', '1'],
+        ['004', 'В ожидании', 'Сидоров', 'ул. Мира, 4', '1'],
+    ])
+    result = bulk_import.import_file('orders', source, 'orders.csv', performed_by='импорт')
+    assert result.imported == 2
+    assert _reasons(result) == {4: "недопустимое значение: Статус", 5: "недопустимое значение: Имя водителя"}
+    orders = store.load_table('orders').set_index('Номер заказа')
+    assert orders.loc['001', 'Статус'] == "В ожидании" and orders.loc['001', 'Боковая выгрузка'] == "Нет"
+    assert orders.loc['001', 'Вес груза (т)'] == 2.5 and pd.notna(orders.loc['001', 'Время добавления'])
+    journal = store.load_table('assignments')
+    assert journal[['Номер заказа', 'Имя водителя', 'Кто изменил']].values.tolist() == [['002', 'Иванов', 'импорт']]
+    assert store.load_table('trucks')['Статус авто'].tolist() == ['В пути']
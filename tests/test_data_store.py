@@ -0,0 +1,116 @@
+# Запись таблиц через data_store: кэш, пачки изменений. Запуск: python -m pytest tests
+import pytest
+
+TRUCKS = [
+    {'Имя водителя': 'Иванов', 'Макс. грузоподъемность': 5.0, 'Боковая выгрузка': 'Да', 'Статус авто': 'Свободен'},
+    {'Имя водителя': 'Петров', 'Макс. грузоподъемность': 10.0, 'Боковая выгрузка': 'Нет', 'Статус авто': 'Свободен'},
+]
+
+
+def _status(store, driver):
+    df = store.load_table('trucks')
+    return df.loc[df['Имя водителя'] == driver, 'Статус авто'].iloc[0]
+
+
+# Ошибка записи пачки (файл занят): незаписанные изменения не остаются в кэше
+def test_batch_write_error_drops_cache(store):
+    store.insert_rows('trucks', TRUCKS)
+    assert _status(store, 'Иванов') == 'Свободен'
+
+    def locked(*args, **kwargs):
+        raise PermissionError('файл занят')
+
+    with pytest.MonkeyPatch.context() as mp:
+        for method in ('patch', 'write', 'update_rows'):
+            mp.setattr(store.backend, method, locked, raising=False)
+        with pytest.raises(PermissionError):
+            with store.batch('trucks'):
+                store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'На ремонте'})
+    assert _status(store, 'Иванов') == 'Свободен'
+
+
+def test_batch_writes_once(store):
+    store.insert_rows('trucks', TRUCKS)
+    with store.batch('trucks'):
+        store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+        store.update_rows('trucks', {'Имя водителя': 'Петров'}, {'Статус авто': 'На ремонте'})
+        store.delete_rows('trucks', {'Имя водителя': 'Петров'})
+    store.invalidate()
+    df = store.load_table('trucks')
+    assert df['Имя водителя'].tolist() == ['Иванов'] and _status(store, 'Иванов') == 'В пути'
+
+
+# Версии строк и слияние правок двух пользователей (форма запоминает версию и значения при открытии)
+def _opened(store, driver):
+    where = {'Имя водителя': driver}
+    return store.row_version('trucks', where), store.row_values('trucks', where)
+
+
+def test_update_with_current_version(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, base = _opened(store, 'Иванов')
+    assert version == 1
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'}, expected_version=version, base=base)
+    assert _status(store, 'Иванов') == 'В пути'
+    assert store.row_version('trucks', {'Имя водителя': 'Иванов'}) == 2
+
+
+def test_row_version_of_missing_row(store):
+    store.insert_rows('trucks', TRUCKS)
+    assert store.row_version('trucks', {'Имя водителя': 'Сидоров'}) is None
+    assert store.row_values('trucks', {'Имя водителя': 'Сидоров'}) is None
+
+
+# Чужая правка без значений, которые видел пользователь, — конфликт
+def test_stale_version_without_base_conflicts(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, _ = _opened(store, 'Иванов')
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+    with pytest.raises(store.ConflictError):
+        store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'На ремонте'}, expected_version=version)
+    assert _status(store, 'Иванов') == 'В пути'
+
+
+# Правки разных полей сливаются: поле, которое пользователь не менял, остаётся чужим
+def test_merge_different_fields(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, base = _opened(store, 'Иванов')
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'},
+                      {'Статус авто': 'Свободен', 'Макс. грузоподъемность': 7.5}, expected_version=version, base=base)
+    row = store.row_values('trucks', {'Имя водителя': 'Иванов'})
+    assert row['Статус авто'] == 'В пути' and row['Макс. грузоподъемность'] == 7.5
+
+
+# Одно и то же поле изменено обоими по-разному — конфликт с перечнем полей, ничего не записано
+def test_conflicting_field(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, base = _opened(store, 'Иванов')
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+    with pytest.raises(store.ConflictError) as error:
+        store.update_rows('trucks', {'Имя водителя': 'Иванов'},
+                          {'Статус авто': 'На ремонте', 'Макс. грузоподъемность': 7.5}, expected_version=version, base=base)
+    assert error.value.columns == ['Статус авто']
+    row = store.row_values('trucks', {'Имя водителя': 'Иванов'})
+    assert row['Статус авто'] == 'В пути' and row['Макс. грузоподъемность'] == 5.0
+
+
+# Оба выставили одно и то же значение — не конфликт
+def test_same_value_is_not_conflict(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, base = _opened(store, 'Иванов')
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'}, expected_version=version, base=base)
+    assert _status(store, 'Иванов') == 'В пути'
+
+
+def test_delete_stale_or_missing_conflicts(store):
+    store.insert_rows('trucks', TRUCKS)
+    version, _ = _opened(store, 'Иванов')
+    store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'В пути'})
+    with pytest.raises(store.ConflictError):
+        store.delete_rows('trucks', {'Имя водителя': 'Иванов'}, expected_version=version)
+    store.delete_rows('trucks', {'Имя водителя': 'Иванов'}, expected_version=version + 1)
+    with pytest.raises(store.ConflictError):
+        store.update_rows('trucks', {'Имя водителя': 'Иванов'}, {'Статус авто': 'Свободен'}, expected_version=version + 1)
+    assert store.load_table('trucks')['Имя водителя'].tolist() == ['Петров']
@@ -0,0 +1,165 @@
+# Распределение заказов по машинам (dispatch): задача о назначениях против перебора,
+# ограничения по весу и боковой выгрузке, причины, по которым заказ остался без машины.
+# Запуск: python -m pytest tests
+import itertools
+
+import numpy as np
+import pytest
+
+import dispatch
+
+
+# Минимальная сумма перебором: каждой строке (или столбцу, если строк больше) — свой элемент
+def _brute_force(cost):
+    n, m = cost.shape
+    if n <= m:
+        return min(cost[np.arange(n), list(columns)].sum() for columns in itertools.permutations(range(m), n))
+    return min(cost[list(rows), np.arange(m)].sum() for rows in itertools.permutations(range(n), m))
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (1, 4), (4, 1), (3, 3), (3, 5), (5, 3), (4, 6), (6, 4), (5, 5)])
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_matches_brute_force(shape, seed):
+    rng = np.random.default_rng(seed)
+    cost = rng.integers(0, 20, size=shape).astype(float)  # небольшие числа — много равных вариантов
+    rows, columns = dispatch.solve_assignment(cost)
+    assert len(rows) == min(shape)
+    assert len(set(rows)) == len(rows) and len(set(columns)) == len(columns)
+    assert list(rows) == sorted(rows)
+    assert cost[rows, columns].sum() == pytest.approx(_brute_force(cost))
+
+
+# Недопустимые пары не выбираются, пока есть допустимое назначение
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_avoids_infeasible(seed):
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(100, 1000, size=(4, 6))
+    cost[rng.random(cost.shape) < 0.4] = dispatch._INFEASIBLE
+    rows, columns = dispatch.solve_assignment(cost)
+    assert cost[rows, columns].sum() == pytest.approx(_brute_force(cost))
+
+
+def test_solve_empty():
+    rows, columns = dispatch.solve_assignment(np.empty((0, 3)))
+    assert len(rows) == len(columns) == 0
+
+
+ZONES = [
+    {'Название зоны': 'Центр', 'ID зоны': '1', 'Название улиц в зоне': 'ул. Ленина, ул. Мира',
+     'Стоимость доставки ГАЗель': 100.0, 'Стоимость доставки Валдай/ ГАЗон, ЗиЛ': 200.0,
+     'Стоимость доставки КАМаз': 400.0, 'Ср. расстояние от базы (км)': 5.0},
+    {'Название зоны': 'Окраина', 'ID зоны': '2', 'Название улиц в зоне': 'ул. Заводская',
+     'Стоимость доставки ГАЗель': 500.0, 'Стоимость доставки Валдай/ ГАЗон, ЗиЛ': 600.0,
+     'Стоимость доставки КАМаз': 900.0, 'Ср. расстояние от базы (км)': 30.0},
+]
+
+TRUCKS = [
+    {'Имя водителя': 'Малый', 'Макс. грузоподъемность': 3.5, 'Боковая выгрузка': 'Нет', 'Статус авто': 'Свободен'},
+    {'Имя водителя': 'Боковой', 'Макс. грузоподъемность': 10.0, 'Боковая выгрузка': 'Да', 'Статус авто': 'Свободен'},
+    # Большие машины недоступны: одна на ремонте, у другой заказ в пути
+    {'Имя водителя': 'Ремонт', 'Макс. грузоподъемность': 40.0, 'Боковая выгрузка': 'Да', 'Статус авто': 'На ремонте'},
+    {'Имя водителя': 'В рейсе', 'Макс. грузоподъемность': 40.0, 'Боковая выгрузка': 'Да', 'Статус авто': 'Свободен'},
+]
+
+
+def _order(number, address, weight, side='Нет', status=dispatch.PENDING_STATUS, driver=None):
+    return {'Номер заказа': number, 'Статус': status, 'Имя водителя': driver, 'Адрес доставки': address,
+            'Вес груза (т)': weight, 'Боковая выгрузка': side}
+
+
+ORDERS = [
+    _order('З-1', 'ул. Ленина, д. 1', 2.0),
+    _order('З-2', 'ул. Мира, д. 7', 20.0),                 # тяжелее всех доступных машин
+    _order('З-3', 'ул. Ленина, д. 3', 1.0, side='Да'),     # только машина с боковой выгрузкой
+    _order('З-4', '', 1.0),                                # без адреса
+    _order('З-5', 'ул. Заводская, д. 2', 3.0),             # машин меньше, чем заказов
+    _order('З-6', 'ул. Ленина, д. 9', 1.0, status='Выполнен'),
+    _order('З-7', 'ул. Мира, д. 1', 5.0, status='В пути', driver='В рейсе'),
+]
+
+
+@pytest.fixture
+def dataset(store):
+    store.insert_rows('delivery', ZONES)
+    store.insert_rows('trucks', TRUCKS)
+    store.insert_rows('orders', ORDERS)
+    return store
+
+
+def _reasons(plan):
+    return dict(zip(plan.unassigned['Номер заказа'], plan.unassigned['Причина']))
+
+
+def test_build_plan(dataset):
+    plan = dispatch.build_plan()
+    assigned = dict(zip(plan.assignments['Номер заказа'], plan.assignments['Имя водителя']))
+    # З-3 может взять только «Боковой», З-1 дешевле З-5 на «Малом»
+    assert assigned == {'З-1': 'Малый', 'З-3': 'Боковой'}
+    assert plan.total_cost == pytest.approx(100.0 + 200.0)
+    assert _reasons(plan) == {
+        'З-2': dispatch.REASON_NO_TRUCK,
+        'З-4': dispatch.REASON_NO_ZONE,
+        'З-5': dispatch.REASON_NO_SLOT,
+    }
+    assert list(plan.assignments['Название зоны']) == ['Центр', 'Центр']
+
+
+# Каждое назначение укладывается в грузоподъёмность и требование боковой выгрузки
+def test_plan_respects_constraints(dataset):
+    plan = dispatch.build_plan(trips=3)
+    trucks = {truck['Имя водителя']: truck for truck in TRUCKS}
+    orders = {order['Номер заказа']: order for order in ORDERS}
+    assert len(plan.assignments) == 3
+    for number, driver in zip(plan.assignments['Номер заказа'], plan.assignments['Имя водителя']):
+        assert orders[number]['Вес груза (т)'] <= trucks[driver]['Макс. грузоподъемность']
+        assert orders[number]['Боковая выгрузка'] == 'Нет' or trucks[driver]['Боковая выгрузка'] == 'Да'
+        assert driver not in ('Ремонт', 'В рейсе')
+    # Рейсы одной машины нумеруются подряд
+    for _, trips in plan.assignments.groupby('Имя водителя')['Рейс']:
+        assert sorted(trips) == list(range(1, len(trips) + 1))
+
+
+def test_cost_matrix_constraints(dataset):
+    cost = dispatch.cost_matrix(zones=np.array([0, 0, 1]), weights=np.array([2.0, 5.0, 1.0]),
+                                side_unloading=np.array([False, False, True]),
+                                capacities=np.array([3.5, 10.0]), truck_side=np.array([False, True]))
+    assert cost[0].tolist() == [100.0, 200.0]
+    assert cost[1, 0] == dispatch._INFEASIBLE and cost[1, 1] == 200.0  # не поднимет 5 т
+    assert cost[2, 0] == dispatch._INFEASIBLE and cost[2, 1] == 600.0  # нет боковой выгрузки
+
+
+# Запись плана: водители назначены, журнал назначений пополняется после записи заказов
+def test_apply_plan(dataset):
+    plan = dispatch.build_plan()
+    assert dispatch.apply_plan(plan, 'тест') == []
+    orders = dataset.load_table('orders').set_index('Номер заказа')
+    assert orders.loc['З-1', 'Имя водителя'] == 'Малый' and orders.loc['З-3', 'Имя водителя'] == 'Боковой'
+    journal = dataset.load_table('assignments')
+    assert sorted(journal['Номер заказа']) == ['З-1', 'З-3']
+
+
+# Заказ, изменённый после расчёта плана, пропускается
+def test_apply_plan_skips_changed_orders(dataset):
+    plan = dispatch.build_plan()
+    dataset.update_rows('orders', {'Номер заказа': 'З-1'}, {'Вес груза (т)': 2.5})
+    assert dispatch.apply_plan(plan, 'тест') == ['З-1']
+    assert list(dataset.load_table('assignments')['Номер заказа']) == ['З-3']
+
+
+# Запись машин не удалась — в журнале назначений нет; в xlsx пачка заказов тоже не записана
+# (в SQLite изменения записываются сразу, см. data_store.batch)
+def test_apply_plan_failure_keeps_journal(dataset, monkeypatch):
+    plan = dispatch.build_plan()
+    update_rows = dataset.update_rows
+
+    def failing(name, *args, **kwargs):
+        if name == 'trucks':
+            raise OSError('диск недоступен')
+        return update_rows(name, *args, **kwargs)
+
+    monkeypatch.setattr(dataset, 'update_rows', failing)
+    with pytest.raises(OSError):
+        dispatch.apply_plan(plan, 'тест')
+    assert dataset.load_table('assignments').empty
+    if not dataset.backend.row_level:
+        assert dataset.load_table('orders')['Имя водителя'].dropna().tolist() == ['В рейсе']
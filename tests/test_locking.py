@@ -0,0 +1,66 @@
+# Межпроцессная блокировка таблиц (locking.FileLock). Запуск: python -m pytest tests
+import threading
+import time
+
+import pytest
+
+import locking
+
+
+# Повторный захват тем же потоком: блокировка снимается только после последнего release
+def test_reentrant(tmp_path):
+    lock = locking.FileLock(str(tmp_path / 't.lock'), timeout=0.2)
+    other = locking.FileLock(str(tmp_path / 't.lock'), timeout=0.2)
+    with lock:
+        with lock:
+            pass
+        # Внешний захват ещё держится
+        with pytest.raises(locking.LockTimeout):
+            other.acquire()
+    with other:
+        pass
+
+
+# Второй объект на тот же файл — как другой процесс: ждёт timeout и получает LockTimeout
+def test_timeout(tmp_path):
+    path = str(tmp_path / 't.lock')
+    with locking.FileLock(path):
+        started = time.monotonic()
+        with pytest.raises(locking.LockTimeout):
+            locking.FileLock(path, timeout=0.2).acquire()
+        assert 0.2 <= time.monotonic() - started < 2
+
+
+# Другой поток ждёт, пока блокировку отпустят, и затем получает её
+def test_waits_for_release(tmp_path):
+    lock = locking.FileLock(str(tmp_path / 't.lock'), timeout=5)
+    order = []
+    lock.acquire()
+
+    def worker():
+        with lock:
+            order.append('worker')
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    time.sleep(0.1)
+    order.append('main')
+    lock.release()
+    thread.join(5)
+    assert order == ['main', 'worker']
+
+
+def test_other_thread_times_out(tmp_path):
+    lock = locking.FileLock(str(tmp_path / 't.lock'), timeout=0.1)
+    errors = []
+    with lock:
+        thread = threading.Thread(target=lambda: errors.append(pytest.raises(locking.LockTimeout, lock.acquire)))
+        thread.start()
+        thread.join(5)
+    assert len(errors) == 1
+
+
+# Одна блокировка на таблицу в пределах процесса
+def test_table_lock_registry(tmp_path):
+    assert locking.table_lock(str(tmp_path), 'orders') is locking.table_lock(str(tmp_path), 'orders')
+    assert locking.table_lock(str(tmp_path), 'orders') is not locking.table_lock(str(tmp_path), 'trucks')
@@ -0,0 +1,92 @@
+# Приведение таблиц к схеме (schema): ключи текстом, категории, даты, столбцы без типа.
+# Запуск: python -m pytest tests
+import numpy as np
+import pandas as pd
+
+import schema
+
+
+def test_to_text_keeps_leading_zeros_and_drops_integer_fraction():
+    values = pd.Series(['007', 12.0, 12.5, 7, np.nan], dtype=object)
+    assert schema.to_text(values).tolist()[:4] == ['007', '12', '12.5', '7']
+    assert pd.isna(schema.to_text(values).iloc[4])
+
+
+# Ключи и категории — текстом, остальные столбцы и пропуски — как есть
+def test_text_values():
+    values = schema.text_values('orders', {'Номер заказа': 12.0, 'Статус': 'Новый', 'Имя водителя': np.nan,
+                                           'Вес груза (т)': 3.0, 'Адрес доставки': 5})
+    assert values['Номер заказа'] == '12' and values['Статус'] == 'Новый'
+    assert pd.isna(values['Имя водителя'])
+    assert values['Вес груза (т)'] == 3.0 and values['Адрес доставки'] == 5
+    assert schema.text_values('orders', {'Номер заказа': ['1', 2]}) == {'Номер заказа': ['1', 2]}
+
+
+def test_coerce_types():
+    df = pd.DataFrame({
+        'Клиент': ['Иванов', 'Иванов', 'Петров', 'Петров'],
+        'Сумма долга': ['100', '250.5', '', None],
+        'Номер документа': ['007', 12.0, 13, None],
+        'Срок оплаты': ['2024-05-01', '15.05.2024', None, '2024-06-01 10:00'],
+    })
+    typed = schema.coerce('debts', df)
+    assert isinstance(typed['Клиент'].dtype, pd.CategoricalDtype)
+    assert typed['Сумма долга'].tolist()[:2] == [100.0, 250.5] and typed['Сумма долга'].isna().sum() == 2
+    assert typed['Номер документа'].tolist()[:3] == ['007', '12', '13']
+    assert typed['Срок оплаты'].tolist()[:2] == [pd.Timestamp('2024-05-01'), pd.Timestamp('2024-05-15')]
+    assert schema.untyped('debts', typed) == []
+    # Повторное приведение ничего не меняет
+    assert schema.coerce('debts', typed) is typed
+
+
+# Столбец, который нельзя привести без потери значений, остаётся как был и попадает в untyped
+def test_coerce_leaves_unconvertible_columns():
+    df = pd.DataFrame({
+        'Клиент': ['Иванов', 'Петров', 'Сидоров'],                   # не повторяются — не категория
+        'Сумма долга': ['100', 'сто', '300'],
+        'Номер документа': ['1', '2', '3'],
+        'Срок оплаты': ['2024-05-01', 'до пятницы', '2024-06-01'],
+    })
+    typed = schema.coerce('debts', df)
+    assert typed['Сумма долга'].tolist() == ['100', 'сто', '300']
+    assert typed['Срок оплаты'].tolist() == ['2024-05-01', 'до пятницы', '2024-06-01']
+    assert schema.untyped('debts', typed) == ['Клиент', 'Сумма долга', 'Срок оплаты']
+
+
+def test_concat_extends_categories():
+    df = schema.coerce('trucks', pd.DataFrame({
+        'Имя водителя': ['Иванов', 'Петров'], 'Статус авто': ['Свободен', 'Свободен']}))
+    rows = pd.DataFrame({'Имя водителя': ['Сидоров'], 'Статус авто': ['На ремонте']})
+    result = schema.concat('trucks', df, rows)
+    assert isinstance(result['Статус авто'].dtype, pd.CategoricalDtype)
+    assert result['Статус авто'].tolist() == ['Свободен', 'Свободен', 'На ремонте']
+    assert result['Имя водителя'].tolist() == ['Иванов', 'Петров', 'Сидоров']
+
+
+def test_cast():
+    df = schema.coerce('orders', pd.DataFrame({
+        'Номер заказа': ['1', '2'], 'Статус': ['Новый', 'Новый'], 'Время добавления': ['2024-05-01', '2024-05-02']}))
+    assert schema.cast(df, 'Номер заказа', 12.0) == '12'
+    assert schema.cast(df, 'Статус', 'Выполнен') == 'Выполнен'
+    assert 'Выполнен' in df['Статус'].cat.categories
+    assert schema.cast(df, 'Время добавления', '03.05.2024') == pd.Timestamp('2024-05-03')
+    assert schema.cast(df, 'Время добавления', 'вчера') == 'вчера'
+    assert pd.isna(schema.cast(df, 'Номер заказа', np.nan))
+    assert schema.cast(df, 'Нет такого', 5) == 5
+
+
+# Ключи переживают запись и чтение на обоих хранилищах; условие с числом находит текстовый ключ
+def test_keys_round_trip(store):
+    store.insert_rows('orders', [
+        {'Номер заказа': '007', 'Статус': 'Новый', 'Вес груза (т)': 1.0},
+        {'Номер заказа': 12.0, 'Статус': 'Новый', 'Вес груза (т)': 2.0},
+        {'Номер заказа': 7, 'Статус': 'Новый', 'Вес груза (т)': 3.0},
+    ])
+    store.invalidate()
+    df = store.load_table('orders')
+    assert df['Номер заказа'].tolist() == ['007', '12', '7']
+    store.update_rows('orders', {'Номер заказа': 12}, {'Статус': 'Выполнен'})
+    store.delete_rows('orders', {'Номер заказа': 7})
+    store.invalidate()
+    df = store.load_table('orders')
+    assert dict(zip(df['Номер заказа'], df['Статус'])) == {'007': 'Новый', '12': 'Выполнен'}
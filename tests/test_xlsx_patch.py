@@ -0,0 +1,286 @@
+# Точечная правка xlsx (xlsx_patch) против полной перезаписи: книга правится на месте,
+# перечитывается pd.read_excel/openpyxl и сравнивается с той же таблицей, записанной
+# заново через to_excel. Запуск: python -m pytest tests
+import datetime
+import re
+import zipfile
+from xml.sax.saxutils import escape, unescape
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import PatternFill
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+import xlsx_patch
+
+COLUMNS = ['Номер заказа', 'Клиент', 'Вес груза (т)', 'Время добавления']
+
+
+def _table(rows=6):
+    return pd.DataFrame({
+        'Номер заказа': [f'З-{i:03d}' for i in range(1, rows + 1)],
+        'Клиент': ['Иванов' if i % 2 else 'Петров' for i in range(rows)],  # повторы — общие строки
+        'Вес груза (т)': [1.5 * i for i in range(rows)],
+        'Время добавления': pd.date_range('2024-05-01 09:00', periods=rows, freq='D'),
+    })
+
+
+def _write(path, df):
+    df.to_excel(path, index=False, engine='openpyxl')
+    return path
+
+
+# Те же изменения, внесённые в таблицу в памяти (формат changes — как у patch_file)
+def _apply(df, changes):
+    df = df.copy()
+    for op, payload in changes:
+        if op == 'update':
+            for position, values in payload:
+                for column, value in values.items():
+                    df.loc[position, column] = value
+        elif op == 'delete':
+            df = df.drop(index=df.index[list(payload)]).reset_index(drop=True)
+        elif op == 'append':
+            df = pd.concat([df, pd.DataFrame(payload)], ignore_index=True)
+    return df
+
+
+# Правка на месте даёт то же, что перезапись таблицы целиком
+def _check_round_trip(tmp_path, df, changes):
+    patched = _write(tmp_path / 'patched.xlsx', df)
+    xlsx_patch.patch_file(patched, changes)
+    full = _write(tmp_path / 'full.xlsx', _apply(df, changes))
+    result = pd.read_excel(patched)
+    pd.testing.assert_frame_equal(result, pd.read_excel(full))
+    return result
+
+
+# Текст ячеек — в общий список строк, как сохраняет Excel (openpyxl пишет inlineStr)
+def _to_shared(path):
+    with zipfile.ZipFile(path) as z:
+        files = {name: z.read(name) for name in z.namelist()}
+    strings = []
+
+    def shared(match):
+        text = unescape(match.group(3))
+        if text not in strings:
+            strings.append(text)
+        return f'<c{match.group(1)} t="s"{match.group(2)}><v>{strings.index(text)}</v></c>'
+
+    sheet = re.sub(r'<c([^>]*?) t="inlineStr"([^>]*)><is><t[^>]*>(.*?)</t></is></c>', shared,
+                   files['xl/worksheets/sheet1.xml'].decode('utf-8'), flags=re.S)
+    files['xl/worksheets/sheet1.xml'] = sheet.encode('utf-8')
+    items = ''.join(f'<si><t>{escape(text)}</t></si>' for text in strings)
+    files['xl/sharedStrings.xml'] = (
+        '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'count="{len(strings)}" uniqueCount="{len(strings)}">{items}</sst>').encode('utf-8')
+    files['xl/_rels/workbook.xml.rels'] = files['xl/_rels/workbook.xml.rels'].replace(b'</Relationships>', (
+        b'<Relationship Id="rIdShared" Target="sharedStrings.xml" Type="http://schemas.openxmlformats.org/'
+        b'officeDocument/2006/relationships/sharedStrings"/></Relationships>'))
+    files['[Content_Types].xml'] = files['[Content_Types].xml'].replace(b'</Types>', (
+        b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+        b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'))
+    with zipfile.ZipFile(path, 'w') as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return path
+
+
+def _sheet_xml(path):
+    with zipfile.ZipFile(path) as z:
+        return z.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
+def test_update(tmp_path):
+    changes = [('update', [(0, {'Клиент': 'Сидоров', 'Вес груза (т)': 2.25}),
+                           (3, {'Время добавления': datetime.datetime(2024, 6, 1, 12, 30)})])]
+    result = _check_round_trip(tmp_path, _table(), changes)
+    assert result.loc[0, 'Клиент'] == 'Сидоров'
+
+
+def test_update_clears_value(tmp_path):
+    _check_round_trip(tmp_path, _table(), [('update', [(2, {'Клиент': None, 'Вес груза (т)': None})])])
+
+
+# Текст с символами разметки XML и переносом строки
+def test_update_escapes_text(tmp_path):
+    _check_round_trip(tmp_path, _table(), [('update', [(1, {'Клиент': 'ООО "Рога & <Копыта>"\nфилиал'})])])
+
+
+def test_append(tmp_path):
+    rows = [{'Номер заказа': 'З-100', 'Клиент': 'Новый', 'Вес груза (т)': 3.0,
+             'Время добавления': datetime.datetime(2024, 7, 1, 8, 0)},
+            {'Номер заказа': 'З-101', 'Клиент': 'Иванов', 'Вес груза (т)': None,
+             'Время добавления': datetime.datetime(2024, 7, 2, 8, 0)}]
+    _check_round_trip(tmp_path, _table(), [('append', rows)])
+
+
+@pytest.mark.parametrize('positions', [[0], [2], [5], [1, 3, 4]])
+def test_delete(tmp_path, positions):
+    _check_round_trip(tmp_path, _table(), [('delete', positions)])
+
+
+# Несколько операций подряд, номера строк — на момент операции
+def test_mixed_operations(tmp_path):
+    changes = [('update', [(4, {'Клиент': 'Сидоров'})]),
+               ('delete', [1, 2]),
+               ('append', [{'Номер заказа': 'З-200', 'Клиент': 'Петров', 'Вес груза (т)': 7.5,
+                            'Время добавления': datetime.datetime(2024, 8, 1)}]),
+               ('update', [(0, {'Вес груза (т)': 0.5})])]
+    _check_round_trip(tmp_path, _table(), changes)
+
+
+# Книга с общим списком строк: заголовок читается из него, неизменённые ячейки остаются
+# ссылками на список, новые значения пишутся inlineStr
+def test_shared_strings(tmp_path):
+    df = _table()
+    path = _to_shared(_write(tmp_path / 'patched.xlsx', df))
+    assert 't="inlineStr"' not in _sheet_xml(path)
+    changes = [('update', [(0, {'Клиент': 'Сидоров'})]), ('delete', [2]),
+               ('append', [{'Номер заказа': 'З-600', 'Клиент': 'Иванов'}])]
+    xlsx_patch.patch_file(path, changes)
+    sheet = _sheet_xml(path)
+    assert 't="s"' in sheet and 't="inlineStr"' in sheet
+    full = _write(tmp_path / 'full.xlsx', _apply(df, changes))
+    pd.testing.assert_frame_equal(pd.read_excel(path), pd.read_excel(full))
+    ws = load_workbook(path).active
+    assert [cell.value for cell in ws[1]] == COLUMNS
+    assert ws['B2'].value == 'Сидоров' and ws['B3'].value == 'Иванов'
+
+
+# Размер листа (<dimension>) следует за числом строк
+def test_dimension(tmp_path):
+    path = _write(tmp_path / 'orders.xlsx', _table())
+    xlsx_patch.patch_file(path, [('delete', [0, 1])])
+    assert '<dimension ref="A1:D5"' in _sheet_xml(path)
+    assert load_workbook(path).active.max_row == 5
+
+
+# Оформление ячеек сохраняется, новая строка берёт его у последней строки таблицы
+def test_styles_kept(tmp_path):
+    path = _write(tmp_path / 'orders.xlsx', _table())
+    wb = load_workbook(path)
+    for row in wb.active.iter_rows(min_row=2):
+        row[2].number_format = '0.000'
+    wb.save(path)
+    xlsx_patch.patch_file(path, [('update', [(0, {'Вес груза (т)': 9.0})]),
+                                 ('append', [{'Номер заказа': 'З-300', 'Вес груза (т)': 1.0}])])
+    ws = load_workbook(path).active
+    assert ws['C2'].number_format == '0.000' and ws['C8'].number_format == '0.000'
+    assert ws['D2'].is_date
+
+
+# Книги с частями листа, которые ссылаются на номера строк
+def _merged(ws):
+    ws.merge_cells('F4:G4')
+
+
+def _conditional(ws):
+    ws.conditional_formatting.add('C2:C7', CellIsRule(operator='greaterThan', formula=['3'],
+                                                       fill=PatternFill('solid', start_color='FF0000')))
+
+
+def _validation(ws):
+    validation = DataValidation(type='list', formula1='"Иванов,Петров"')
+    validation.add('B2:B7')
+    ws.add_data_validation(validation)
+
+
+def _filter(ws):
+    ws.auto_filter.ref = 'A1:D7'
+
+
+def _formula(ws):
+    ws['F2'] = '=SUM(C2:C7)'
+
+
+def _defined_name(ws):
+    ws.parent.defined_names['Веса'] = DefinedName('Веса', attr_text=f'{ws.title}!$C$2:$C$7')
+
+
+REFERENCES = [_merged, _conditional, _validation, _filter, _formula, _defined_name]
+
+
+def _with(tmp_path, extra):
+    path = _write(tmp_path / 'orders.xlsx', _table())
+    wb = load_workbook(path)
+    extra(wb.active)
+    wb.save(path)
+    return path
+
+
+# Удаление строк на таком листе сдвинуло бы ячейки, но не ссылки — лист записывается целиком
+@pytest.mark.parametrize('extra', REFERENCES)
+def test_delete_with_row_references_unpatchable(tmp_path, extra):
+    path = _with(tmp_path, extra)
+    before = path.read_bytes()
+    with pytest.raises(xlsx_patch.Unpatchable):
+        xlsx_patch.patch_file(path, [('delete', [1])])
+    assert path.read_bytes() == before
+
+
+# Правка и добавление строк номера не сдвигают: ссылки остаются верными
+@pytest.mark.parametrize('extra', REFERENCES)
+def test_update_with_row_references(tmp_path, extra):
+    path = _with(tmp_path, extra)
+    xlsx_patch.patch_file(path, [('update', [(0, {'Клиент': 'Сидоров'})]),
+                                 ('append', [{'Номер заказа': 'З-400', 'Клиент': 'Петров'}])])
+    ws = load_workbook(path).active
+    assert ws['B2'].value == 'Сидоров' and ws['A8'].value == 'З-400'
+    if extra is _merged:
+        assert [str(r) for r in ws.merged_cells.ranges] == ['F4:G4']
+
+
+# Ячейки вне столбцов таблицы (заметка справа) при правке остаются на месте
+def test_cells_outside_table_kept_on_update(tmp_path):
+    path = _with(tmp_path, lambda ws: ws.cell(row=5, column=6, value='заметка'))
+    xlsx_patch.patch_file(path, [('update', [(3, {'Клиент': 'Сидоров'})])])
+    ws = load_workbook(path).active
+    assert ws['F5'].value == 'заметка' and ws['B5'].value == 'Сидоров'
+
+
+# Удаление строки целиком унесло бы заметку вместе со строкой или сдвинуло её
+def test_cells_outside_table_block_delete(tmp_path):
+    path = _with(tmp_path, lambda ws: ws.cell(row=5, column=6, value='заметка'))
+    with pytest.raises(xlsx_patch.Unpatchable):
+        xlsx_patch.patch_file(path, [('delete', [1])])
+    # Строки ниже заметки удаляются на месте: её строка не затронута
+    xlsx_patch.patch_file(path, [('delete', [5])])
+    ws = load_workbook(path).active
+    assert ws['F5'].value == 'заметка' and ws.max_row == 6
+
+
+def test_unknown_column_unpatchable(tmp_path):
+    path = _write(tmp_path / 'orders.xlsx', _table())
+    with pytest.raises(xlsx_patch.Unpatchable):
+        xlsx_patch.patch_file(path, [('update', [(0, {'Статус': 'Новый'})])])
+
+
+def test_position_out_of_range_unpatchable(tmp_path):
+    path = _write(tmp_path / 'orders.xlsx', _table())
+    with pytest.raises(xlsx_patch.Unpatchable):
+        xlsx_patch.patch_file(path, [('delete', [6])])
+
+
+# Пустые строки с оформлением после таблицы не считаются данными
+def test_styled_empty_rows_after_table(tmp_path):
+    df = _table()
+    path = _write(tmp_path / 'patched.xlsx', df)
+    wb = load_workbook(path)
+    for row in range(8, 11):
+        wb.active.cell(row=row, column=2).fill = PatternFill('solid', start_color='FFFF00')
+    wb.save(path)
+    changes = [('append', [{'Номер заказа': 'З-500', 'Клиент': 'Петров'}]), ('delete', [0])]
+    xlsx_patch.patch_file(path, changes)
+    full = _write(tmp_path / 'full.xlsx', _apply(df, changes))
+    pd.testing.assert_frame_equal(pd.read_excel(path), pd.read_excel(full))
+
+
+def test_empty_sheet_unpatchable(tmp_path):
+    path = tmp_path / 'empty.xlsx'
+    Workbook().save(path)
+    with pytest.raises(xlsx_patch.Unpatchable):
+        xlsx_patch.patch_file(path, [('append', [{'Клиент': 'Иванов'}])])
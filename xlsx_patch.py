@@ -0,0 +1,280 @@
+import datetime
+import re
+import zipfile
+from xml.sax.saxutils import escape, unescape
+
+import numpy as np
+import pandas as pd
+
+from locking import remove_file, replace_file, temp_path
+
+# Точечное изменение первого листа xlsx прямо в XML, без разбора всей книги openpyxl:
+# затрагиваются только изменённые строки, остальные файлы книги копируются как есть,
+# оформление ячеек (атрибут s) сохраняется. Новые строки текста записываются как
+# inlineStr, чтобы не перестраивать общий список строк (sharedStrings.xml).
+
+_ROW_START = re.compile(r'<row\b[^>]*?\br="(\d+)"')
+_NUMBERED = re.compile(r'(<row\b[^>]*?\br="|<c\b[^>]*?\br="[A-Z]+)(\d+)"')
+_ROW = re.compile(r'<row\b([^>]*?\br="(\d+)"[^>]*?)(?:/>|>(.*?)</row>)', re.S)
+_CELL = re.compile(r'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_REF = re.compile(r'\br="([A-Z]+)(\d+)"')
+_ROW_NUMBER = re.compile(r'\br="(\d+)"')
+_STYLE = re.compile(r'\bs="(\d+)"')
+_TYPE = re.compile(r'\bt="(\w+)"')
+_VALUE = re.compile(r'<v>(.*?)</v>', re.S)
+_TEXT = re.compile(r'<t\b[^>]*>(.*?)</t>', re.S)
+_DIMENSION = re.compile(r'(<dimension ref="[A-Z]+\d+:[A-Z]+)\d+("\s*/>)')
+_CELL_COLUMN = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"')
+# Части листа, которые ссылаются на номера строк (объединения, условное форматирование,
+# проверки, фильтр, ссылки, таблицы, рисунки и примечания, разрывы, формулы): при удалении
+# строк их пришлось бы сдвигать вместе с ячейками, поэтому такой лист записывается целиком
+_ROW_REFERENCES = re.compile(
+    r'<(?:mergeCell|conditionalFormatting|dataValidation|autoFilter|hyperlink|tablePart'
+    r'|drawing|legacyDrawing|rowBreaks|f)\b')
+_DEFINED_NAME = re.compile(r'<definedName\b')
+_EPOCH = datetime.datetime(1899, 12, 30)
+
+
+# Изменение, которое нельзя внести в ячейки (формат листа не поддерживается)
+class Unpatchable(Exception):
+    pass
+
+
+def _letters(number):
+    letters = ''
+    while number:
+        number, rest = divmod(number - 1, 26)
+        letters = chr(65 + rest) + letters
+    return letters
+
+
+def _number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+# Путь к XML первого листа (его читает pd.read_excel)
+def _sheet_path(zin):
+    workbook = zin.read('xl/workbook.xml').decode('utf-8')
+    if re.search(r'date1904="(1|true)"', workbook):
+        raise Unpatchable('date1904')
+    rel_id = re.search(r'<sheet\b[^>]*\br:id="([^"]+)"', workbook).group(1)
+    rels = zin.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+    for attrs in re.findall(r'<Relationship\b([^>]*)/?>', rels):
+        if f'Id="{rel_id}"' in attrs:
+            target = re.search(r'Target="([^"]+)"', attrs).group(1)
+            return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    raise Unpatchable('sheet')
+
+
+# Текст ячеек из общего списка строк (только нужные номера)
+def _shared_strings(zin, wanted):
+    if not wanted or 'xl/sharedStrings.xml' not in zin.namelist():
+        return {}
+    xml = zin.read('xl/sharedStrings.xml').decode('utf-8')
+    strings = {}
+    for number, match in enumerate(re.finditer(r'<si>(.*?)</si>', xml, re.S)):
+        if number in wanted:
+            strings[number] = unescape(''.join(_TEXT.findall(match.group(1))))
+            if len(strings) == len(wanted):
+                break
+    return strings
+
+
+class _Row:
+    def __init__(self, attrs, body):
+        self.attrs = re.sub(r'\s+spans="[^"]*"', '', attrs)  # spans необязателен и устаревает
+        self.cells = {}
+        for match in _CELL.finditer(body or ''):
+            self.cells[_number(_REF.search(match.group(1)).group(1))] = (match.group(1), match.group(2) or '')
+
+    def has_values(self):
+        return any('<v>' in body or '<is>' in body for _, body in self.cells.values())
+
+    def style(self, column):
+        attrs = self.cells.get(column, ('', ''))[0]
+        match = _STYLE.search(attrs)
+        return match.group(1) if match else None
+
+    # Значение в ячейку; template — строка, у которой берётся оформление новой ячейки
+    def set(self, column, value, template=None):
+        style = self.style(column) or (template.style(column) if template else None)
+        style_attr = f' s="{style}"' if style else ''
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+            self.cells[column] = (style_attr, '')
+            return
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, bool):
+            cell = (f'{style_attr} t="b"', f'<v>{int(value)}</v>')
+        elif isinstance(value, (int, float)):
+            if not np.isfinite(value):
+                raise Unpatchable('inf')
+            cell = (f'{style_attr} t="n"', f'<v>{value!r}</v>')
+        elif isinstance(value, (datetime.datetime, datetime.date)):
+            if not style:
+                raise Unpatchable('date style')  # без формата даты Excel покажет число
+            if not isinstance(value, datetime.datetime):
+                value = datetime.datetime(value.year, value.month, value.day)
+            serial = (pd.Timestamp(value).tz_localize(None).to_pydatetime() - _EPOCH) / datetime.timedelta(days=1)
+            cell = (f'{style_attr} t="n"', f'<v>{serial!r}</v>')
+        else:
+            cell = (f'{style_attr} t="inlineStr"', f'<is><t xml:space="preserve">{escape(str(value))}</t></is>')
+        self.cells[column] = cell
+
+    def xml(self, number):
+        attrs = _ROW_NUMBER.sub(f'r="{number}"', self.attrs)
+        cells = ''.join(
+            f'<c r="{_letters(column)}{number}"{_REF.sub("", attrs)}/>' if not body
+            else f'<c r="{_letters(column)}{number}"{_REF.sub("", attrs)}>{body}</c>'
+            for column, (attrs, body) in sorted(self.cells.items())
+        )
+        return f'<row{attrs}>{cells}</row>' if cells else f'<row{attrs}/>'
+
+
+# Сдвиг номеров строк и ссылок ячеек в участке XML (после удаления строк выше него)
+def _shifted(xml, delta):
+    if not delta:
+        return xml
+    return _NUMBERED.sub(lambda match: f'{match.group(1)}{int(match.group(2)) - delta}"', xml)
+
+
+# Применение изменений к файлу path (формат changes — см. XlsxBackend.patch).
+# Строки данных нумеруются с 0 и соответствуют строкам pd.read_excel: 0 — вторая строка листа.
+def patch_file(path, changes):
+    with zipfile.ZipFile(path) as zin:
+        sheet_path = _sheet_path(zin)
+        sheet = zin.read(sheet_path).decode('utf-8')
+        # Границы строк ищутся только по открывающим тегам; строка разбирается, когда её меняют
+        start = sheet.find('<sheetData>')
+        stop = sheet.find('</sheetData>', start)
+        if start < 0 or stop < 0:
+            raise Unpatchable('header')  # <sheetData/> — пустой лист без заголовка
+        start += len('<sheetData>')
+        body = sheet[start:stop]
+        starts = [(match.start(), int(match.group(1))) for match in _ROW_START.finditer(body)]
+        if not starts or starts[0][1] != 1:
+            raise Unpatchable('header')
+
+        # Строки листа по порядку: lines[0] — заголовок, None — строка, которой нет в XML;
+        # у остальных — (начало, конец в body, номер строки в файле)
+        lines = []
+        for i, (offset, number) in enumerate(starts):
+            lines.extend([None] * (number - 1 - len(lines)))
+            lines.append((offset, starts[i + 1][0] if i + 1 < len(starts) else len(body), number))
+        parsed = {}
+
+        def parse(line):
+            match = _ROW.match(body, line[0])
+            return _Row(match.group(1), match.group(3))
+
+        def row(index):
+            if index not in parsed:
+                parsed[index] = parse(lines[index]) if lines[index] else _Row(f' r="{index + 1}"', '')
+            return parsed[index]
+
+        header = row(0)
+        shared = {int(_VALUE.search(content).group(1)) for attrs, content in header.cells.values()
+                  if _TYPE.search(attrs) and _TYPE.search(attrs).group(1) == 's'}
+        strings = _shared_strings(zin, shared)
+        columns = {}
+        for column, (attrs, content) in header.cells.items():
+            kind = _TYPE.search(attrs).group(1) if _TYPE.search(attrs) else None
+            if kind == 's':
+                text = strings.get(int(_VALUE.search(content).group(1)))
+            elif kind == 'inlineStr':
+                text = unescape(''.join(_TEXT.findall(content)))
+            else:
+                value = _VALUE.search(content)
+                text = unescape(value.group(1)) if value else None
+            if text is not None:
+                columns[text.replace('\n', ' ')] = column
+
+        def column_of(name):
+            if name not in columns:
+                raise Unpatchable(f'column {name}')
+            return columns[name]
+
+        # Конец данных: пустые строки с оформлением после последней заполненной — не данные
+        end = len(lines)
+        while end > 1 and (lines[end - 1] is None or not row(end - 1).has_values()):
+            end -= 1
+
+        # Удалить строку целиком можно, только если ниже первой удаляемой строки все ячейки
+        # в столбцах таблицы: ячейки вне её (в столбцах без заголовка) нельзя ни унести
+        # вместе со строкой, ни сдвинуть вверх — такой лист записывается целиком
+        def check_delete(index):
+            if _ROW_REFERENCES.search(sheet) or _DEFINED_NAME.search(zin.read('xl/workbook.xml').decode('utf-8')):
+                raise Unpatchable('row references')
+            offset = next((line[0] for line in lines[index:] if line), len(body))
+            table = set(columns.values())
+            if any(_number(letters) not in table for letters in set(_CELL_COLUMN.findall(body, offset))):
+                raise Unpatchable('cells outside the table')
+
+        for op, payload in changes:
+            if op == 'update':
+                for position, values in payload:
+                    if position + 1 >= end:
+                        raise Unpatchable('position')
+                    target = row(position + 1)
+                    for name, value in values.items():
+                        target.set(column_of(name), value)
+            elif op == 'delete':
+                if payload:
+                    check_delete(min(payload) + 1)
+                for position in sorted(payload, reverse=True):
+                    if position + 1 >= end:
+                        raise Unpatchable('position')
+                    index = position + 1
+                    del lines[index]
+                    parsed = {(i - 1 if i > index else i): r for i, r in parsed.items() if i != index}
+                    end -= 1
+            elif op == 'append':
+                template = row(end - 1) if end > 1 else None
+                for values in payload:
+                    if end == len(lines):
+                        lines.append(None)
+                    target = row(end)
+                    for name, value in values.items():
+                        target.set(column_of(name), value, template)
+                    end += 1
+
+        # Сборка: подряд идущие неизменённые строки копируются одним куском (со сдвигом номеров,
+        # если выше были удалены строки), изменённые — собираются заново
+        parts = []
+        run = None  # [начало, конец, сдвиг] текущего куска
+        for index, line in enumerate(lines):
+            if index in parsed:
+                if run:
+                    parts.append(_shifted(body[run[0]:run[1]], run[2]))
+                    run = None
+                parts.append(parsed[index].xml(index + 1))
+            elif line is not None:
+                delta = line[2] - index - 1
+                if run and run[1] == line[0] and run[2] == delta:
+                    run[1] = line[1]
+                else:
+                    if run:
+                        parts.append(_shifted(body[run[0]:run[1]], run[2]))
+                    run = [line[0], line[1], delta]
+        if run:
+            parts.append(_shifted(body[run[0]:run[1]], run[2]))
+        sheet = sheet[:start] + ''.join(parts) + sheet[stop:]
+        sheet = _DIMENSION.sub(lambda m: f'{m.group(1)}{max(len(lines), 1)}{m.group(2)}', sheet, count=1)
+
+        tmp_path = temp_path(path)
+        try:
+            # Быстрое сжатие: файл чуть больше, но запись в несколько раз быстрее
+            with zipfile.ZipFile(tmp_path, 'w') as zout:
+                for info in zin.infolist():
+                    zout.writestr(info, sheet.encode('utf-8') if info.filename == sheet_path else zin.read(info.filename),
+                                  compresslevel=1)
+        except BaseException:
+            remove_file(tmp_path)
+            raise
+    try:
+        replace_file(tmp_path, path)
+    finally:
+        remove_file(tmp_path)
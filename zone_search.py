@@ -0,0 +1,179 @@
+import bisect
+import re
+from collections import defaultdict
+
+import data_store
+import profiling
+
+# Служебные слова адреса: не участвуют в поиске, если в запросе есть что-то ещё
+STOP_WORDS = {
+    'ул', 'улица', 'пер', 'переулок', 'пр', 'пр-т', 'пр-кт', 'проспект', 'пр-д', 'проезд',
+    'б-р', 'бульвар', 'пл', 'площадь', 'ш', 'шоссе', 'туп', 'тупик', 'наб', 'набережная',
+    'мкр', 'мкрн', 'микрорайон', 'р-н', 'район', 'кв-л', 'квартал', 'снт', 'г', 'с', 'пос', 'п',
+}
+
+# Слова номера дома и квартиры: при поиске зоны по полному адресу отбрасываются
+HOUSE_WORDS = {'д', 'дом', 'кв', 'квартира', 'корп', 'корпус', 'к', 'стр', 'строение', 'лит', 'литера', 'оф', 'офис'}
+
+_NON_WORD = re.compile(r'[^\w\-]+')
+_HOUSE_NUMBER = re.compile(r'^\d+[а-я]?$')
+
+# Баллы за совпадения (больше — выше в выдаче)
+SCORE_EXACT = 100
+SCORE_TOKEN = 10
+SCORE_PREFIX = 6
+SCORE_ZONE_FIELD = 3
+
+
+# Нормализация текста: нижний регистр, ё -> е, без знаков препинания
+def normalize(text):
+    text = str(text).lower().replace('ё', 'е')
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+# Слова для поиска: без служебных, если остаётся хоть одно значимое слово
+def tokenize(text):
+    tokens = [t.strip('-') for t in normalize(text).split()]
+    tokens = [t for t in tokens if t]
+    meaningful = [t for t in tokens if t not in STOP_WORDS]
+    return meaningful or tokens
+
+
+def _trigrams(token):
+    padded = f' {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Поисковый индекс по улицам и названиям зон: словарь слов (для поиска по префиксу)
+# и триграммы (для запросов с опечатками). Строится один раз на версию таблицы.
+class ZoneIndex:
+    def __init__(self, df):
+        self.entries = []  # (индекс строки зоны, текст, нормализованный текст, это название зоны)
+        self.exact = {}  # нормализованный текст -> индекс строки зоны
+        postings = defaultdict(set)
+        trigram_postings = defaultdict(set)
+
+        names = df['Название зоны'] if 'Название зоны' in df else [None] * len(df)
+        ids = df['ID зоны'] if 'ID зоны' in df else [None] * len(df)
+        streets_column = df['Название улиц в зоне'] if 'Название улиц в зоне' in df else [None] * len(df)
+        for row_index, zone_name, zone_id, streets in zip(df.index, names, ids, streets_column):
+            items = [(zone_name, True), (zone_id, True)] + [(street, False) for street in _split_streets(streets)]
+            for text, is_zone in items:
+                if text is None or (isinstance(text, float) and text != text) or not str(text).strip():
+                    continue
+                text = str(text).strip()
+                entry_id = len(self.entries)
+                self.entries.append((row_index, text, normalize(text), is_zone))
+                self.exact.setdefault(normalize(text), row_index)
+                for token in tokenize(text):
+                    postings[token].add(entry_id)
+                    for gram in _trigrams(token):
+                        trigram_postings[gram].add(entry_id)
+
+        self.postings = dict(postings)
+        self.trigram_postings = dict(trigram_postings)
+        self.vocabulary = sorted(self.postings)
+
+    # Подсказки для поля ввода: уникальные улицы и зоны
+    @property
+    def suggestions(self):
+        return list(dict.fromkeys(text for _, text, _, _ in self.entries))
+
+    # Слова словаря, начинающиеся с prefix (бинарный поиск по отсортированному словарю)
+    def _prefix_tokens(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '\uffff')
+        return self.vocabulary[start:end]
+
+    # Поиск зон по адресу или названию зоны.
+    # Возвращает список (индекс строки зоны, балл, совпавший текст), лучшие — первыми.
+    def search(self, query, limit=50):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = self._match_tokens(tokens)
+        if not scores:
+            scores = self._match_trigrams(tokens)
+        return self._rank(scores, normalize(query))[:limit]
+
+    # Зона для полного адреса (улица с номером дома): индекс строки зоны или None
+    def locate(self, address):
+        normalized_address = normalize(address)
+        if normalized_address in self.exact:
+            return self.exact[normalized_address]
+        tokens = tokenize(address)
+        street_tokens = [t for t in tokens if t not in HOUSE_WORDS and not _HOUSE_NUMBER.match(t)]
+        for candidate in (tokens, street_tokens):
+            scores = self._match_tokens(candidate) if candidate else {}
+            if scores:
+                return self._rank(scores, normalized_address)[0][0]
+        scores = self._match_trigrams(street_tokens or tokens) if (street_tokens or tokens) else {}
+        return self._rank(scores, normalized_address)[0][0] if scores else None
+
+    # Лучшее совпадение на каждую зону, отсортированное по баллам
+    def _rank(self, scores, normalized_query):
+        best = {}
+        for entry_id, score in sorted(scores.items()):
+            row_index, text, normalized_text, is_zone = self.entries[entry_id]
+            if normalized_text == normalized_query:
+                score += SCORE_EXACT
+            if is_zone:
+                score += SCORE_ZONE_FIELD
+            # Короткие совпадения точнее длинных
+            score -= len(normalized_text) / 1000
+            if row_index not in best or score > best[row_index][0]:
+                best[row_index] = (score, text)
+
+        # При равных баллах зоны идут в порядке таблицы
+        ranked = sorted(best.items(), key=lambda item: -item[1][0])
+        return [(row_index, score, text) for row_index, (score, text) in ranked]
+
+    # Все слова запроса должны совпасть целиком или по началу слова
+    def _match_tokens(self, tokens):
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for entry_id in self.postings.get(token, ()):
+                token_scores[entry_id] = SCORE_TOKEN
+            for candidate in self._prefix_tokens(token):
+                if candidate == token:
+                    continue
+                for entry_id in self.postings[candidate]:
+                    token_scores.setdefault(entry_id, SCORE_PREFIX)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {e: scores[e] + s for e, s in token_scores.items() if e in scores}
+            if not scores:
+                return {}
+        return scores
+
+    # Нечёткий поиск по доле общих триграмм (опечатки, пропущенные буквы)
+    def _match_trigrams(self, tokens, threshold=0.5):
+        query_grams = set().union(*(_trigrams(t) for t in tokens))
+        counts = defaultdict(int)
+        for gram in query_grams:
+            for entry_id in self.trigram_postings.get(gram, ()):
+                counts[entry_id] += 1
+        return {entry_id: SCORE_TOKEN * count / len(query_grams)
+                for entry_id, count in counts.items() if count / len(query_grams) >= threshold}
+
+
+def _split_streets(streets):
+    if streets is None or (isinstance(streets, float) and streets != streets):
+        return []
+    return [s.strip() for s in re.split(r'[,;\n]', str(streets)) if s.strip()]
+
+
+# Индекс для текущей версии таблицы зон (перестраивается только после её изменения)
+def get_index():
+    return data_store.derived('delivery', 'zone_index', ZoneIndex)
+
+
+# Поиск строк таблицы зон, отсортированных по релевантности
+def search_zones(df_delivery, query, limit=50):
+    index = get_index()
+    with profiling.span('search', query=query):
+        results = index.search(query, limit)
+    rows = [row_index for row_index, _, _ in results if row_index in df_delivery.index]
+    return df_delivery.loc[rows]